@@ -1,16 +1,18 @@
 from __future__ import annotations
 
-import os
+import time
+
+# Taken before any heavy import so cold/warm start times cover them.
+_STARTED = time.perf_counter()
+
 import sys
 from pathlib import Path
 
-from streamlit.web import cli as stcli
+def _start_server(port: int) -> int:
+    # Imported only when a new server is really needed: a second launch that
+    # finds a running instance never loads Streamlit.
+    from streamlit.web import cli as stcli
 
-def main() -> int:
-    """
-    Entry-point script suitable for PyInstaller.
-    It launches the Streamlit app programmatically.
-    """
     base_dir = Path(__file__).parent
     app_path = base_dir / "vocab_hub" / "app.py"
 
@@ -20,10 +22,21 @@ def main() -> int:
         "run",
         str(app_path),
         "--server.headless=true",
+        f"--server.port={port}",
         "--browser.gatherUsageStats=false",
     ]
     return stcli.main()
 
+def main() -> int:
+    """
+    Entry-point script suitable for PyInstaller.
+    Opens the already running app if there is one (see vocab_hub/launcher.py),
+    otherwise launches the Streamlit app programmatically.
+    """
+    from vocab_hub.launcher import launch
+
+    return launch(_start_server, started=_STARTED)
+
 if __name__ == "__main__":
     if hasattr(sys, "frozen"):
         # Running as PyInstaller exe: launch Streamlit server
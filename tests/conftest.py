@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from vocab_hub.db.connection import ensure_db  # noqa: E402
+from vocab_hub.db.storage import set_storage  # noqa: E402
+
+@pytest.fixture
+def app_dir(tmp_path, monkeypatch):
+    """A fresh, empty data folder used by the config-selected backend."""
+    monkeypatch.setenv("FIT_VOCAB_APP_DIR", str(tmp_path))
+    monkeypatch.delenv("FIT_VOCAB_TENANT", raising=False)
+    monkeypatch.delenv("FIT_VOCAB_STORAGE", raising=False)
+    set_storage(None)
+    ensure_db()
+    yield tmp_path
+    set_storage(None)
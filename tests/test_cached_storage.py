@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import pytest
+
+from vocab_hub.config import get_db_path
+from vocab_hub.db.cached_storage import CachedStorage
+from vocab_hub.db.sqlite_storage import SQLiteStorage
+
+def _values(term_en: str) -> dict:
+    return {
+        "term_en": term_en,
+        "term_ar": "مصطلح",
+        "definition_en": f"{term_en} definition",
+        "definition_ar": "تعريف",
+        "example_en": "",
+        "difficulty": 1,
+        "category": "",
+    }
+
+def _terms(storage, course_id: int) -> list:
+    return [w["term_en"] for w in storage.get_vocab_for_course(course_id)]
+
+@pytest.fixture
+def workers(app_dir, monkeypatch):
+    """Two cached backends on one file, as in two worker processes."""
+    monkeypatch.setenv("FIT_VOCAB_CACHE_CHECK_MS", "0")
+    monkeypatch.setenv("FIT_VOCAB_CACHE_NOTIFY_PORTS", "")
+    a = CachedStorage(SQLiteStorage(get_db_path()))
+    b = CachedStorage(SQLiteStorage(get_db_path()))
+    yield a, b
+    a.close()
+    b.close()
+
+def test_outside_writes_drop_only_the_changed_course(workers):
+    a, b = workers
+    networks = a.add_course("Networks", "")
+    security = a.add_course("Security", "")
+    router = a.add_vocab_item(networks, _values("router"))
+    a.add_vocab_item(security, _values("firewall"))
+
+    assert _terms(b, networks) == ["router"]
+    assert _terms(b, security) == ["firewall"]
+    misses = b.misses
+
+    # The other worker's commit bumps data_version of b's connection.
+    version = b._data_version
+    a.add_vocab_item(networks, _values("switch"))
+    assert _terms(b, networks) == ["router", "switch"]
+    assert b._data_version != version
+    assert _terms(b, security) == ["firewall"]
+    assert b.misses == misses + 1
+
+    a.delete_vocab_item(router)
+    assert _terms(b, networks) == ["switch"]
+    a.update_course(security, "Cyber security", "")
+    assert [c["name"] for c in b.get_courses()] == ["Cyber security", "Networks"]
+
+def test_reads_stay_cached_until_the_next_check(workers):
+    a, b = workers
+    networks = a.add_course("Networks", "")
+    a.add_vocab_item(networks, _values("router"))
+    assert _terms(b, networks) == ["router"]
+
+    b._check_interval = 3600.0
+    a.add_vocab_item(networks, _values("switch"))
+    assert _terms(b, networks) == ["router"]
+    # What a peer's notification does.
+    b.request_check()
+    assert _terms(b, networks) == ["router", "switch"]
+
+def test_own_writes_are_visible_right_away(workers):
+    a, _ = workers
+    a._check_interval = 3600.0
+    networks = a.add_course("Networks", "")
+    assert _terms(a, networks) == []
+    a.add_vocab_item(networks, _values("router"))
+    assert _terms(a, networks) == ["router"]
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import pytest
+
+from vocab_hub.config import get_db_path
+from vocab_hub.db.changes_repo import (
+    compact_changes,
+    get_changes_since,
+    get_course_revision,
+    get_current_revision,
+)
+from vocab_hub.db.connection import get_connection
+from vocab_hub.db.courses_repo import add_course, get_courses
+from vocab_hub.db.memory_storage import MemoryStorage
+from vocab_hub.db.storage import set_storage
+from vocab_hub.db.vocab_repo import (
+    add_vocab_item,
+    delete_vocab_item,
+    get_vocab_for_course,
+    update_vocab_item,
+)
+
+@pytest.fixture(params=["sqlite", "memory"])
+def backend(request, app_dir):
+    if request.param == "memory":
+        set_storage(MemoryStorage())
+    return request.param
+
+def _course(name: str) -> int:
+    add_course(name)
+    return next(c["id"] for c in get_courses() if c["name"] == name)
+
+def _add(course_id: int, term: str) -> int:
+    add_vocab_item(course_id, term, "مصطلح", f"{term} definition", "تعريف")
+    return next(w["id"] for w in get_vocab_for_course(course_id) if w["term_en"] == term)
+
+def test_insert_update_delete_deltas(backend):
+    start = get_current_revision()
+    course_id = _course("Networks")
+    router = _add(course_id, "router")
+    switch = _add(course_id, "switch")
+
+    changes = get_changes_since(start)
+    assert not changes.full_resync and not changes.has_more
+    assert [c["id"] for c in changes.courses_upserted] == [course_id]
+    assert {row["id"] for row in changes.vocab_upserted} == {router, switch}
+    synced = changes.revision
+    assert synced == get_current_revision()
+
+    assert update_vocab_item(router, "router", "موجه", "Forwards packets.", "يوجه الحزم.")
+    delete_vocab_item(switch)
+    changes = get_changes_since(synced)
+    assert [row["definition_en"] for row in changes.vocab_upserted] == ["Forwards packets."]
+    assert changes.vocab_deleted == [switch]
+    assert changes.vocab_removed_course_ids == [course_id]
+    assert changes.affected_course_ids == [course_id]
+
+    # Nothing new: an empty delta at the same revision.
+    latest = get_changes_since(changes.revision)
+    assert latest.revision == changes.revision
+    assert not (latest.vocab_upserted or latest.vocab_deleted or latest.full_resync)
+
+def test_paged_deltas(backend):
+    start = get_current_revision()
+    course_id = _course("Networks")
+    for term in ("router", "switch", "hub"):
+        _add(course_id, term)
+
+    seen, revision = [], start
+    while True:
+        changes = get_changes_since(revision, limit=2)
+        seen.extend(row["term_en"] for row in changes.vocab_upserted)
+        revision = changes.revision
+        if not changes.has_more:
+            break
+    assert sorted(seen) == ["hub", "router", "switch"]
+    assert revision == get_current_revision()
+
+def test_compaction_past_floor_forces_full_resync(backend):
+    course_id = _course("Networks")
+    first = _add(course_id, "router")
+    client = get_current_revision()
+    for i in range(3):
+        update_vocab_item(first, "router", "موجه", f"definition {i}", "تعريف")
+    for term in ("switch", "hub", "bridge"):
+        _add(course_id, term)
+
+    # Superseded updates of the same row go first; the latest one is kept.
+    assert compact_changes(max_rows=100) > 0
+    changes = get_changes_since(client)
+    assert not changes.full_resync
+    assert [row["definition_en"] for row in changes.vocab_upserted if row["id"] == first] == [
+        "definition 2"
+    ]
+
+    # Dropping more raises the floor above the client's revision.
+    compact_changes(max_rows=2)
+    changes = get_changes_since(client)
+    assert changes.full_resync
+    assert changes.revision == get_current_revision()
+    assert get_changes_since(changes.revision).full_resync is False
+    assert get_course_revision(course_id) == get_current_revision()
+
+def test_move_between_courses_names_the_old_course(app_dir):
+    networks = _course("Networks")
+    databases = _course("Databases")
+    item = _add(networks, "index")
+    synced = get_current_revision()
+    networks_rev = get_course_revision(networks)
+
+    # Only raw SQL moves items; the trigger still logs both courses.
+    with get_connection(get_db_path()) as conn:
+        conn.execute("UPDATE vocab_items SET course_id = ? WHERE id = ?", (databases, item))
+
+    changes = get_changes_since(synced)
+    assert [row["id"] for row in changes.vocab_upserted] == [item]
+    assert changes.vocab_deleted == []
+    assert changes.vocab_removed_course_ids == [networks]
+    assert changes.affected_course_ids == sorted([networks, databases])
+    assert get_course_revision(networks) > networks_rev
+
+    # Compaction keeps the old course's event next to the item's latest one.
+    update_vocab_item(item, "index", "فهرس", "Speeds up lookups.", "يسرع البحث.")
+    compact_changes()
+    changes = get_changes_since(synced)
+    assert changes.vocab_removed_course_ids == [networks]
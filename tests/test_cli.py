@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import csv
+import json
+
+import pytest
+
+from vocab_hub.cli import EXIT_ERROR, EXIT_OK, EXIT_PARTIAL, EXIT_USAGE, EXPORT_COLUMNS, main
+from vocab_hub.db.courses_repo import add_course, get_courses
+from vocab_hub.db.vocab_repo import add_vocab_item
+
+def _run(capsys, *argv):
+    code = main(["--json", *argv])
+    out = capsys.readouterr().out
+    payload = json.loads(out)
+    assert payload["exit_code"] == code
+    assert payload["command"] == argv[0]
+    return code, payload
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({col: row.get(col, "") for col in EXPORT_COLUMNS})
+
+ROUTER = {"course_name": "Networks", "term_en": "router", "term_ar": "موجه",
+          "definition_en": "Forwards packets", "definition_ar": "يوجه الحزم", "difficulty": "2.0"}
+
+def test_import_exit_codes(app_dir, capsys):
+    add_course("Networks")
+    good = app_dir / "good.csv"
+    _write_csv(good, [ROUTER])
+    code, payload = _run(capsys, "import", str(good))
+    assert code == EXIT_OK
+    assert payload["totals"]["imported"] == 1
+
+    partial = app_dir / "partial.csv"
+    _write_csv(partial, [dict(ROUTER, term_en="switch"), dict(ROUTER, course_name="Security")])
+    code, payload = _run(capsys, "import", str(partial))
+    assert code == EXIT_PARTIAL
+    assert payload["totals"]["skipped_missing_course"] == 1
+
+    code, payload = _run(capsys, "import", "--create-courses", str(partial))
+    assert code == EXIT_OK
+    assert sorted(c["name"] for c in get_courses()) == ["Networks", "Security"]
+
+    code, payload = _run(capsys, "import", str(app_dir / "missing.csv"))
+    assert code == EXIT_ERROR
+    assert payload["totals"]["failed_files"] == 1
+    assert "error" in payload["files"][0]
+
+def test_export_round_trip_and_stats(app_dir, capsys):
+    add_course("Networks")
+    course_id = get_courses()[0]["id"]
+    add_vocab_item(course_id, "router", "موجه", "Forwards packets", "يوجه الحزم", difficulty=2)
+
+    out = app_dir / "export.json"
+    code, payload = _run(capsys, "export", str(out))
+    assert (code, payload["format"], payload["rows"]) == (EXIT_OK, "json", 1)
+    rows = json.loads(out.read_text(encoding="utf-8"))
+    assert rows == [dict(ROUTER, difficulty=2, example_en="", category="")]
+
+    code, payload = _run(capsys, "stats")
+    assert code == EXIT_OK
+    assert (payload["courses"], payload["terms"]) == (1, 1)
+    assert payload["per_course"] == [{"id": course_id, "name": "Networks", "terms": 1}]
+
+def test_usage_and_failure_exit_codes(app_dir, capsys):
+    code, payload = _run(capsys, "export", str(app_dir / "out.txt"))
+    assert code == EXIT_USAGE
+    code, payload = _run(capsys, "export", str(app_dir / "out.csv"), "--course", "Nope")
+    assert code == EXIT_ERROR
+    code, payload = _run(capsys, "snapshot", "restore")
+    assert code == EXIT_USAGE
+    code, payload = _run(capsys, "snapshot", "restore", "vocab-nope.db.gz")
+    assert code == EXIT_ERROR
+
+    # argparse errors exit with the usage code as well.
+    with pytest.raises(SystemExit) as exc:
+        main(["no-such-command"])
+    assert exc.value.code == EXIT_USAGE
+
+def test_human_output_reports_errors_on_stderr(app_dir, capsys):
+    assert main(["export", str(app_dir / "out.csv"), "--course", "Nope"]) == EXIT_ERROR
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert captured.err.startswith("error: Course not found")
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import pytest
+
+from vocab_hub.collation import MISSING_KEY, arabic_sort_key, english_sort_key
+from vocab_hub.db.courses_repo import add_course, get_courses
+from vocab_hub.db.memory_storage import MemoryStorage
+from vocab_hub.db.storage import set_storage
+from vocab_hub.db.vocab_repo import (
+    add_vocab_item,
+    get_vocab_for_course,
+    get_vocab_page,
+    update_vocab_item,
+)
+
+def test_english_keys_fold_case_accents_and_order_numbers():
+    terms = ["Unit 10", "unit 9", "Café", "cafe 2", "  Apple   pie"]
+    assert sorted(terms, key=english_sort_key) == [
+        "  Apple   pie", "Café", "cafe 2", "unit 9", "Unit 10",
+    ]
+    assert english_sort_key("CAFÉ") == english_sort_key("cafe")
+
+def test_arabic_keys_fold_letter_forms_and_marks():
+    assert arabic_sort_key("أَمْن") == arabic_sort_key("امن")
+    assert arabic_sort_key("شبكة") == arabic_sort_key("شبكه")
+    assert arabic_sort_key("مبنى") == arabic_sort_key("مبني")
+    assert sorted(["تشفير", "بروتوكول", "إطار"], key=arabic_sort_key) == [
+        "إطار", "بروتوكول", "تشفير",
+    ]
+    assert arabic_sort_key("") == MISSING_KEY
+    assert arabic_sort_key("ي") < MISSING_KEY
+
+@pytest.fixture(params=["sqlite", "memory"])
+def course_id(request, app_dir):
+    if request.param == "memory":
+        set_storage(MemoryStorage())
+    add_course("Networks")
+    course_id = get_courses()[0]["id"]
+    for term_en, term_ar in [("Unit 10", "وحدة"), ("bridge", "جسر"), ("Unit 9", ""),
+                             ("Address", "عنوان"), ("cable", "كابل")]:
+        add_vocab_item(course_id, term_en, term_ar, f"{term_en} definition", "تعريف")
+    return course_id
+
+def test_pages_follow_each_language_order(course_id):
+    english = [w["term_en"] for w in get_vocab_for_course(course_id, "en")]
+    assert english == ["Address", "bridge", "cable", "Unit 9", "Unit 10"]
+    arabic = [w["term_en"] for w in get_vocab_for_course(course_id, "ar")]
+    # Terms without Arabic text come last.
+    assert arabic == ["bridge", "Address", "cable", "Unit 10", "Unit 9"]
+
+    pages = [get_vocab_page(course_id, "ar", limit=2, offset=o) for o in (0, 2, 4)]
+    assert [w["term_en"] for page in pages for w in page] == arabic
+    assert get_vocab_page(course_id, "ar", limit=2, offset=6) == []
+
+def test_sort_keys_follow_edits(course_id):
+    cable = next(w for w in get_vocab_for_course(course_id) if w["term_en"] == "cable")
+    update_vocab_item(cable["id"], "zone", "أ", cable["definition_en"], cable["definition_ar"])
+    assert get_vocab_page(course_id, "en", limit=1, offset=4)[0]["term_en"] == "zone"
+    assert get_vocab_page(course_id, "ar", limit=1)[0]["term_en"] == "zone"
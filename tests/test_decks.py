@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import pytest
+
+from vocab_hub.config import get_db_path, get_deck_dir
+from vocab_hub.db.courses_repo import add_course, get_courses
+from vocab_hub.db.memory_storage import MemoryStorage
+from vocab_hub.db.storage import set_storage
+from vocab_hub.db.vocab_repo import add_vocab_item, filter_vocab, get_vocab_for_course
+from vocab_hub.services import decks
+from vocab_hub.services.decks import Deck, get_deck, warm_decks
+
+TERMS = [
+    ("Router", "موجه", "Forwards packets between networks"),
+    ("switch", "محول", "Connects hosts on one network"),
+    ("Firewall", "جدار ناري", "Filters traffic"),
+    ("Packet", "حزمة", "A unit of data"),
+]
+
+def _course() -> int:
+    add_course("Networks")
+    course_id = get_courses()[0]["id"]
+    for term_en, term_ar, definition_en in TERMS:
+        add_vocab_item(course_id, term_en, term_ar, definition_en, "تعريف", category="net")
+    return course_id
+
+def _deck_files():
+    return sorted(p.name for p in get_deck_dir().glob("*.deck"))
+
+def _rows(rows):
+    return [(r["id"], r["term_en"], r["term_ar"], r["definition_en"], r["difficulty"]) for r in rows]
+
+def test_deck_matches_the_database(app_dir):
+    course_id = _course()
+    deck = get_deck(course_id)
+    for order in ("en", "ar"):
+        assert _rows(deck.rows(order)) == _rows(get_vocab_for_course(course_id, order))
+    vocab = get_vocab_for_course(course_id)
+    for query in ("net", "ROUTER", "محول", "packets", "nothing", ""):
+        assert _rows(deck.search(query)) == _rows(filter_vocab(vocab, query))
+
+def test_warm_restart_maps_the_file_without_reading_vocabulary(app_dir, monkeypatch):
+    course_id = _course()
+    built = get_deck(course_id)
+    assert _deck_files() == [f"course-{course_id}-r{built.revision}.deck"]
+
+    # A new process: nothing in memory, the deck file is still there.
+    decks._forget_tenant(get_db_path())
+    monkeypatch.setattr(decks, "get_vocab_for_course", pytest.fail)
+    assert warm_decks() == 1
+    deck = get_deck(course_id)
+    assert deck is not built and deck.revision == built.revision
+    assert _rows(deck.rows()) == _rows(built.rows())
+
+def test_edit_builds_a_new_deck_and_removes_the_old_file(app_dir):
+    course_id = _course()
+    old = get_deck(course_id)
+    add_vocab_item(course_id, "Bridge", "جسر", "Joins two segments", "تعريف")
+    new = get_deck(course_id)
+    assert new.revision > old.revision
+    assert "Bridge" in [r["term_en"] for r in new.rows()]
+    assert _deck_files() == [f"course-{course_id}-r{new.revision}.deck"]
+    # The previous deck stays readable for sessions still using it.
+    assert len(old.rows()) == len(TERMS)
+
+def test_unreadable_deck_file_is_rebuilt(app_dir):
+    course_id = _course()
+    revision = get_deck(course_id).revision
+    decks._forget_tenant(get_db_path())
+    (get_deck_dir() / f"course-{course_id}-r{revision}.deck").write_bytes(b"garbage")
+    assert get_deck(course_id).count == len(TERMS)
+    assert Deck.open(get_deck_dir() / f"course-{course_id}-r{revision}.deck").count == len(TERMS)
+
+def test_memory_backend_keeps_decks_in_memory(app_dir):
+    set_storage(MemoryStorage())
+    course_id = _course()
+    assert get_deck(course_id).count == len(TERMS)
+    assert _deck_files() == []
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import csv
+import io
+
+import numpy as np
+
+from vocab_hub.services.exam_papers import (
+    OPTIONS_PER_QUESTION,
+    build_exam_tables,
+    exam_batch_to_csv,
+    generate_exam_batch,
+)
+
+def _vocab(n: int, categories=("network", "security", "")):
+    return [
+        {
+            "id": 100 + i,
+            "term_en": f"term {i}",
+            "term_ar": f"مصطلح {i}",
+            "definition_en": f"definition {i}",
+            "category": categories[i % len(categories)],
+            "difficulty": 1 + i % 3,
+        }
+        for i in range(n)
+    ]
+
+def test_batch_shape_and_answers():
+    tables = build_exam_tables(_vocab(60), seed=3)
+    batch = generate_exam_batch(tables, n_variants=5, questions_per_variant=12, base_seed=9)
+
+    assert batch.n_variants == 5
+    assert batch.options.shape == (5 * 12, OPTIONS_PER_QUESTION)
+    assert list(batch.position[:12]) == list(range(1, 13))
+    rows = np.arange(len(batch.item))
+    assert (batch.options[rows, batch.answers] == batch.item).all()
+    for k in range(1, 6):
+        # No term twice in a paper, and never an empty option here.
+        assert len(set(batch.item[batch.variant == k])) == 12
+    assert (batch.options >= 0).all()
+
+def test_variant_is_reproducible_alone():
+    tables = build_exam_tables(_vocab(40), seed=1)
+    batch = generate_exam_batch(tables, n_variants=8, questions_per_variant=10, base_seed=42)
+    lost = generate_exam_batch(tables, 0, 10, base_seed=42, variant_numbers=[6])
+
+    in_batch = batch.variant == 6
+    assert (lost.item == batch.item[in_batch]).all()
+    assert (lost.options == batch.options[in_batch]).all()
+    assert exam_batch_to_csv(generate_exam_batch(tables, 8, 10, 42)) == exam_batch_to_csv(batch)
+
+def test_missing_distractors_leave_only_the_last_columns_blank():
+    # Three terms: every question has two distractors at most.
+    tables = build_exam_tables(_vocab(3, categories=("",)))
+    batch = generate_exam_batch(tables, n_variants=40, questions_per_variant=3, base_seed=0)
+
+    assert (batch.options[:, :3] >= 0).all()
+    assert (batch.options[:, 3] == -1).all()
+    assert set(batch.answers.tolist()) == {0, 1, 2}
+
+    rows = list(csv.DictReader(io.StringIO(exam_batch_to_csv(batch))))
+    assert len(rows) == 40 * 3
+    for row in rows:
+        assert row["option_a"] and row["option_b"] and row["option_c"]
+        assert row["option_d"] == ""
+        assert row["answer"] in "ABC"
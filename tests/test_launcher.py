@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import pytest
+
+from vocab_hub import launcher
+
+def _write_lock(app_dir, pid: int, port: int) -> None:
+    (app_dir / launcher.LOCK_FILE_NAME).write_text(
+        json.dumps({"pid": pid, "port": port, "started_at": time.time()}), encoding="utf-8"
+    )
+
+@pytest.fixture
+def live_owner(app_dir):
+    """Another server process: holds the OS lock on the lock file."""
+    _write_lock(app_dir, 2**22 + 12345, 1)
+    fd = os.open(app_dir / launcher.LOCK_FILE_NAME, os.O_RDWR)
+    assert launcher._lock_file(fd)
+    yield fd
+    os.close(fd)
+
+@pytest.fixture
+def no_browser(monkeypatch):
+    opened = []
+    monkeypatch.setattr(launcher.webbrowser, "open", opened.append)
+    return opened
+
+def test_busy_live_server_is_waited_for(live_owner, monkeypatch, no_browser):
+    waited, started = [], []
+    monkeypatch.setattr(
+        launcher, "_open_when_ready", lambda port, *args, **kwargs: waited.append(port) or True
+    )
+
+    assert launcher.launch(started.append) == 0
+    assert waited == [1]
+    assert started == []
+    assert launcher.read_instance()["port"] == 1
+
+def test_server_that_never_answers_is_replaced(app_dir, live_owner, monkeypatch, no_browser):
+    monkeypatch.setattr(launcher, "_open_when_ready", lambda *args, **kwargs: False)
+    ports = []
+
+    def start_server(port: int) -> int:
+        ports.append(port)
+        info = launcher.read_instance()
+        assert (info["pid"], info["port"]) == (os.getpid(), port)
+        return 0
+
+    assert launcher.launch(start_server) == 0
+    assert len(ports) == 1
+    assert not (app_dir / launcher.LOCK_FILE_NAME).exists()
+
+def test_leftover_lock_with_reused_pid_is_taken_over(app_dir, monkeypatch, no_browser):
+    # Crashed server; its pid now belongs to a live, unrelated process.
+    _write_lock(app_dir, os.getpid(), 1)
+    waits = []
+    monkeypatch.setattr(
+        launcher, "_open_when_ready", lambda port, started, kind, **kwargs: waits.append(kind)
+    )
+    ports = []
+
+    assert launcher.launch(lambda port: ports.append(port) or 0) == 0
+    assert len(ports) == 1
+    assert "warm" not in waits
+    assert launcher.read_instance() is None
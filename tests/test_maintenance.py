@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from vocab_hub.config import get_db_path
+from vocab_hub.db.connection import get_connection
+from vocab_hub.db.memory_storage import MemoryStorage
+from vocab_hub.db.storage import set_storage
+from vocab_hub.services.maintenance import get_db_stats, get_last_maintenance, run_maintenance
+
+def _leave_free_pages(rows: int = 2000) -> None:
+    with get_connection(get_db_path()) as conn:
+        conn.execute("CREATE TABLE scratch (data BLOB)")
+        conn.executemany("INSERT INTO scratch VALUES (zeroblob(1000))", [()] * rows)
+    with get_connection(get_db_path()) as conn:
+        conn.execute("DROP TABLE scratch")
+
+def test_maintenance_returns_free_pages_and_records_the_run(app_dir):
+    _leave_free_pages()
+    before = get_db_stats()
+    assert before["auto_vacuum"] == "incremental"
+    assert before["free_pages"] > 100
+
+    report = run_maintenance()
+    assert report["quick_check"] == "ok"
+    assert report["statistics"] == "analyze"
+    assert report["freed_pages"] >= before["free_pages"] - 1
+    assert report["free_pages_after"] == 0
+    assert report["file_bytes_after"] < report["file_bytes_before"]
+    assert get_last_maintenance() == report
+
+    # Statistics exist now: later runs only refresh them.
+    assert run_maintenance()["statistics"] == "optimize"
+
+def test_maintenance_without_vacuum_keeps_free_pages(app_dir):
+    _leave_free_pages()
+    report = run_maintenance(vacuum=False)
+    assert report["freed_pages"] == 0
+    assert report["free_pages_after"] > 0
+
+def test_maintenance_skips_backends_without_a_file(app_dir):
+    set_storage(MemoryStorage())
+    assert "skipped" in run_maintenance()
+    assert get_last_maintenance() is None
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from vocab_hub.db.courses_repo import add_course, get_courses
+from vocab_hub.db.media_repo import detach_media, get_media_for_vocab
+from vocab_hub.db.vocab_repo import add_vocab_item, get_vocab_for_course
+from vocab_hub.services import media
+from vocab_hub.services.media import prune_unused_media, read_media, store_media
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+def _two_items():
+    add_course("Networks")
+    course_id = get_courses()[0]["id"]
+    for term in ("router", "switch"):
+        add_vocab_item(course_id, term, "مصطلح", f"{term} definition", "تعريف")
+    return [w["id"] for w in get_vocab_for_course(course_id)]
+
+def _objects(app_dir):
+    return [p for p in (app_dir / "media" / "objects").rglob("*") if p.is_file()]
+
+def test_same_content_is_stored_once(app_dir):
+    first, second = _two_items()
+    store_media(first, PNG, "a.png")
+    store_media(second, PNG, "copy.png")
+
+    assert len(_objects(app_dir)) == 1
+    assert [m["filename"] for m in get_media_for_vocab(second)] == ["copy.png"]
+    assert read_media(get_media_for_vocab(first)[0]["sha256"]) == PNG
+
+def test_prune_keeps_referenced_and_recent_files(app_dir):
+    first, second = _two_items()
+    store_media(first, PNG, "a.png")
+    store_media(second, PNG, "a.png")
+    detach_media(get_media_for_vocab(first)[0]["id"])
+    assert prune_unused_media(grace_s=0) == 0
+
+    detach_media(get_media_for_vocab(second)[0]["id"])
+    # Just written: an upload could be about to link it.
+    assert prune_unused_media() == 0
+    assert prune_unused_media(grace_s=0) == 1
+    assert _objects(app_dir) == []
+
+def test_prune_during_upload_leaves_no_dangling_link(app_dir, monkeypatch):
+    first, second = _two_items()
+    store_media(first, PNG, "a.png")
+    detach_media(get_media_for_vocab(first)[0]["id"])
+
+    # Prune runs after the upload saw the existing file but before it linked it.
+    attach = media.attach_media
+
+    def attach_after_prune(*args, **kwargs):
+        assert prune_unused_media(grace_s=0) == 1
+        return attach(*args, **kwargs)
+
+    monkeypatch.setattr(media, "attach_media", attach_after_prune)
+    store_media(second, PNG, "a.png")
+
+    linked = get_media_for_vocab(second)
+    assert len(linked) == 1
+    assert read_media(linked[0]["sha256"]) == PNG
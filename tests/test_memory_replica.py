@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from vocab_hub.config import get_db_path
+from vocab_hub.db.analytics_repo import record_quiz_attempt, record_quiz_finished
+from vocab_hub.db.courses_repo import add_course, get_courses
+from vocab_hub.db.storage import create_storage, set_storage
+from vocab_hub.db.vocab_repo import add_vocab_item, get_vocab_for_course, update_vocab_item
+from vocab_hub.services.quiz import refresh_question_bank
+
+def _memory_storage():
+    storage = create_storage("sqlite-memory", get_db_path())
+    set_storage(storage)
+    return storage
+
+def _course_with_terms(n: int = 5) -> int:
+    add_course("Networks")
+    course_id = get_courses()[0]["id"]
+    for i in range(n):
+        add_vocab_item(course_id, f"term {i}", f"مصطلح {i}", f"definition {i}", f"تعريف {i}")
+    return course_id
+
+def test_quiz_answers_do_not_reload_replica(app_dir):
+    storage = _memory_storage()
+    course_id = _course_with_terms()
+    vocab = get_vocab_for_course(course_id)
+    reloads = storage.reloads
+
+    refresh_question_bank(course_id)
+    for w in vocab:
+        record_quiz_attempt(course_id, w["id"], True)
+        assert len(get_vocab_for_course(course_id)) == len(vocab)
+    record_quiz_finished(course_id, len(vocab), len(vocab))
+    get_courses()
+
+    assert storage.reloads == reloads
+
+def test_replica_follows_writes_of_other_connections(app_dir):
+    storage = _memory_storage()
+    course_id = _course_with_terms(3)
+    item = get_vocab_for_course(course_id)[0]
+    reloads = storage.reloads
+
+    # A second backend on the same file stands in for another process.
+    other = create_storage("sqlite", get_db_path())
+    other.update_vocab_item(
+        item["id"],
+        {
+            "term_en": "renamed",
+            "term_ar": item["term_ar"],
+            "definition_en": item["definition_en"],
+            "definition_ar": item["definition_ar"],
+            "example_en": "",
+            "difficulty": 1,
+            "category": "",
+        },
+    )
+    other.delete_vocab_item(get_vocab_for_course(course_id)[-1]["id"])
+    other.add_course("Databases", "")
+
+    rows = storage.get_vocab_for_course(course_id)
+    assert [r["term_en"] for r in rows] == ["renamed", "term 1"]
+    assert {c["name"] for c in storage.get_courses()} == {"Networks", "Databases"}
+    assert storage.reloads == reloads
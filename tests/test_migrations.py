@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from vocab_hub.config import get_db_path
+from vocab_hub.db.connection import get_connection, init_db
+from vocab_hub.db.migrations import SCHEMA_VERSION
+from vocab_hub.db.storage import set_storage
+from vocab_hub.collation import arabic_sort_key, english_sort_key
+from vocab_hub.db.vocab_repo import get_vocab_by_term, get_vocab_for_course, get_vocab_page
+
+# (course, term_en, term_ar, definition_en, difficulty)
+BASELINE_ROWS = [
+    ("Networks", "Router", "موجه", "Forwards packets", 2),
+    ("Networks", "Switch", "محول", "Connects hosts", 1),
+    ("Security", "router", "موجه", "Forwards packets", 2),
+    ("Databases", "Router ", "راوتر", "Forwards packets", 2),
+]
+
+@pytest.fixture
+def baseline_db(tmp_path, monkeypatch):
+    """A database file in the original (unversioned) schema, with data."""
+    monkeypatch.setenv("FIT_VOCAB_APP_DIR", str(tmp_path))
+    monkeypatch.delenv("FIT_VOCAB_TENANT", raising=False)
+    monkeypatch.delenv("FIT_VOCAB_STORAGE", raising=False)
+    set_storage(None)
+    path = get_db_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path))
+    conn.executescript(
+        """
+        CREATE TABLE courses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            description TEXT
+        );
+        CREATE TABLE vocab_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            course_id INTEGER NOT NULL,
+            term_en TEXT NOT NULL,
+            term_ar TEXT,
+            definition_en TEXT,
+            definition_ar TEXT,
+            example_en TEXT,
+            difficulty INTEGER DEFAULT 1,
+            category TEXT,
+            FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+        );
+        """
+    )
+    courses = {}
+    for course, term_en, term_ar, definition_en, difficulty in BASELINE_ROWS:
+        if course not in courses:
+            courses[course] = conn.execute(
+                "INSERT INTO courses (name, description) VALUES (?, '')", (course,)
+            ).lastrowid
+        conn.execute(
+            """
+            INSERT INTO vocab_items (course_id, term_en, term_ar, definition_en, difficulty)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (courses[course], term_en, term_ar, definition_en, difficulty),
+        )
+    # A deleted row: its id must never be handed out again.
+    conn.execute(
+        "INSERT INTO vocab_items (course_id, term_en) VALUES (?, 'gone')", (courses["Networks"],)
+    )
+    conn.execute("DELETE FROM vocab_items WHERE term_en = 'gone'")
+    conn.commit()
+    conn.close()
+    yield path
+    set_storage(None)
+
+def _migrated(path) -> sqlite3.Connection:
+    init_db(path)
+    conn = get_connection(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    return conn
+
+def test_v1_shares_terms_and_keeps_item_ids(baseline_db):
+    with _migrated(baseline_db) as conn:
+        terms = conn.execute("SELECT term_key, term_ar FROM terms ORDER BY term_key").fetchall()
+        assert [tuple(t) for t in terms] == [("router", "موجه"), ("switch", "محول")]
+        ids = [r["id"] for r in conn.execute("SELECT id FROM vocab_items ORDER BY id")]
+        assert ids == [1, 2, 3, 4]
+        seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'vocab_items'").fetchone()
+        assert seq["seq"] == 5
+
+    rows = get_vocab_by_term("ROUTER")
+    assert [(r["id"], r["term_ar"]) for r in rows] == [(1, "موجه"), (3, "موجه"), (4, "راوتر")]
+    # Only the course that differed keeps an override.
+    with get_connection(baseline_db) as conn:
+        overrides = conn.execute(
+            "SELECT id FROM vocab_items WHERE term_ar IS NOT NULL ORDER BY id"
+        ).fetchall()
+        assert [r["id"] for r in overrides] == [4]
+    assert [w["term_en"] for w in get_vocab_for_course(1)] == ["Router", "Switch"]
+
+def test_v2_switches_to_incremental_vacuum(baseline_db):
+    with sqlite3.connect(str(baseline_db)) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    with _migrated(baseline_db) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+
+def test_v3_backfills_sort_keys_and_pages_use_the_index(baseline_db):
+    with _migrated(baseline_db) as conn:
+        rows = conn.execute("SELECT * FROM vocab_entries ORDER BY id").fetchall()
+        for r in rows:
+            assert r["sort_en"] == english_sort_key(r["term_en"])
+            assert r["sort_ar"] == arabic_sort_key(r["term_ar"])
+        indexes = {r["name"] for r in conn.execute("PRAGMA index_list(vocab_items)")}
+        assert {"idx_vocab_items_sort_en", "idx_vocab_items_sort_ar"} <= indexes
+        assert "idx_vocab_items_course" not in indexes
+        plan = " ".join(
+            r["detail"]
+            for r in conn.execute(
+                """
+                EXPLAIN QUERY PLAN
+                SELECT * FROM vocab_entries WHERE course_id = 1
+                ORDER BY sort_ar, id LIMIT 1
+                """
+            )
+        )
+        assert "idx_vocab_items_sort_ar" in plan
+
+    assert [w["term_ar"] for w in get_vocab_page(1, "ar")] == ["محول", "موجه"]
+    assert [w["term_en"] for w in get_vocab_page(1, "en", limit=1, offset=1)] == ["Switch"]
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import random
+
+from vocab_hub.db.courses_repo import add_course, get_courses
+from vocab_hub.db.question_bank_repo import get_course_questions, save_questions
+from vocab_hub.db.vocab_repo import add_vocab_item, get_vocab_for_course
+from vocab_hub.services import quiz
+from vocab_hub.services.quiz import _build_questions, load_question, refresh_question_bank, start_quiz
+
+def test_concurrent_first_builds_do_not_collide(app_dir):
+    add_course("Networks")
+    course_id = get_courses()[0]["id"]
+    for i in range(4):
+        add_vocab_item(course_id, f"term {i}", f"مصطلح {i}", f"definition {i}", f"تعريف {i}")
+    vocab = get_vocab_for_course(course_id)
+    vocab_ids = {w["id"] for w in vocab}
+
+    # Two processes that both saw an empty bank save the same questions.
+    first = _build_questions(vocab, list(range(len(vocab))), random.Random(1))
+    second = _build_questions(vocab, list(range(len(vocab))), random.Random(2))
+    save_questions(course_id, 1, first, vocab_ids, full=True)
+    save_questions(course_id, 1, second, set(), full=False)
+
+    rows = get_course_questions(course_id)
+    assert len(rows) == len(first) == len(second)
+
+def test_start_quiz_loads_questions_in_one_batch(app_dir, monkeypatch):
+    add_course("Networks")
+    course_id = get_courses()[0]["id"]
+    for i in range(30):
+        add_vocab_item(course_id, f"term {i}", f"مصطلح {i}", f"definition {i}", f"تعريف {i}")
+    vocab = get_vocab_for_course(course_id)
+    refresh_question_bank(course_id)
+
+    calls = []
+    monkeypatch.setattr(quiz, "get_question", lambda qid: calls.append(qid))
+    batch = quiz.get_questions
+    monkeypatch.setattr(quiz, "get_questions", lambda ids: calls.append(len(ids)) or batch(ids))
+
+    entries = start_quiz(course_id, vocab, "ar_en")
+    assert calls == [len(vocab)]
+    assert sorted(q["vocab_id"] for q in entries) == sorted(w["id"] for w in vocab)
+
+    loaded = [load_question(q, "run") for q in entries]
+    assert calls == [len(vocab)]
+    by_id = {w["id"]: w for w in vocab}
+    for q in loaded:
+        assert len(q["options"]) == 4
+        assert q["answer"] == by_id[q["vocab_id"]]["term_en"]
+        assert q["options"][q["option_ids"].index(q["vocab_id"])] == q["answer"]
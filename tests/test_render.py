@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from vocab_hub.ui.render import flashcard_html, question_html, word_details_html
+
+def _word(**fields):
+    word = {
+        "id": 1,
+        "term_en": "router",
+        "term_ar": "موجه",
+        "definition_en": "",
+        "definition_ar": "",
+        "example_en": "",
+        "category": "",
+        "difficulty": 2,
+    }
+    word.update(fields)
+    return word
+
+def test_multiline_text_stays_inside_the_html_block():
+    word = _word(
+        definition_en="Forwards packets.\n\n    Indented second paragraph",
+        definition_ar="سطر أول\r\n\r\nسطر ثان",
+        example_en="line one\nline two",
+    )
+    fragment = word_details_html(word, revision=1)
+    assert "\n" not in fragment and "\r" not in fragment
+    assert "Forwards packets.<br><br>    Indented second paragraph" in fragment
+    assert fragment.endswith("</p></div>")
+
+def test_fields_are_escaped():
+    word = _word(id=2, term_en="<script>alert(1)</script>", category='<b onclick="x">')
+    fragment = flashcard_html(word, revision=1)
+    assert "<script>" not in fragment and "<b " not in fragment
+    assert "&lt;script&gt;" in fragment
+
+    question = {"vocab_id": 2, "qtype": "def_term", "prompt": "a <i>\n\nb"}
+    fragment = question_html(question, "Which term?", False, revision=1)
+    assert "<i>" not in fragment and "\n" not in fragment
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from vocab_hub.db.courses_repo import add_course, get_courses
+from vocab_hub.db.vocab_repo import add_vocab_item, filter_vocab, get_vocab_for_course
+from vocab_hub.services.decks import get_deck
+from vocab_hub.services.search import IncrementalSearch
+
+TERMS = ["router", "route table", "rotation", "protocol", "switch", "firewall"]
+
+def _course() -> int:
+    add_course("Networks")
+    course_id = get_courses()[0]["id"]
+    for term in TERMS:
+        add_vocab_item(course_id, term, "مصطلح", f"{term} definition", "تعريف")
+    return course_id
+
+def _terms(rows):
+    return [r["term_en"] for r in rows]
+
+def test_longer_queries_narrow_the_previous_matches(app_dir):
+    course_id = _course()
+    deck = get_deck(course_id)
+    vocab = get_vocab_for_course(course_id)
+    search = IncrementalSearch()
+
+    assert search.match(deck, "r") is None
+    for query in ("ro", "rou", "rout", "router", "routes", "o"):
+        assert _terms(search.rows(deck, query)) == _terms(filter_vocab(vocab, query))
+    # Only "ro" scanned the whole deck; each longer query checked the
+    # matches of the one before it.
+    assert search.scans == 1
+    assert search.narrowed == 4
+
+    # Backspacing to a cached query reuses its matches.
+    assert _terms(search.rows(deck, "rou")) == ["route table", "router"]
+    assert (search.scans, search.narrowed) == (1, 4)
+
+def test_cache_keeps_the_most_recent_queries(app_dir):
+    deck = get_deck(_course())
+    search = IncrementalSearch(max_queries=2)
+    for query in ("ro", "rou", "rout"):
+        search.match(deck, query)
+    assert list(search._results) == ["rou", "rout"]
+
+    # "ro" was evicted: it is scanned again.
+    search.match(deck, "ro")
+    assert search.scans == 2
+    assert list(search._results) == ["rout", "ro"]
+    # Using a query moves it to the recent end.
+    search.match(deck, "rout")
+    search.match(deck, "sw")
+    assert list(search._results) == ["rout", "sw"]
+
+def test_cache_is_dropped_when_the_deck_changes(app_dir):
+    course_id = _course()
+    search = IncrementalSearch()
+    assert len(search.match(get_deck(course_id), "ro")) == 4
+
+    add_vocab_item(course_id, "robot", "روبوت", "robot definition", "تعريف")
+    rows = search.rows(get_deck(course_id), "rob")
+    assert _terms(rows) == ["robot"]
+    assert search.scans == 2
+
+def test_same_matches(app_dir):
+    deck = get_deck(_course())
+    search = IncrementalSearch()
+    assert search.same_matches(deck, "rout", "route")
+    assert not search.same_matches(deck, "rout", "router")
+    assert search.same_matches(deck, "", "a")
+    assert search.same_matches(deck, "", "definition")
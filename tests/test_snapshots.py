@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from vocab_hub.config import get_deck_dir
+from vocab_hub.db.changes_repo import get_changes_since, get_course_revision, get_current_revision
+from vocab_hub.db.courses_repo import add_course, get_courses
+from vocab_hub.db.vocab_repo import add_vocab_item, get_vocab_for_course
+from vocab_hub.services.decks import get_deck
+from vocab_hub.services.snapshots import create_snapshot, list_snapshots, restore_snapshot
+
+def _add_terms(course_id: int, names) -> None:
+    for name in names:
+        add_vocab_item(course_id, name, "مصطلح", f"{name} definition", "تعريف")
+
+def test_restore_forces_resync_and_never_reuses_revisions(app_dir):
+    add_course("Networks")
+    course_id = get_courses()[0]["id"]
+    _add_terms(course_id, ["router"])
+    snapshot = create_snapshot()
+
+    _add_terms(course_id, ["switch", "hub", "bridge"])
+    client_revision = get_current_revision()
+    old_deck = get_deck(course_id)
+    assert old_deck.count == 4
+
+    restore_snapshot(snapshot.path, safety_snapshot=False)
+
+    # A client synced before the restore must reload everything.
+    changes = get_changes_since(client_revision)
+    assert changes.full_resync
+    resynced = changes.revision
+    assert resynced > client_revision
+    assert [w["term_en"] for w in get_vocab_for_course(course_id)] == ["router"]
+
+    # Later writes reach it as ordinary deltas, above every old revision.
+    _add_terms(course_id, ["gateway"])
+    delta = get_changes_since(resynced)
+    assert not delta.full_resync
+    assert [row["term_en"] for row in delta.vocab_upserted] == ["gateway"]
+    assert get_course_revision(course_id) > client_revision
+
+    # Decks built before the restore are gone and rebuilt from the new data.
+    assert not (get_deck_dir() / f"course-{course_id}-r{old_deck.revision}.deck").exists()
+    assert [w["term_en"] for w in get_deck(course_id).rows()] == ["gateway", "router"]
+
+def test_restore_oldest_snapshot_at_keep_limit(app_dir, monkeypatch):
+    monkeypatch.setenv("FIT_VOCAB_SNAPSHOT_KEEP", "2")
+    add_course("Networks")
+    course_id = get_courses()[0]["id"]
+    _add_terms(course_id, ["router"])
+    oldest = create_snapshot()
+    _add_terms(course_id, ["switch"])
+    create_snapshot()
+    _add_terms(course_id, ["hub"])
+
+    # The safety snapshot pushes the restored one out of the kept two.
+    restore_snapshot(oldest.path)
+
+    assert [w["term_en"] for w in get_vocab_for_course(course_id)] == ["router"]
+    snapshots = list_snapshots()
+    assert len(snapshots) == 2
+    assert oldest.path not in [s.path for s in snapshots]
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from vocab_hub.config import get_db_path, use_tenant
+from vocab_hub.db import connection, storage
+from vocab_hub.db.courses_repo import add_course, get_courses
+from vocab_hub.db.vocab_repo import add_vocab_item
+from vocab_hub.services import decks
+
+def _open_tenant(name: str) -> None:
+    """What a script run of the tenant does: read through its backend and deck."""
+    add_course("Networks")
+    course_id = get_courses()[0]["id"]
+    add_vocab_item(course_id, f"{name} term", "مصطلح", "definition", "تعريف")
+    decks.warm_decks()
+    assert decks.get_deck(course_id).count == 1
+
+def _deck_sources():
+    return {key[0] for key in decks._decks}
+
+def test_lru_closes_tenants_beyond_the_limit(app_dir, monkeypatch):
+    monkeypatch.setenv("FIT_VOCAB_STORAGE", "sqlite-memory")
+    monkeypatch.setenv("FIT_VOCAB_MAX_OPEN_TENANTS", "2")
+    monkeypatch.setattr(storage, "_MIN_IDLE_BEFORE_CLOSE_S", 0.0)
+    names = ["law", "medicine", "science", "arts", "engineering"]
+    paths = {}
+    for name in names:
+        with use_tenant(name):
+            _open_tenant(name)
+            paths[name] = str(get_db_path())
+
+    assert storage.open_storage_count() == 2
+    open_paths = {paths[n] for n in names[-2:]}
+    closed_paths = {paths[n] for n in names[:-2]}
+    assert not (_deck_sources() & closed_paths)
+    assert not (decks._warmed & closed_paths)
+    assert not ({str(p) for p in connection._initialized} & closed_paths)
+    assert open_paths <= _deck_sources()
+
+    # A closed tenant opens again with its data.
+    with use_tenant("law"):
+        assert [c["name"] for c in get_courses()] == ["Networks"]
+
+def test_leased_tenant_is_never_closed(app_dir, monkeypatch):
+    monkeypatch.setenv("FIT_VOCAB_STORAGE", "sqlite-memory")
+    monkeypatch.setenv("FIT_VOCAB_MAX_OPEN_TENANTS", "1")
+    monkeypatch.setattr(storage, "_MIN_IDLE_BEFORE_CLOSE_S", 0.0)
+
+    with use_tenant("law"), storage.storage_lease() as leased:
+        # Other tenants are served meanwhile (another script-run thread).
+        for name in ("medicine", "science"):
+            with use_tenant(name):
+                _open_tenant(name)
+        assert leased.get_courses() == []
+        assert storage.get_storage() is leased
+
+    # Released: the next request of another tenant may close it.
+    with use_tenant("medicine"):
+        get_courses()
+    assert storage.open_storage_count() == 1
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from collections import Counter
+
+import pytest
+
+from vocab_hub.db.courses_repo import add_course, get_courses, get_courses_by_name
+from vocab_hub.db.memory_storage import MemoryStorage
+from vocab_hub.db.storage import set_storage
+from vocab_hub.db.unit_of_work import current_unit_of_work, unit_of_work
+from vocab_hub.db.vocab_repo import add_vocab_item, get_vocab_for_course
+
+class CountingStorage(MemoryStorage):
+    def __init__(self) -> None:
+        super().__init__()
+        self.reads: Counter = Counter()
+
+    def get_courses(self):
+        self.reads["courses"] += 1
+        return super().get_courses()
+
+    def get_vocab_for_course(self, course_id, order="en"):
+        self.reads["vocab"] += 1
+        return super().get_vocab_for_course(course_id, order)
+
+@pytest.fixture
+def storage(app_dir):
+    storage = CountingStorage()
+    set_storage(storage)
+    add_course("Networks")
+    return storage
+
+def test_repeated_reads_hit_storage_once_per_run(storage):
+    with unit_of_work() as uow:
+        course_id = get_courses()[0]["id"]
+        assert get_courses_by_name()["Networks"]["id"] == course_id
+        for _ in range(3):
+            assert get_vocab_for_course(course_id) == []
+        assert storage.reads == {"courses": 1, "vocab": 1}
+        assert uow.saved == 3
+
+    # Nothing outlives the block.
+    assert current_unit_of_work() is None
+    get_courses()
+    get_courses()
+    assert storage.reads["courses"] == 3
+
+def test_writes_clear_the_run_cache(storage):
+    with unit_of_work():
+        course_id = get_courses()[0]["id"]
+        assert get_vocab_for_course(course_id) == []
+        add_vocab_item(course_id, "router", "موجه", "Forwards packets", "يوجه الحزم")
+        assert [w["term_en"] for w in get_vocab_for_course(course_id)] == ["router"]
+        assert storage.reads["vocab"] == 2
+
+def test_returned_lists_are_copies(storage):
+    with unit_of_work():
+        get_courses().clear()
+        assert [c["name"] for c in get_courses()] == ["Networks"]
+
+def test_nested_blocks_share_the_outer_cache(storage):
+    with unit_of_work() as outer:
+        get_courses()
+        with unit_of_work() as inner:
+            assert inner is outer
+            get_courses()
+        assert current_unit_of_work() is outer
+    assert storage.reads["courses"] == 1
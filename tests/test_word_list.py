@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from streamlit.testing.v1 import AppTest
+
+def _word_list_app():
+    import streamlit as st
+
+    from vocab_hub.state import init_state, reset_learning_state
+    from vocab_hub.ui.student import _render_word_list
+
+    init_state()
+    if st.session_state.get("reset"):
+        st.session_state["reset"] = False
+        reset_learning_state()
+    vocab = [
+        {
+            "id": i,
+            "term_en": f"term {i:03d}",
+            "term_ar": f"مصطلح {i}",
+            "definition_en": "definition",
+            "definition_ar": "تعريف",
+            "example_en": "",
+            "category": "",
+            "difficulty": 1,
+        }
+        for i in range(st.session_state.get("terms", 120))
+    ]
+    _render_word_list(vocab, 0)
+
+def _labels(at):
+    return [e.label.split("  |  ")[0] for e in at.expander]
+
+def test_word_list_pages():
+    at = AppTest.from_function(_word_list_app).run()
+    assert not at.exception
+    assert len(at.expander) == 50
+    assert _labels(at)[0] == "term 000"
+
+    at.number_input[0].set_value(3).run()
+    assert len(at.expander) == 20
+    assert _labels(at)[0] == "term 100"
+
+    # The list shrank (search, course change): the page stays in range.
+    at.session_state["terms"] = 60
+    at.run()
+    assert not at.exception
+    assert at.number_input[0].value == 2
+    assert _labels(at)[0] == "term 050"
+
+    at.session_state["reset"] = True
+    at.run()
+    assert at.number_input[0].value == 1
+    assert _labels(at)[0] == "term 000"
+
+def test_short_list_has_no_page_input():
+    at = AppTest.from_function(_word_list_app)
+    at.session_state["terms"] = 30
+    at.run()
+    assert not at.exception
+    assert len(at.number_input) == 0
+    assert len(at.expander) == 30
@@ -0,0 +1,466 @@
+"""
+Concurrent-student load test for the Streamlit app.
+
+Runs N simulated student sessions against vocab_hub/app.py with Streamlit's
+AppTest (no browser, no server) and reports, for each N:
+- throughput (reruns per second across all sessions)
+- rerun latency percentiles (p50 / p90 / p99 / max)
+- peak RSS
+- SQLite lock waits (statements/commits slower than --lock-threshold-ms,
+  plus "database is locked" errors)
+
+Each session scripts a realistic flow: pick a course, type a search query
+character by character, flip flashcards, then answer a full quiz.
+
+Examples:
+    python tools/load_test.py --sessions 1,5,10,20
+    python tools/load_test.py --sessions 10,40 --mode process --terms 400 --json
+
+By default the run uses a throw-away data folder (FIT_VOCAB_APP_DIR), so the
+real ~/.fit_vocabulary_hub/vocab.db is never touched.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_PATH = ROOT / "vocab_hub" / "app.py"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ---------------------------
+# SQLite instrumentation
+# ---------------------------
+
+_lock_stats = {"slow": 0, "slow_s": 0.0, "locked_errors": 0}
+_lock_stats_guard = threading.Lock()
+_lock_threshold_s = 0.01
+
+def _record_statement(elapsed: float, error: Optional[BaseException] = None) -> None:
+    with _lock_stats_guard:
+        if error is not None and "locked" in str(error):
+            _lock_stats["locked_errors"] += 1
+        if elapsed >= _lock_threshold_s:
+            _lock_stats["slow"] += 1
+            _lock_stats["slow_s"] += elapsed
+
+def _timed(call, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        result = call(*args, **kwargs)
+    except sqlite3.OperationalError as e:
+        _record_statement(time.perf_counter() - start, e)
+        raise
+    _record_statement(time.perf_counter() - start)
+    return result
+
+class _TimedCursor(sqlite3.Cursor):
+    def execute(self, *args, **kwargs):
+        return _timed(super().execute, *args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return _timed(super().executemany, *args, **kwargs)
+
+class _TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=_TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args, **kwargs):
+        return _timed(super().execute, *args, **kwargs)
+
+    def commit(self):
+        return _timed(super().commit)
+
+    def __exit__(self, *exc):
+        # "with conn:" commits here, which is where writers wait for locks.
+        return _timed(super().__exit__, *exc)
+
+def _install_sqlite_timing(threshold_ms: float) -> None:
+    global _lock_threshold_s
+    _lock_threshold_s = threshold_ms / 1000.0
+    original_connect = sqlite3.connect
+
+    def connect(*args, **kwargs):
+        kwargs.setdefault("factory", _TimedConnection)
+        return original_connect(*args, **kwargs)
+
+    sqlite3.connect = connect
+
+def _serialize_compile() -> None:
+    """
+    AppTest compiles the app script on every run. Concurrent compile() calls
+    can fail on some CPython 3.11 builds ("AST constructor recursion depth
+    mismatch"), so thread mode compiles one at a time. A real server caches
+    the bytecode, so this only removes a harness artifact.
+    """
+    import builtins
+
+    original_compile = builtins.compile
+    guard = threading.Lock()
+
+    def compile(*args, **kwargs):
+        with guard:
+            return original_compile(*args, **kwargs)
+
+    builtins.compile = compile
+
+def _share_apptest_runtime() -> None:
+    """
+    Each AppTest run installs a mock Runtime singleton and clears it when it
+    finishes, which breaks other sessions running in parallel threads. Keep
+    serving the most recent mock instead of failing, and keep app test mode
+    on for the whole process, so thread mode works.
+    """
+    from streamlit.runtime.runtime import Runtime
+
+    last = {"runtime": None}
+
+    def instance(cls):
+        runtime = cls._instance
+        if runtime is not None:
+            last["runtime"] = runtime
+            return runtime
+        if last["runtime"] is None:
+            raise RuntimeError("Runtime hasn't been created!")
+        return last["runtime"]
+
+    def exists(cls):
+        return cls._instance is not None or last["runtime"] is not None
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+
+    # AppTest.run() patches config.get_option for the run only; overlapping
+    # runs restore each other's patch, so a session could run without app
+    # test mode and lose widget format functions (KeyError in AppTest).
+    from streamlit import config
+
+    config.set_option("global.appTest", True)
+
+# ---------------------------
+# Test data
+# ---------------------------
+
+_CATEGORIES = ["Concept", "Metric", "Algorithm", "Task", "Model"]
+
+def _prepare_data(terms_per_course: int, courses: int) -> None:
+    """Create synthetic courses/terms in the (isolated) database."""
+    from vocab_hub.db.connection import init_db
+    from vocab_hub.db.courses_repo import add_course, get_courses
+    from vocab_hub.db.vocab_repo import add_vocab_item
+
+    init_db()
+    rng = random.Random(1234)
+    existing = {c["name"] for c in get_courses()}
+    for c in range(courses):
+        name = f"Load Test Course {c + 1}"
+        if name in existing:
+            continue
+        course_id = add_course(name, "Synthetic course for load testing.")
+        for t in range(terms_per_course):
+            add_vocab_item(
+                course_id,
+                f"Term {c + 1}-{t + 1:04d}",
+                f"مصطلح {t + 1}",
+                f"English definition number {t + 1} for course {c + 1}.",
+                f"تعريف عربي رقم {t + 1}.",
+                "",
+                rng.randint(1, 3),
+                rng.choice(_CATEGORIES),
+            )
+
+# ---------------------------
+# Simulated student session
+# ---------------------------
+
+@dataclass
+class SessionResult:
+    reruns: int = 0
+    latencies_s: List[float] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    quiz_questions: int = 0
+    peak_rss_kb: Optional[int] = None
+
+def _find_by_label(widgets, label: str):
+    for w in widgets:
+        if w.label == label:
+            return w
+    raise LookupError(f"No widget labelled {label!r}")
+
+def _has_key(widgets, key: str) -> bool:
+    return any(getattr(w, "key", None) == key for w in widgets)
+
+def _quiet_streamlit_logs() -> None:
+    # Streamlit sets its logger levels on import; AppTest sessions running in
+    # worker threads log a harmless "missing ScriptRunContext" warning.
+    import streamlit  # noqa: F401
+
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(
+        logging.ERROR
+    )
+
+class _Session:
+    def __init__(self, rng: random.Random, timeout: float) -> None:
+        from streamlit.testing.v1 import AppTest
+
+        _quiet_streamlit_logs()
+
+        self.rng = rng
+        self.timeout = timeout
+        self.at = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+        self.result = SessionResult()
+
+    def _step(self, action) -> None:
+        start = time.perf_counter()
+        action()
+        self.result.latencies_s.append(time.perf_counter() - start)
+        self.result.reruns += 1
+        if self.at.exception:
+            self.result.errors.append(str(self.at.exception[0].message))
+
+    def run_flow(self, search_terms: List[str], flashcard_flips: int) -> None:
+        at = self.at
+        self._step(lambda: at.run(timeout=self.timeout))
+
+        # 1) Pick a course
+        course_box = _find_by_label(at.sidebar.selectbox, "Select a course")
+        course = self.rng.choice(list(course_box.options))
+        self._step(lambda: course_box.select(course).run(timeout=self.timeout))
+
+        # 2) Type a search query one character at a time, then clear it
+        query = self.rng.choice(search_terms)
+        for i in range(1, len(query) + 1):
+            box = _find_by_label(at.sidebar.text_input, "Search vocabulary (EN/AR/definition)")
+            self._step(lambda: box.input(query[:i]).run(timeout=self.timeout))
+        box = _find_by_label(at.sidebar.text_input, "Search vocabulary (EN/AR/definition)")
+        self._step(lambda: box.input("").run(timeout=self.timeout))
+
+        # 3) Flashcards (the default learning mode)
+        for _ in range(flashcard_flips):
+            if _has_key(at.button, "btn_show_def"):
+                self._step(lambda: at.button(key="btn_show_def").click().run(timeout=self.timeout))
+            key = self.rng.choice(["btn_know", "btn_practice", "btn_random"])
+            self._step(lambda: at.button(key=key).click().run(timeout=self.timeout))
+
+        # 4) A full quiz
+        mode = _find_by_label(at.sidebar.radio, "Learning mode")
+        self._step(lambda: mode.set_value("Quiz").run(timeout=self.timeout))
+        qpos = 0
+        while _has_key(at.radio, f"quiz_option_{qpos}"):
+            radio = at.radio(key=f"quiz_option_{qpos}")
+            answer = self.rng.choice(list(radio.options))
+            self._step(lambda: radio.set_value(answer).run(timeout=self.timeout))
+            self._step(lambda: at.button(key=f"btn_check_{qpos}").click().run(timeout=self.timeout))
+            if not _has_key(at.button, f"btn_next_{qpos}"):
+                # "Next" is drawn on the rerun after the check, so a student
+                # clicks once more (as in the browser).
+                self._step(lambda: at.button(key=f"btn_check_{qpos}").click().run(timeout=self.timeout))
+            self._step(lambda: at.button(key=f"btn_next_{qpos}").click().run(timeout=self.timeout))
+            self.result.quiz_questions += 1
+            qpos += 1
+            # The quiz moves on in the script run after "Next"; rerun until the
+            # next question (or the score screen) is drawn.
+            for _ in range(2):
+                if _has_key(at.radio, f"quiz_option_{qpos}") or self._quiz_finished():
+                    break
+                self._step(lambda: at.run(timeout=self.timeout))
+        if not self._quiz_finished():
+            raise AssertionError(
+                f"quiz stopped after {qpos} questions without reaching the score screen"
+            )
+
+    def _quiz_finished(self) -> bool:
+        return any("Quiz finished" in str(s.value) for s in self.at.success)
+
+def _peak_rss_kb(children: bool = False) -> Optional[int]:
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def _run_session(seed: int, args: Dict) -> SessionResult:
+    session = _Session(random.Random(seed), args["timeout"])
+    try:
+        for _ in range(args["iterations"]):
+            session.run_flow(args["search_terms"], args["flashcard_flips"])
+    except Exception as e:  # keep the load run going, report the failure
+        session.result.errors.append(f"{type(e).__name__}: {e}")
+    session.result.peak_rss_kb = _peak_rss_kb()
+    return session.result
+
+def _process_worker(payload) -> Dict:
+    seed, args = payload
+    _install_sqlite_timing(args["lock_threshold_ms"])
+    result = _run_session(seed, args)
+    out = asdict(result)
+    out["lock_stats"] = dict(_lock_stats)
+    return out
+
+# ---------------------------
+# Load levels & reporting
+# ---------------------------
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+def _reset_lock_stats() -> None:
+    with _lock_stats_guard:
+        _lock_stats.update(slow=0, slow_s=0.0, locked_errors=0)
+
+def run_level(n_sessions: int, args: Dict) -> Dict:
+    seeds = [args["seed"] * 100_003 + n_sessions * 1_000 + i for i in range(n_sessions)]
+    start = time.perf_counter()
+
+    if args["mode"] == "process":
+        with multiprocessing.Pool(n_sessions) as pool:
+            raw = pool.map(_process_worker, [(s, args) for s in seeds])
+        results = [SessionResult(**{k: v for k, v in r.items() if k != "lock_stats"}) for r in raw]
+        lock = {
+            "slow": sum(r["lock_stats"]["slow"] for r in raw),
+            "slow_s": sum(r["lock_stats"]["slow_s"] for r in raw),
+            "locked_errors": sum(r["lock_stats"]["locked_errors"] for r in raw),
+        }
+        rss = [r.peak_rss_kb for r in results if r.peak_rss_kb is not None]
+        peak_rss_kb = max(rss) if rss else None
+        total_rss_kb = sum(rss) if rss else None
+    else:
+        _reset_lock_stats()
+        results: List[SessionResult] = [SessionResult() for _ in seeds]
+
+        def worker(i: int) -> None:
+            results[i] = _run_session(seeds[i], args)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_sessions)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        lock = dict(_lock_stats)
+        peak_rss_kb = total_rss_kb = _peak_rss_kb()
+
+    wall_s = time.perf_counter() - start
+    latencies = sorted(l for r in results for l in r.latencies_s)
+    reruns = sum(r.reruns for r in results)
+    errors = [e for r in results for e in r.errors]
+    return {
+        "sessions": n_sessions,
+        "mode": args["mode"],
+        "wall_s": round(wall_s, 3),
+        "reruns": reruns,
+        "throughput_rps": round(reruns / wall_s, 2) if wall_s else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50) * 1000, 1),
+            "p90": round(_percentile(latencies, 90) * 1000, 1),
+            "p99": round(_percentile(latencies, 99) * 1000, 1),
+            "max": round((latencies[-1] if latencies else 0) * 1000, 1),
+        },
+        "quiz_questions": sum(r.quiz_questions for r in results),
+        "peak_rss_mb": round(peak_rss_kb / 1024, 1) if peak_rss_kb else None,
+        "total_rss_mb": round(total_rss_kb / 1024, 1) if total_rss_kb else None,
+        "lock_waits": lock["slow"],
+        "lock_wait_s": round(lock["slow_s"], 3),
+        "locked_errors": lock["locked_errors"],
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+    }
+
+def _print_table(rows: List[Dict], threshold_ms: float) -> None:
+    header = (
+        f"{'N':>4} {'reruns':>7} {'rerun/s':>8} {'p50 ms':>8} {'p90 ms':>8} "
+        f"{'p99 ms':>8} {'max ms':>8} {'RSS MB':>8} {'lock waits':>11} {'errors':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        lat = r["latency_ms"]
+        rss = r["total_rss_mb"] if r["mode"] == "process" else r["peak_rss_mb"]
+        print(
+            f"{r['sessions']:>4} {r['reruns']:>7} {r['throughput_rps']:>8} "
+            f"{lat['p50']:>8} {lat['p90']:>8} {lat['p99']:>8} {lat['max']:>8} "
+            f"{rss if rss is not None else '-':>8} "
+            f"{r['lock_waits']:>11} {r['errors']:>7}"
+        )
+    print(
+        f"\nLock waits: SQLite statements/commits that took {threshold_ms} ms or more "
+        "(see --json for 'database is locked' errors)."
+    )
+    for r in rows:
+        if r["first_error"]:
+            print(f"N={r['sessions']}: first error: {r['first_error']}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", default="1,5,10",
+                        help="comma-separated numbers of concurrent sessions")
+    parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+    parser.add_argument("--iterations", type=int, default=1,
+                        help="flows per session")
+    parser.add_argument("--flashcard-flips", type=int, default=5)
+    parser.add_argument("--terms", type=int, default=100,
+                        help="synthetic terms per course")
+    parser.add_argument("--courses", type=int, default=3)
+    parser.add_argument("--search-terms", default="term,defin,مصطلح,1-00",
+                        help="comma-separated queries typed by students")
+    parser.add_argument("--lock-threshold-ms", type=float, default=10.0)
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="per-rerun timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=None,
+                        help="app data folder (default: a fresh temporary folder)")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="fit-vocab-load-")
+    # Must be set before vocab_hub is imported so every process sees it.
+    os.environ["FIT_VOCAB_APP_DIR"] = data_dir
+
+    _install_sqlite_timing(args.lock_threshold_ms)
+    if args.mode == "thread":
+        _serialize_compile()
+        _share_apptest_runtime()
+    _prepare_data(args.terms, args.courses)
+
+    shared = {
+        "mode": args.mode,
+        "iterations": args.iterations,
+        "flashcard_flips": args.flashcard_flips,
+        "search_terms": [q for q in args.search_terms.split(",") if q],
+        "lock_threshold_ms": args.lock_threshold_ms,
+        "timeout": args.timeout,
+        "seed": args.seed,
+    }
+    levels = [int(n) for n in args.sessions.split(",") if n.strip()]
+    rows = [run_level(n, shared) for n in levels]
+
+    if args.json:
+        print(json.dumps({"data_dir": data_dir, "levels": rows}, ensure_ascii=False, indent=2))
+    else:
+        print(f"Data folder: {data_dir}\n")
+        _print_table(rows, args.lock_threshold_ms)
+    return 1 if any(r["errors"] for r in rows) else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
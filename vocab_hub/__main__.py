@@ -0,0 +1,3 @@
+from vocab_hub.cli import main
+
+raise SystemExit(main())
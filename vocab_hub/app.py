@@ -2,11 +2,22 @@ from __future__ import annotations
 
 import streamlit as st
 
-from vocab_hub.config import APP_NAME
-from vocab_hub.db.connection import init_db
+from vocab_hub.config import APP_NAME, use_tenant
+from vocab_hub.db.connection import ensure_db
+from vocab_hub.db.storage import storage_lease
+from vocab_hub.db.unit_of_work import unit_of_work
+from vocab_hub.services.decks import warm_decks
+from vocab_hub.services.maintenance import start_maintenance_scheduler
 from vocab_hub.services.seed import seed_data_if_empty
-from vocab_hub.state import init_state, ADMIN_KEY
-from vocab_hub.ui.sidebar import render_sidebar
+from vocab_hub.services.snapshots import start_snapshot_scheduler
+from vocab_hub.state import (
+    init_state,
+    reset_learning_state,
+    ACTIVE_TENANT_KEY,
+    ADMIN_KEY,
+    COURSE_KEY,
+)
+from vocab_hub.ui.sidebar import render_sidebar, resolve_tenant
 from vocab_hub.ui.student import render_student_mode
 from vocab_hub.ui.admin import render_admin_mode
 
@@ -15,22 +26,42 @@ def main() -> None:
     st.set_page_config(page_title=APP_NAME, layout="wide")
 
     init_state()
-    init_db()
-    seed_data_if_empty()
+    tenant = resolve_tenant()
+    if tenant is None:
+        st.stop()
+    if st.session_state[ACTIVE_TENANT_KEY] != tenant:
+        # Course ids and quiz state belong to the previous tenant's data.
+        st.session_state[ACTIVE_TENANT_KEY] = tenant
+        st.session_state[COURSE_KEY] = None
+        reset_learning_state()
 
-    mode = render_sidebar()
+    # Every path/DB access in this run goes to the tenant's data folder, whose
+    # backend stays open until the run ends (leased, see db/storage.py).
+    # One unit of work per script run: repeated reads are served from memory.
+    with use_tenant(tenant), storage_lease(), unit_of_work() as uow:
+        ensure_db()
+        seed_data_if_empty()
+        start_snapshot_scheduler()
+        start_maintenance_scheduler()
+        warm_decks()
 
-    st.title("📚 Faculty of Information Technology")
+        mode = render_sidebar()
 
-    if mode == "Student":
-        render_student_mode()
-    else:
-        if not st.session_state[ADMIN_KEY]:
-            st.info(
-                "Please enter the admin password in the sidebar to manage courses and vocabulary."
-            )
+        st.title("📚 Faculty of Information Technology")
+
+        if mode == "Student":
+            render_student_mode()
         else:
-            render_admin_mode()
+            if not st.session_state[ADMIN_KEY]:
+                st.info(
+                    "Please enter the admin password in the sidebar to manage courses and vocabulary."
+                )
+            else:
+                render_admin_mode()
+                st.sidebar.caption(
+                    f"Database reads this run: {uow.queries} "
+                    f"({uow.saved} repeated reads saved)"
+                )
 
 
 if __name__ == "__main__":
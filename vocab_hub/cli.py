@@ -0,0 +1,376 @@
+"""
+Headless command-line interface: python -m vocab_hub <command>
+
+Runs against the same database as the app without importing Streamlit,
+so it can be used from cron/Task Scheduler. Every command accepts --json for
+machine-readable output.
+
+Exit codes:
+    0  success
+    1  the operation failed
+    2  invalid usage
+    3  partial success (e.g. some import rows or files were skipped)
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_PARTIAL = 3
+
+EXPORT_COLUMNS = [
+    "course_name",
+    "term_en",
+    "term_ar",
+    "definition_en",
+    "definition_ar",
+    "example_en",
+    "difficulty",
+    "category",
+]
+
+Result = Tuple[int, Dict[str, Any]]
+
+# ---------------------------
+# Commands
+# ---------------------------
+
+def cmd_import(args: argparse.Namespace) -> Result:
+    # pandas is only needed here, so other commands stay light.
+    from .services.importer import find_import_files, import_vocab_from_file
+
+    files = find_import_files(args.paths, recursive=args.recursive)
+    if not files:
+        return EXIT_ERROR, {"error": "No importable files found (.xlsx, .xls, .csv)."}
+
+    results = []
+    totals = {"imported": 0, "skipped_missing_course": 0, "skipped_missing_fields": 0,
+              "created_courses": 0, "failed_files": 0}
+    for path in files:
+        try:
+            stats = import_vocab_from_file(path, create_missing_courses=args.create_courses)
+        except Exception as e:
+            totals["failed_files"] += 1
+            results.append({"file": str(path), "error": str(e)})
+            continue
+        totals["imported"] += stats.imported_count
+        totals["skipped_missing_course"] += stats.skipped_missing_course
+        totals["skipped_missing_fields"] += stats.skipped_missing_fields
+        totals["created_courses"] += stats.created_courses
+        results.append(
+            {
+                "file": str(path),
+                "imported": stats.imported_count,
+                "skipped_missing_course": stats.skipped_missing_course,
+                "skipped_missing_fields": stats.skipped_missing_fields,
+                "created_courses": stats.created_courses,
+            }
+        )
+
+    if totals["failed_files"] == len(files):
+        code = EXIT_ERROR
+    elif totals["failed_files"] or totals["skipped_missing_course"] or totals["skipped_missing_fields"]:
+        code = EXIT_PARTIAL
+    else:
+        code = EXIT_OK
+    return code, {"files": results, "totals": totals}
+
+def _export_rows(course_name: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    from .db.courses_repo import get_courses
+    from .db.vocab_repo import get_vocab_for_course
+
+    courses = get_courses()
+    if course_name:
+        courses = [c for c in courses if c["name"] == course_name]
+        if not courses:
+            return None
+    rows = []
+    for course in courses:
+        for w in get_vocab_for_course(course["id"]):
+            row = {col: w[col] for col in EXPORT_COLUMNS if col != "course_name"}
+            row["course_name"] = course["name"]
+            rows.append({col: row[col] for col in EXPORT_COLUMNS})
+    return rows
+
+def cmd_export(args: argparse.Namespace) -> Result:
+    rows = _export_rows(args.course)
+    if rows is None:
+        return EXIT_ERROR, {"error": f"Course not found: {args.course}"}
+
+    output = Path(args.output)
+    fmt = args.format or output.suffix.lstrip(".").lower()
+    if fmt == "csv":
+        # utf-8-sig so Excel shows Arabic text correctly.
+        with open(output, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=EXPORT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+    elif fmt == "json":
+        output.write_text(json.dumps(rows, ensure_ascii=False, indent=1), encoding="utf-8")
+    elif fmt == "xlsx":
+        import pandas as pd
+
+        pd.DataFrame(rows, columns=EXPORT_COLUMNS).to_excel(
+            output, sheet_name="vocabulary", index=False
+        )
+    else:
+        return EXIT_USAGE, {"error": f"Unknown export format: {fmt!r} (use csv, json or xlsx)"}
+    return EXIT_OK, {"output": str(output), "format": fmt, "rows": len(rows)}
+
+def cmd_reindex(args: argparse.Namespace) -> Result:
+    """Rebuild derived data: SQLite indexes/statistics and the change log."""
+    from .db.changes_repo import compact_changes
+    from .db.connection import get_connection
+    from .db.storage import get_sql_db_path
+
+    result: Dict[str, Any] = {"compacted_change_events": compact_changes()}
+    db_path = get_sql_db_path()
+    if db_path is not None:
+        with get_connection(db_path) as conn:
+            conn.execute("REINDEX")
+            conn.execute("ANALYZE")
+        result["reindexed"] = str(db_path)
+    return EXIT_OK, result
+
+def cmd_maintain(args: argparse.Namespace) -> Result:
+    from .services.maintenance import run_maintenance
+
+    report = run_maintenance(vacuum=not args.no_vacuum)
+    if report.get("quick_check", "ok") != "ok":
+        return EXIT_ERROR, {"error": f"quick_check: {report['quick_check']}", **report}
+    return EXIT_OK, report
+
+def cmd_snapshot(args: argparse.Namespace) -> Result:
+    from .services.snapshots import create_snapshot, list_snapshots, restore_snapshot
+
+    if args.action == "create":
+        snap = create_snapshot()
+        return EXIT_OK, {"snapshot": str(snap.path), "size_bytes": snap.size_bytes}
+
+    snapshots = list_snapshots()
+    if args.action == "list":
+        return EXIT_OK, {
+            "snapshots": [
+                {"name": s.name, "created_at": s.created_at.isoformat(), "size_bytes": s.size_bytes}
+                for s in snapshots
+            ]
+        }
+
+    # restore
+    if not args.name:
+        return EXIT_USAGE, {"error": "snapshot restore needs a snapshot name (see 'snapshot list')"}
+    matches = [s for s in snapshots if s.name == args.name]
+    if not matches:
+        return EXIT_ERROR, {"error": f"Snapshot not found: {args.name}"}
+    restore_snapshot(matches[0].path, safety_snapshot=not args.no_safety_snapshot)
+    return EXIT_OK, {"restored": matches[0].name}
+
+def cmd_stats(args: argparse.Namespace) -> Result:
+    from .db.changes_repo import get_current_revision
+    from .db.courses_repo import get_courses
+    from .db.storage import get_sql_db_path, get_storage
+    from .db.vocab_repo import get_vocab_for_course
+    from .services.snapshots import list_snapshots
+
+    courses = []
+    total = 0
+    for course in get_courses():
+        n = len(get_vocab_for_course(course["id"]))
+        total += n
+        courses.append({"id": course["id"], "name": course["name"], "terms": n})
+
+    db_path = get_sql_db_path()
+    return EXIT_OK, {
+        "backend": get_storage().name,
+        "database": str(db_path) if db_path else None,
+        "database_bytes": db_path.stat().st_size if db_path and db_path.exists() else None,
+        "revision": get_current_revision(),
+        "courses": len(courses),
+        "terms": total,
+        "per_course": courses,
+        "snapshots": len(list_snapshots()),
+    }
+
+def cmd_papers(args: argparse.Namespace) -> Result:
+    from .db.courses_repo import get_courses_by_name
+    from .services.decks import get_deck
+    from .services.exam_papers import (
+        exam_batch_to_csv,
+        generate_exam_batch,
+        save_exam_batch_npz,
+    )
+
+    course = get_courses_by_name().get(args.course)
+    if course is None:
+        return EXIT_ERROR, {"error": f"Course not found: {args.course}"}
+    deck = get_deck(course["id"])
+    if deck.count < 2:
+        return EXIT_ERROR, {"error": "The course needs at least 2 terms."}
+    if args.variants < 1 or args.questions < 1:
+        return EXIT_USAGE, {"error": "--variants and --questions must be at least 1"}
+
+    tables = deck.exam_tables(args.seed)
+    batch = generate_exam_batch(
+        tables, args.variants, args.questions, args.seed, variant_numbers=args.only
+    )
+    output = Path(args.output)
+    if output.suffix.lower() == ".npz":
+        save_exam_batch_npz(batch, output)
+    else:
+        output.write_text(exam_batch_to_csv(batch), encoding="utf-8-sig", newline="")
+    return EXIT_OK, {
+        "output": str(output),
+        "course": course["name"],
+        "seed": args.seed,
+        "variants": len(set(batch.variant.tolist())),
+        "questions": len(batch.item),
+    }
+
+def cmd_benchmark(args: argparse.Namespace) -> Result:
+    from .services.benchmark import run_benchmark
+
+    return EXIT_OK, run_benchmark(repeat=args.repeat, query=args.query)
+
+# ---------------------------
+# Output
+# ---------------------------
+
+def _print_human(command: str, payload: Dict[str, Any]) -> None:
+    if "error" in payload:
+        print(f"error: {payload['error']}", file=sys.stderr)
+        return
+    if command == "import":
+        for f in payload["files"]:
+            if "error" in f:
+                print(f"{f['file']}: FAILED ({f['error']})")
+            else:
+                print(
+                    f"{f['file']}: imported {f['imported']}, "
+                    f"skipped {f['skipped_missing_course']} (unknown course), "
+                    f"{f['skipped_missing_fields']} (missing fields)"
+                )
+        t = payload["totals"]
+        print(f"Total imported: {t['imported']} (courses created: {t['created_courses']})")
+    elif command == "stats":
+        print(f"Backend:  {payload['backend']}")
+        print(f"Database: {payload['database']} ({payload['database_bytes']} bytes)")
+        print(f"Revision: {payload['revision']}")
+        print(f"Courses:  {payload['courses']}, terms: {payload['terms']}, "
+              f"snapshots: {payload['snapshots']}")
+        for c in payload["per_course"]:
+            print(f"  {c['terms']:>7}  {c['name']}")
+    elif command == "snapshot" and "snapshots" in payload:
+        for s in payload["snapshots"]:
+            print(f"{s['name']}  {s['created_at']}  {s['size_bytes']} bytes")
+    elif command == "benchmark":
+        print(f"Backend: {payload['backend']} (median of {payload['repeat']} runs)")
+        print(f"get_courses: {payload['get_courses']['median_ms']} ms")
+        for c in payload["courses"]:
+            print(
+                f"  {c['course']} ({c['terms']} terms): "
+                f"load {c['get_vocab_for_course']['median_ms']} ms, "
+                f"filter {c['filter_vocab']['median_ms']} ms, "
+                f"quiz {c['build_quiz_questions']['median_ms']} ms"
+            )
+    else:
+        for key, value in payload.items():
+            print(f"{key}: {value}")
+
+# ---------------------------
+# Entry point
+# ---------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m vocab_hub",
+        description="FIT Vocabulary Hub batch operations (no browser needed).",
+    )
+    parser.add_argument("--json", action="store_true", help="machine-readable JSON output")
+    parser.add_argument("--data-dir", help="app data folder (default: ~/.fit_vocabulary_hub)")
+    parser.add_argument("--tenant", help="faculty/tenant data to use (default: FIT_VOCAB_TENANT)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="import vocabulary files or folders")
+    p.add_argument("paths", nargs="+", type=Path, help=".xlsx/.xls/.csv files or folders")
+    p.add_argument("-r", "--recursive", action="store_true", help="search folders recursively")
+    p.add_argument("--create-courses", action="store_true",
+                   help="create courses that do not exist yet instead of skipping rows")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="export vocabulary in the import format")
+    p.add_argument("output", help="output file (.csv, .json or .xlsx)")
+    p.add_argument("--format", choices=["csv", "json", "xlsx"])
+    p.add_argument("--course", help="only this course (by name)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("reindex", help="rebuild indexes, statistics and derived data")
+    p.set_defaults(func=cmd_reindex)
+
+    p = sub.add_parser("maintain", help="ANALYZE, incremental vacuum, WAL checkpoint, quick_check")
+    p.add_argument("--no-vacuum", action="store_true", help="skip the incremental vacuum")
+    p.set_defaults(func=cmd_maintain)
+
+    p = sub.add_parser("snapshot", help="create, list or restore database snapshots")
+    p.add_argument("action", choices=["create", "list", "restore"])
+    p.add_argument("name", nargs="?", help="snapshot file name (for restore)")
+    p.add_argument("--no-safety-snapshot", action="store_true",
+                   help="do not snapshot the current data before restoring")
+    p.set_defaults(func=cmd_snapshot)
+
+    p = sub.add_parser("stats", help="show database statistics")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("papers", help="generate seeded exam-paper variants with answer keys")
+    p.add_argument("course", help="course name")
+    p.add_argument("output", help="output file (.csv with answer column, or .npz)")
+    p.add_argument("--variants", type=int, default=30)
+    p.add_argument("--questions", type=int, default=20, help="questions per variant")
+    p.add_argument("--seed", type=int, default=0,
+                   help="same seed + same vocabulary = same papers")
+    p.add_argument("--only", type=int, nargs="+", metavar="N",
+                   help="regenerate only these variant numbers")
+    p.set_defaults(func=cmd_papers)
+
+    p = sub.add_parser("benchmark", help="time the main read paths")
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--query", default="a", help="search query used for filtering")
+    p.set_defaults(func=cmd_benchmark)
+
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.data_dir:
+        os.environ["FIT_VOCAB_APP_DIR"] = args.data_dir
+    if args.tenant is not None:
+        from .config import normalize_tenant
+
+        try:
+            os.environ["FIT_VOCAB_TENANT"] = normalize_tenant(args.tenant)
+        except ValueError as e:
+            parser.error(str(e))
+
+    from .db.connection import init_db
+
+    func: Callable[[argparse.Namespace], Result] = args.func
+    try:
+        init_db()
+        code, payload = func(args)
+    except Exception as e:
+        code, payload = EXIT_ERROR, {"error": f"{type(e).__name__}: {e}"}
+
+    if args.json:
+        print(json.dumps({"command": args.command, "exit_code": code, **payload},
+                         ensure_ascii=False, default=str))
+    else:
+        _print_human(args.command, payload)
+    return code
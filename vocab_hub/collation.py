@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+
+# ---------------------------
+# Sort keys for bilingual term lists.
+# The keys are plain strings that order correctly under SQLite's default
+# BINARY collation, so they can be stored in indexed columns and pages can
+# be read in order straight from the index (see db/connection.py).
+# Changing a key function needs a migration that recomputes stored keys.
+# ---------------------------
+
+# Digit runs (ASCII and Arabic-Indic) compare by value: "Unit 9" < "Unit 10".
+_NUMBER_RE = re.compile(r"\d+")
+
+# Harakat, Quranic marks, superscript alef and tatweel carry no ordering weight.
+_ARABIC_MARKS_RE = re.compile("[\u0610-\u061a\u0640\u064b-\u065f\u0670\u06d6-\u06ed]")
+
+# Letter forms that sort as their base letter.
+_ARABIC_FOLDS = str.maketrans(
+    {
+        "\u0622": "\u0627",  # آ -> ا
+        "\u0623": "\u0627",  # أ -> ا
+        "\u0625": "\u0627",  # إ -> ا
+        "\u0671": "\u0627",  # ٱ -> ا
+        "\u0629": "\u0647",  # ة -> ه
+        "\u0649": "\u064a",  # ى -> ي
+        "\u0626": "\u064a",  # ئ -> ي
+        "\u0624": "\u0648",  # ؤ -> و
+        "\u06a9": "\u0643",  # ک -> ك (Persian kaf)
+        "\u06cc": "\u064a",  # ی -> ي (Persian yeh)
+    }
+)
+
+# Key of an empty Arabic term: after every real term.
+MISSING_KEY = "\uffff"
+
+def _natural_numbers(text: str) -> str:
+    """Prefix each number with its length so longer numbers sort later."""
+    def encode(match: re.Match) -> str:
+        digits = str(int(match.group()))
+        return f"{len(digits):02d}{digits}"
+    return _NUMBER_RE.sub(encode, text)
+
+def _collapse(text: str) -> str:
+    return " ".join(text.split())
+
+def english_sort_key(text: str) -> str:
+    """Case- and accent-insensitive key with natural number order."""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _natural_numbers(_collapse(stripped.casefold()))
+
+def arabic_sort_key(text: str) -> str:
+    """
+    Key in Arabic alphabetical order: diacritics removed and hamza/alef,
+    taa marbuta and alef maqsura forms folded onto their base letters.
+    Code-point order of the base letters is the alphabetical (hija'i) order.
+    """
+    text = _ARABIC_MARKS_RE.sub("", unicodedata.normalize("NFC", str(text or "")))
+    key = _natural_numbers(_collapse(text.translate(_ARABIC_FOLDS).casefold()))
+    return key or MISSING_KEY
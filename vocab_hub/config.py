@@ -1,7 +1,11 @@
 from __future__ import annotations
 
 import os
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
 
 # ---------------------------
 # App-level configuration
@@ -9,23 +13,186 @@ from pathlib import Path
 
 APP_NAME = "FIT Vocabulary Hub"
 
+# Upper bound for rows kept in the vocab_changes log (see db/changes_repo.py).
+# Clients older than the compacted range must do a full resync.
+CHANGE_LOG_MAX_ROWS = 50_000
+
+# Largest image/audio file accepted for a vocabulary item.
+MEDIA_MAX_BYTES = 10 * 1024 * 1024
+# Unreferenced media files written or reused this recently are not pruned:
+# an upload may be about to link them (see services/media.py).
+MEDIA_PRUNE_GRACE_S = 10 * 60
+
 def get_app_dir() -> Path:
     """
     Directory where we store user-writable data (SQLite DB, logs, etc.).
     Using a folder in the user's home directory keeps the app safe when
     packaged as an .exe.
+    Override with FIT_VOCAB_APP_DIR (e.g. for load tests or a shared server path).
     """
-    app_dir = Path.home() / ".fit_vocabulary_hub"
+    override = os.getenv("FIT_VOCAB_APP_DIR")
+    app_dir = Path(override) if override else Path.home() / ".fit_vocabulary_hub"
     app_dir.mkdir(parents=True, exist_ok=True)
     return app_dir
 
+# ---------------------------
+# Tenants (one isolated data folder per faculty)
+# ---------------------------
+
+_TENANT_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+_current_tenant: ContextVar[Optional[str]] = ContextVar("vocab_tenant", default=None)
+
+def normalize_tenant(name: Optional[str]) -> str:
+    """
+    Lower-case tenant name, "" for the default (untenanted) data folder.
+    Raises ValueError for names that are not safe as a folder name.
+    """
+    name = (name or "").strip().lower()
+    if name and not _TENANT_RE.match(name):
+        raise ValueError(f"Invalid tenant name: {name!r}")
+    return name
+
+def get_default_tenant() -> str:
+    """Tenant used when none is selected, from FIT_VOCAB_TENANT ("" = none)."""
+    return normalize_tenant(os.getenv("FIT_VOCAB_TENANT", ""))
+
+def get_allowed_tenants() -> Optional[List[str]]:
+    """
+    Tenants that may be selected by URL/login, from FIT_VOCAB_TENANTS
+    (comma-separated). None means any valid name is accepted.
+    """
+    raw = os.getenv("FIT_VOCAB_TENANTS", "")
+    names = [normalize_tenant(n) for n in raw.split(",") if n.strip()]
+    return names or None
+
+def get_tenant() -> str:
+    """Tenant of the current context (see use_tenant), else the default."""
+    tenant = _current_tenant.get()
+    return get_default_tenant() if tenant is None else tenant
+
+@contextmanager
+def use_tenant(name: Optional[str]) -> Iterator[str]:
+    """Route DB/snapshot/media paths to `name` for the duration of the block."""
+    tenant = normalize_tenant(name)
+    token = _current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current_tenant.reset(token)
+
+def get_tenant_dir(tenant: Optional[str] = None) -> Path:
+    """
+    Data folder of a tenant. The default tenant uses the app folder itself,
+    so single-faculty installs keep their existing vocab.db.
+    """
+    tenant = get_tenant() if tenant is None else normalize_tenant(tenant)
+    if not tenant:
+        return get_app_dir()
+    tenant_dir = get_app_dir() / "tenants" / tenant
+    tenant_dir.mkdir(parents=True, exist_ok=True)
+    return tenant_dir
+
 def get_db_path() -> Path:
-    return get_app_dir() / "vocab.db"
+    return get_tenant_dir() / "vocab.db"
+
+def get_snapshot_dir() -> Path:
+    """Folder holding compressed database snapshots (see services/snapshots.py)."""
+    snap_dir = get_tenant_dir() / "snapshots"
+    snap_dir.mkdir(parents=True, exist_ok=True)
+    return snap_dir
+
+def get_deck_dir() -> Path:
+    """Per-course deck files for fast warm starts (see services/decks.py)."""
+    deck_dir = get_tenant_dir() / "decks"
+    deck_dir.mkdir(parents=True, exist_ok=True)
+    return deck_dir
+
+def get_media_dir() -> Path:
+    """Content-addressed media files (see services/media.py)."""
+    media_dir = get_tenant_dir() / "media"
+    media_dir.mkdir(parents=True, exist_ok=True)
+    return media_dir
+
+def _get_int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+def get_maintenance_interval_min() -> int:
+    """
+    Minutes between automatic database maintenance runs
+    (FIT_VOCAB_MAINTENANCE_INTERVAL_MIN, default daily, 0 = only on demand).
+    """
+    return max(0, _get_int_env("FIT_VOCAB_MAINTENANCE_INTERVAL_MIN", 24 * 60))
+
+def get_tenant_cache_settings() -> Tuple[int, int]:
+    """
+    Open tenant databases kept by db/storage.py:
+    - FIT_VOCAB_MAX_OPEN_TENANTS: at most this many stay open (LRU)
+    - FIT_VOCAB_TENANT_IDLE_MIN: close a tenant unused for this long (0 = never)
+    """
+    return (
+        max(1, _get_int_env("FIT_VOCAB_MAX_OPEN_TENANTS", 8)),
+        max(0, _get_int_env("FIT_VOCAB_TENANT_IDLE_MIN", 30)),
+    )
+
+def get_cache_settings() -> Tuple[float, List[int]]:
+    """
+    Process-local cache of the "sqlite-cached" backend (db/cached_storage.py):
+    - FIT_VOCAB_CACHE_CHECK_MS: how often each worker checks the database for
+      writes by other processes (default 500)
+    - FIT_VOCAB_CACHE_NOTIFY_PORTS: localhost UDP ports, e.g. "47810-47817",
+      on which the workers of one host announce their writes so the others
+      check right away ("" = off, rely on the periodic check)
+    """
+    ports: List[int] = []
+    for part in os.getenv("FIT_VOCAB_CACHE_NOTIFY_PORTS", "").split(","):
+        first, _, last = part.strip().partition("-")
+        try:
+            ports.extend(range(int(first), int(last or first) + 1))
+        except ValueError:
+            continue
+    return max(0, _get_int_env("FIT_VOCAB_CACHE_CHECK_MS", 500)) / 1000.0, ports
+
+def get_snapshot_settings() -> Tuple[int, int, int]:
+    """
+    Reads snapshot scheduling/retention from the environment:
+    - FIT_VOCAB_SNAPSHOT_INTERVAL_MIN: minutes between automatic snapshots (0 = off)
+    - FIT_VOCAB_SNAPSHOT_KEEP: number of snapshots to keep
+    - FIT_VOCAB_SNAPSHOT_MAX_AGE_DAYS: delete older snapshots (0 = no age limit)
+    """
+    return (
+        max(0, _get_int_env("FIT_VOCAB_SNAPSHOT_INTERVAL_MIN", 0)),
+        max(1, _get_int_env("FIT_VOCAB_SNAPSHOT_KEEP", 14)),
+        max(0, _get_int_env("FIT_VOCAB_SNAPSHOT_MAX_AGE_DAYS", 30)),
+    )
+
+def get_storage_backend_name(default: str = "sqlite") -> str:
+    """
+    Storage engine used by the repos (see db/storage.py), from
+    FIT_VOCAB_STORAGE:
+    - "sqlite": the database file, queried per call (default)
+    - "sqlite-memory": file loaded into an in-memory SQLite copy for reads,
+      writes go to the file first (read-heavy classroom/exam mode)
+    - "sqlite-cached": the database file with courses and course vocabulary
+      cached per process, kept coherent with other worker processes
+      (several Streamlit processes sharing one file)
+    - "memory": pure-Python engine, nothing persisted (tests, benchmarks)
+    """
+    return os.getenv("FIT_VOCAB_STORAGE", default).strip().lower()
 
-def get_admin_password(default: str = "admin123") -> str:
+def get_admin_password(default: str = "admin123", tenant: Optional[str] = None) -> str:
     """
     Reads admin password from:
-    1) Environment variable FIT_VOCAB_ADMIN_PASSWORD
-    2) Falls back to the provided default.
+    1) FIT_VOCAB_ADMIN_PASSWORD_<TENANT> for a named tenant (e.g. ..._SCIENCE)
+    2) Environment variable FIT_VOCAB_ADMIN_PASSWORD
+    3) Falls back to the provided default.
     """
+    tenant = get_tenant() if tenant is None else normalize_tenant(tenant)
+    if tenant:
+        env_name = "FIT_VOCAB_ADMIN_PASSWORD_" + tenant.upper().replace("-", "_")
+        if os.getenv(env_name):
+            return os.environ[env_name]
     return os.getenv("FIT_VOCAB_ADMIN_PASSWORD", default)
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Dict, List, Optional
+
+from .connection import get_connection
+from .storage import get_sql_db_path
+
+# Error-rate boost used when weighting quiz questions toward hard terms:
+# a term that is always missed is picked about (1 + boost) times as often.
+HARD_TERM_BOOST = 3.0
+
+def term_weight(attempts: int, correct: int, boost: float = HARD_TERM_BOOST) -> float:
+    """
+    Quiz selection weight of a term: 1 + boost * error rate, where the error
+    rate is shrunk toward 0 for terms with few attempts.
+    """
+    return 1.0 + boost * (attempts - correct) / (attempts + 2)
+
+def record_quiz_attempt(
+    course_id: int,
+    vocab_id: int,
+    is_correct: bool,
+    chosen_vocab_id: Optional[int] = None,
+    quiz_run_id: Optional[str] = None,
+) -> None:
+    """
+    Store one answered question and update the rollups in the same
+    transaction, so the per-term and per-course tables never drift from the
+    raw attempts.
+    """
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return
+
+    correct = 1 if is_correct else 0
+    with get_connection(db_path) as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO quiz_attempts (course_id, vocab_id, chosen_vocab_id, is_correct, quiz_run_id)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (course_id, vocab_id, chosen_vocab_id, correct, quiz_run_id),
+        )
+        cur.execute(
+            """
+            INSERT INTO quiz_term_stats (vocab_id, course_id, attempts, correct, last_attempt_at)
+            VALUES (?, ?, 1, ?, datetime('now'))
+            ON CONFLICT(vocab_id) DO UPDATE SET
+                attempts = attempts + 1,
+                correct = correct + excluded.correct,
+                last_attempt_at = excluded.last_attempt_at
+            """,
+            (vocab_id, course_id, correct),
+        )
+        cur.execute(
+            """
+            INSERT INTO quiz_course_stats (course_id, attempts, correct, last_attempt_at)
+            VALUES (?, 1, ?, datetime('now'))
+            ON CONFLICT(course_id) DO UPDATE SET
+                attempts = attempts + 1,
+                correct = correct + excluded.correct,
+                last_attempt_at = excluded.last_attempt_at
+            """,
+            (course_id, correct),
+        )
+
+        if not is_correct and chosen_vocab_id is not None and chosen_vocab_id != vocab_id:
+            cur.execute(
+                """
+                INSERT INTO quiz_confusions (vocab_id, chosen_vocab_id, count)
+                VALUES (?, ?, 1)
+                ON CONFLICT(vocab_id, chosen_vocab_id) DO UPDATE SET count = count + 1
+                """,
+                (vocab_id, chosen_vocab_id),
+            )
+            cur.execute(
+                "SELECT count FROM quiz_confusions WHERE vocab_id = ? AND chosen_vocab_id = ?",
+                (vocab_id, chosen_vocab_id),
+            )
+            count = cur.fetchone()["count"]
+            # Counts only grow, so the running maximum is exact.
+            cur.execute(
+                """
+                UPDATE quiz_term_stats
+                SET top_confusion_id = ?, top_confusion_count = ?
+                WHERE vocab_id = ? AND top_confusion_count < ?
+                """,
+                (chosen_vocab_id, count, vocab_id, count),
+            )
+
+def record_quiz_finished(course_id: int, score: int, total_questions: int) -> None:
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return
+    with get_connection(db_path) as conn:
+        conn.execute(
+            """
+            INSERT INTO quiz_course_stats (
+                course_id, quizzes_finished, finished_score_sum, finished_question_sum
+            )
+            VALUES (?, 1, ?, ?)
+            ON CONFLICT(course_id) DO UPDATE SET
+                quizzes_finished = quizzes_finished + 1,
+                finished_score_sum = finished_score_sum + excluded.finished_score_sum,
+                finished_question_sum = finished_question_sum + excluded.finished_question_sum
+            """,
+            (course_id, score, total_questions),
+        )
+
+def get_course_quiz_stats() -> List[sqlite3.Row]:
+    """One row per course that has quiz activity (reads the rollup only)."""
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return []
+    with get_connection(db_path) as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT c.id AS course_id, c.name AS course_name,
+                   s.attempts, s.correct, s.quizzes_finished,
+                   s.finished_score_sum, s.finished_question_sum, s.last_attempt_at
+            FROM quiz_course_stats s
+            JOIN courses c ON c.id = s.course_id
+            ORDER BY c.name
+            """
+        )
+        return cur.fetchall()
+
+def get_hardest_terms(
+    course_id: int, limit: int = 10, min_attempts: int = 3
+) -> List[sqlite3.Row]:
+    """
+    Terms with the lowest accuracy in a course, with the distractor students
+    pick most often instead.
+    """
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return []
+    with get_connection(db_path) as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT v.id AS vocab_id, v.term_en, v.term_ar,
+                   s.attempts, s.correct,
+                   CAST(s.correct AS REAL) / s.attempts AS accuracy,
+                   conf.term_en AS top_confusion_term, s.top_confusion_count
+            FROM quiz_term_stats s
+            JOIN vocab_entries v ON v.id = s.vocab_id
+            LEFT JOIN vocab_entries conf ON conf.id = s.top_confusion_id
+            WHERE s.course_id = ? AND s.attempts >= ?
+            ORDER BY accuracy ASC, s.attempts DESC
+            LIMIT ?
+            """,
+            (course_id, min_attempts, limit),
+        )
+        return cur.fetchall()
+
+def get_term_weights(course_id: int, boost: float = HARD_TERM_BOOST) -> Dict[int, float]:
+    """
+    Quiz selection weight per vocab id (see term_weight).
+    Terms without attempts are absent (callers use weight 1).
+    """
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return {}
+    with get_connection(db_path) as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT vocab_id, attempts, correct FROM quiz_term_stats WHERE course_id = ?",
+            (course_id,),
+        )
+        return {
+            row["vocab_id"]: term_weight(row["attempts"], row["correct"], boost)
+            for row in cur.fetchall()
+        }
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import logging
+import socket
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import get_cache_settings
+from .connection import get_connection
+from .storage import ChangeSet, Row, StorageBackend, order_column
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Write notifications between worker processes on one host.
+# Each process binds the first free port of FIT_VOCAB_CACHE_NOTIFY_PORTS on
+# 127.0.0.1 and, after a write, sends the database path to all the others.
+# A lost datagram only delays an update until the next periodic check.
+# ---------------------------
+
+class _Notifier:
+    def __init__(self, ports: List[int]) -> None:
+        self._ports = ports
+        self._own_port: Optional[int] = None
+        self._listeners: "weakref.WeakSet[CachedStorage]" = weakref.WeakSet()
+        self._send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        for port in ports:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sock.bind(("127.0.0.1", port))
+            except OSError:
+                sock.close()
+                continue
+            self._own_port = port
+            threading.Thread(
+                target=self._listen, args=(sock,), name="vocab-cache-notify", daemon=True
+            ).start()
+            break
+        if self._own_port is None:
+            logger.warning("No free cache notification port in %s; using periodic checks", ports)
+
+    def register(self, storage: "CachedStorage") -> None:
+        self._listeners.add(storage)
+
+    def unregister(self, storage: "CachedStorage") -> None:
+        self._listeners.discard(storage)
+
+    def publish(self, db_path) -> None:
+        payload = str(db_path).encode("utf-8")
+        for port in self._ports:
+            if port == self._own_port:
+                continue
+            try:
+                self._send_sock.sendto(payload, ("127.0.0.1", port))
+            except OSError:
+                pass
+
+    def _listen(self, sock: socket.socket) -> None:
+        while True:
+            try:
+                data, _ = sock.recvfrom(4096)
+            except OSError:
+                return
+            path = data.decode("utf-8", errors="replace")
+            for storage in list(self._listeners):
+                if str(storage.db_path) == path:
+                    storage.request_check()
+
+_notifier: Optional[_Notifier] = None
+_notifier_lock = threading.Lock()
+
+def _get_notifier(ports: List[int]) -> Optional[_Notifier]:
+    global _notifier
+    if not ports:
+        return None
+    with _notifier_lock:
+        if _notifier is None:
+            _notifier = _Notifier(ports)
+        return _notifier
+
+class CachedStorage(StorageBackend):
+    """
+    Wraps a file-backed backend and keeps courses and per-course vocabulary
+    in process memory across Streamlit reruns.
+    Coherence with other processes sharing the file: at most every
+    FIT_VOCAB_CACHE_CHECK_MS (or right after a peer's notification) the
+    wrapper compares PRAGMA data_version; if another connection committed,
+    it reads the change log since its revision and drops only the courses
+    that changed. Writes go straight to the wrapped backend.
+    """
+
+    name = "sqlite-cached"
+
+    def __init__(self, inner: StorageBackend) -> None:
+        if inner.db_path is None:
+            raise ValueError("CachedStorage needs a backend with a database file")
+        self.inner = inner
+        self.db_path = inner.db_path
+        self._check_interval, ports = get_cache_settings()
+        self._lock = threading.RLock()
+        # Persistent connection: data_version changes when any *other*
+        # connection (this process's per-call ones included) commits.
+        self._version_conn = get_connection(self.db_path)
+        self._data_version = self._current_data_version()
+        self._revision = inner.get_current_revision()
+        self._last_check = time.monotonic()
+        self._check_requested = False
+
+        self._courses: Optional[List[Row]] = None
+        self._vocab: Dict[Tuple[int, str], List[Row]] = {}
+        # vocab id -> course id of cached rows, to find the course of a delete.
+        self._item_course: Dict[int, int] = {}
+        # Bumped on every invalidation; a load that started before one is
+        # not stored (it may have read the old data).
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._notifier = _get_notifier(ports)
+        if self._notifier is not None:
+            self._notifier.register(self)
+
+    def _current_data_version(self) -> int:
+        return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def request_check(self) -> None:
+        """Check for outside writes on the next read (peer notification)."""
+        self._check_requested = True
+
+    # ---- coherence ----
+    def _invalidate_course(self, course_id: int) -> None:
+        for key in [k for k in self._vocab if k[0] == course_id]:
+            for row in self._vocab.pop(key):
+                self._item_course.pop(row["id"], None)
+
+    def _clear(self) -> None:
+        self._courses = None
+        self._vocab.clear()
+        self._item_course.clear()
+
+    def _apply(self, changes: ChangeSet) -> None:
+        if changes.courses_upserted or changes.courses_deleted:
+            self._courses = None
+        course_ids = set(changes.affected_course_ids)
+        for row in changes.vocab_upserted:
+            # An item moved to another course also leaves its old one.
+            course_ids.add(self._item_course.get(row["id"], row["course_id"]))
+        for item_id in changes.vocab_deleted:
+            if item_id in self._item_course:
+                course_ids.add(self._item_course[item_id])
+        for course_id in course_ids:
+            self._invalidate_course(course_id)
+
+    def _check(self) -> None:
+        now = time.monotonic()
+        if not self._check_requested and now - self._last_check < self._check_interval:
+            return
+        with self._lock:
+            self._check_requested = False
+            self._last_check = now
+            version = self._current_data_version()
+            if version == self._data_version:
+                return
+            self._data_version = version
+            self._generation += 1
+            if self.inner.get_current_revision() < self._revision:
+                # The log went back (snapshot restore): nothing can be trusted.
+                self._clear()
+                self._revision = self.inner.get_current_revision()
+                return
+            while True:
+                changes = self.inner.get_changes_since(self._revision, limit=1000)
+                if changes.full_resync:
+                    self._clear()
+                else:
+                    self._apply(changes)
+                self._revision = changes.revision
+                if not changes.has_more:
+                    break
+
+    def _written(self) -> None:
+        self._check_requested = True
+        if self._notifier is not None:
+            self._notifier.publish(self.db_path)
+
+    # ---- courses ----
+    def add_course(self, name: str, description: str) -> Optional[int]:
+        course_id = self.inner.add_course(name, description)
+        self._written()
+        return course_id
+
+    def update_course(self, course_id: int, name: str, description: str) -> bool:
+        ok = self.inner.update_course(course_id, name, description)
+        self._written()
+        return ok
+
+    def delete_course(self, course_id: int) -> None:
+        self.inner.delete_course(course_id)
+        self._written()
+
+    def get_courses(self) -> List[Row]:
+        self._check()
+        with self._lock:
+            if self._courses is not None:
+                self.hits += 1
+                return list(self._courses)
+            generation = self._generation
+        rows = self.inner.get_courses()
+        with self._lock:
+            self.misses += 1
+            if generation == self._generation:
+                self._courses = list(rows)
+        return rows
+
+    def get_course_by_id(self, course_id: int) -> Optional[Row]:
+        for course in self.get_courses():
+            if course["id"] == course_id:
+                return course
+        return None
+
+    # ---- vocabulary ----
+    def add_vocab_item(self, course_id: int, values: Dict[str, Any]) -> Optional[int]:
+        item_id = self.inner.add_vocab_item(course_id, values)
+        self._written()
+        return item_id
+
+    def update_vocab_item(
+        self, item_id: int, values: Dict[str, Any], shared: bool = True
+    ) -> bool:
+        ok = self.inner.update_vocab_item(item_id, values, shared=shared)
+        self._written()
+        return ok
+
+    def delete_vocab_item(self, item_id: int) -> None:
+        self.inner.delete_vocab_item(item_id)
+        self._written()
+
+    def get_vocab_for_course(self, course_id: int, order: str = "en") -> List[Row]:
+        order_column(order)
+        key = (course_id, order)
+        self._check()
+        with self._lock:
+            rows = self._vocab.get(key)
+            if rows is not None:
+                self.hits += 1
+                return list(rows)
+            generation = self._generation
+        rows = self.inner.get_vocab_for_course(course_id, order)
+        with self._lock:
+            self.misses += 1
+            if generation == self._generation:
+                self._vocab[key] = list(rows)
+                self._item_course.update((row["id"], course_id) for row in rows)
+        return rows
+
+    def get_vocab_page(
+        self, course_id: int, order: str = "en", limit: int = 50, offset: int = 0
+    ) -> List[Row]:
+        return self.get_vocab_for_course(course_id, order)[offset:offset + limit]
+
+    def get_vocab_by_term(self, term_en: str) -> List[Row]:
+        return self.inner.get_vocab_by_term(term_en)
+
+    # ---- change log ----
+    def get_current_revision(self) -> int:
+        return self.inner.get_current_revision()
+
+    def get_course_revision(self, course_id: int) -> int:
+        return self.inner.get_course_revision(course_id)
+
+    def get_changes_since(self, revision: int, limit: Optional[int] = None) -> ChangeSet:
+        return self.inner.get_changes_since(revision, limit)
+
+    def compact_changes(self, max_rows: int) -> int:
+        return self.inner.compact_changes(max_rows)
+
+    def change_log_span(self) -> int:
+        return self.inner.change_log_span()
+
+    def close(self) -> None:
+        if self._notifier is not None:
+            self._notifier.unregister(self)
+        with self._lock:
+            self._clear()
+            self._version_conn.close()
+            self.inner.close()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from ..config import CHANGE_LOG_MAX_ROWS
+from .storage import ChangeSet, get_storage
+
+__all__ = [
+    "ChangeSet",
+    "get_current_revision",
+    "get_course_revision",
+    "get_changes_since",
+    "compact_changes",
+    "maybe_compact_changes",
+]
+
+def get_current_revision() -> int:
+    return get_storage().get_current_revision()
+
+def get_course_revision(course_id: int) -> int:
+    """
+    Revision of the last change that touched a course or its vocabulary.
+    Suitable as a cache key: it only changes when the course content changes.
+    """
+    return get_storage().get_course_revision(course_id)
+
+def get_changes_since(revision: int, limit: Optional[int] = None) -> ChangeSet:
+    """
+    Return everything that changed after `revision`.
+    With `limit`, at most that many raw events are consumed; `has_more` is set
+    and the client should call again with the returned revision.
+    """
+    return get_storage().get_changes_since(max(0, int(revision or 0)), limit)
+
+def compact_changes(max_rows: int = CHANGE_LOG_MAX_ROWS) -> int:
+    """
+    Keep the change log bounded:
+    1) drop events superseded by a later event for the same row and course
+       (deltas only ever need the latest one, plus the course a moved
+       item left);
+    2) if still above `max_rows`, drop the oldest events and raise the floor,
+       so clients behind it are told to resync.
+    Returns the number of deleted events.
+    """
+    return get_storage().compact_changes(max_rows)
+
+def maybe_compact_changes(max_rows: int = CHANGE_LOG_MAX_ROWS) -> int:
+    """
+    Compact only when the log may have outgrown its budget.
+    The revision span is an O(1) upper bound on the row count.
+    """
+    if get_storage().change_log_span() <= max_rows * 1.25:
+        return 0
+    return compact_changes(max_rows)
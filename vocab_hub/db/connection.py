@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import sqlite3
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Set
 
 from ..config import get_db_path
+from .migrations import SCHEMA_VERSION, migrate
 
 def get_connection(db_path: Optional[Path] = None) -> sqlite3.Connection:
     """
@@ -17,11 +19,36 @@ def get_connection(db_path: Optional[Path] = None) -> sqlite3.Connection:
     conn.execute("PRAGMA foreign_keys = ON")
     return conn
 
-def init_db() -> None:
-    """Create tables if they do not exist."""
-    with get_connection() as conn:
+# Database files already initialized by this process (see ensure_db).
+_initialized: Set[Path] = set()
+_initialized_lock = threading.Lock()
+
+def ensure_db(db_path: Optional[Path] = None) -> None:
+    """
+    init_db() once per database file per process. Each tenant's file is
+    created/migrated lazily on first use instead of on every rerun.
+    """
+    path = Path(db_path or get_db_path())
+    with _initialized_lock:
+        if path in _initialized and path.exists():
+            return
+        init_db(path)
+        _initialized.add(path)
+
+def forget_db(db_path: Path) -> None:
+    """Drop a closed tenant's file from ensure_db()'s set (checked again on reopen)."""
+    with _initialized_lock:
+        _initialized.discard(Path(db_path))
+
+def init_db(db_path: Optional[Path] = None) -> None:
+    """Create tables if they do not exist and upgrade older database files."""
+    with get_connection(db_path) as conn:
         cur = conn.cursor()
 
+        # Only takes effect on a new, empty file; existing files are switched
+        # by migration 2 (see migrations.py).
+        cur.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
         cur.execute(
             """
             CREATE TABLE IF NOT EXISTS courses (
@@ -34,17 +61,350 @@ def init_db() -> None:
 
         cur.execute(
             """
-            CREATE TABLE IF NOT EXISTS vocab_items (
+            CREATE TABLE IF NOT EXISTS terms (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                course_id INTEGER NOT NULL,
+                term_key TEXT UNIQUE NOT NULL,
                 term_en TEXT NOT NULL,
                 term_ar TEXT,
                 definition_en TEXT,
                 definition_ar TEXT,
                 example_en TEXT,
                 difficulty INTEGER DEFAULT 1,
-                category TEXT,
-                FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+                category TEXT
             )
             """
         )
+
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS app_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+            """
+        )
+
+        # Upgrade older files before creating objects that need the new shape.
+        migrate(conn)
+        cur = conn.cursor()
+
+        _create_vocabulary(cur)
+        _create_change_log(cur)
+        _create_quiz_analytics(cur)
+        _create_question_bank(cur)
+        _create_media(cur)
+        cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+def _create_vocabulary(cur: sqlite3.Cursor) -> None:
+    """
+    Shared term dictionary plus per-course membership rows.
+    A term's bilingual text is stored once in `terms`; `vocab_items` links it
+    to a course and holds per-course overrides (NULL = use the shared value)
+    plus the effective sort keys (collation.py), kept up to date by the
+    storage backends on every write.
+    vocab_items ids are what the rest of the schema (analytics, media, change
+    log) refers to. The `vocab_entries` view gives the flat row shape the app
+    reads: id, course_id, term_en, ..., category, term_id, sort_en, sort_ar.
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS vocab_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            course_id INTEGER NOT NULL,
+            term_id INTEGER NOT NULL,
+            term_ar TEXT,
+            definition_en TEXT,
+            definition_ar TEXT,
+            example_en TEXT,
+            difficulty INTEGER,
+            category TEXT,
+            sort_en TEXT NOT NULL DEFAULT '',
+            sort_ar TEXT NOT NULL DEFAULT '',
+            FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
+            FOREIGN KEY (term_id) REFERENCES terms(id)
+        )
+        """
+    )
+    # Course pages in either language's order come straight from these.
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_vocab_items_sort_en ON vocab_items (course_id, sort_en)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_vocab_items_sort_ar ON vocab_items (course_id, sort_ar)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_vocab_items_term ON vocab_items (term_id)"
+    )
+    cur.execute(
+        """
+        CREATE VIEW IF NOT EXISTS vocab_entries AS
+        SELECT v.id, v.course_id, t.term_en,
+               COALESCE(v.term_ar, t.term_ar) AS term_ar,
+               COALESCE(v.definition_en, t.definition_en) AS definition_en,
+               COALESCE(v.definition_ar, t.definition_ar) AS definition_ar,
+               COALESCE(v.example_en, t.example_en) AS example_en,
+               COALESCE(v.difficulty, t.difficulty) AS difficulty,
+               COALESCE(v.category, t.category) AS category,
+               v.term_id, v.sort_en, v.sort_ar
+        FROM vocab_items v
+        JOIN terms t ON t.id = v.term_id
+        """
+    )
+    # Terms no course uses anymore are removed (also on cascaded deletes).
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS gc_terms_after_vocab_delete
+        AFTER DELETE ON vocab_items
+        WHEN NOT EXISTS (SELECT 1 FROM vocab_items WHERE term_id = OLD.term_id)
+        BEGIN
+            DELETE FROM terms WHERE id = OLD.term_id;
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS gc_terms_after_vocab_update
+        AFTER UPDATE OF term_id ON vocab_items
+        WHEN OLD.term_id <> NEW.term_id
+             AND NOT EXISTS (SELECT 1 FROM vocab_items WHERE term_id = OLD.term_id)
+        BEGIN
+            DELETE FROM terms WHERE id = OLD.term_id;
+        END
+        """
+    )
+
+def _create_change_log(cur: sqlite3.Cursor) -> None:
+    """
+    Change log used for delta sync (see changes_repo.py).
+    Every write to courses / vocab_items / terms appends events through triggers,
+    so cascaded deletes and raw SQL edits are captured as well. Vocab events
+    carry the item's course; a delete (or a move to another course) names
+    the course the item left.
+    AUTOINCREMENT keeps revisions monotonic even after compaction.
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS vocab_changes (
+            revision INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            course_id INTEGER,
+            op TEXT NOT NULL,
+            changed_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_vocab_changes_entity "
+        "ON vocab_changes (entity, entity_id)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_vocab_changes_course "
+        "ON vocab_changes (course_id, revision)"
+    )
+
+    triggers = {
+        "trg_courses_insert": "AFTER INSERT ON courses",
+        "trg_courses_update": "AFTER UPDATE ON courses",
+        "trg_courses_delete": "AFTER DELETE ON courses",
+        "trg_vocab_items_insert": "AFTER INSERT ON vocab_items",
+        "trg_vocab_items_update": "AFTER UPDATE ON vocab_items",
+        "trg_vocab_items_delete": "AFTER DELETE ON vocab_items",
+    }
+    for name, event in triggers.items():
+        entity = "course" if "ON courses" in event else "vocab"
+        op = event.split()[1].lower()
+        row = "OLD" if op == "delete" else "NEW"
+        course_col = "id" if entity == "course" else "course_id"
+        moved = ""
+        if name == "trg_vocab_items_update":
+            # An item moved to another course is deleted from the old one.
+            # Logged first, so the item's latest event is still the update.
+            moved = """
+                INSERT INTO vocab_changes (entity, entity_id, course_id, op)
+                SELECT 'vocab', OLD.id, OLD.course_id, 'delete'
+                WHERE OLD.course_id IS NOT NEW.course_id;"""
+        cur.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {name} {event}
+            BEGIN{moved}
+                INSERT INTO vocab_changes (entity, entity_id, course_id, op)
+                VALUES ('{entity}', {row}.id, {row}.{course_col}, '{op}');
+            END
+            """
+        )
+    # An edit of a shared term changes the rows of every course using it.
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_terms_update AFTER UPDATE ON terms
+        BEGIN
+            INSERT INTO vocab_changes (entity, entity_id, course_id, op)
+            SELECT 'vocab', id, course_id, 'update'
+            FROM vocab_items WHERE term_id = NEW.id;
+        END
+        """
+    )
+
+def _create_quiz_analytics(cur: sqlite3.Cursor) -> None:
+    """
+    Raw quiz answers plus rollups maintained on every write
+    (see analytics_repo.py), so dashboards read one row per course/term
+    instead of scanning all attempts.
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS quiz_attempts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            course_id INTEGER NOT NULL,
+            vocab_id INTEGER NOT NULL,
+            chosen_vocab_id INTEGER,
+            is_correct INTEGER NOT NULL,
+            quiz_run_id TEXT,
+            answered_at TEXT NOT NULL DEFAULT (datetime('now')),
+            FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
+            FOREIGN KEY (vocab_id) REFERENCES vocab_items(id) ON DELETE CASCADE
+        )
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_quiz_attempts_vocab ON quiz_attempts (vocab_id)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_quiz_attempts_course "
+        "ON quiz_attempts (course_id, answered_at)"
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS quiz_term_stats (
+            vocab_id INTEGER PRIMARY KEY,
+            course_id INTEGER NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0,
+            top_confusion_id INTEGER,
+            top_confusion_count INTEGER NOT NULL DEFAULT 0,
+            last_attempt_at TEXT,
+            FOREIGN KEY (vocab_id) REFERENCES vocab_items(id) ON DELETE CASCADE,
+            FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+        )
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_quiz_term_stats_course "
+        "ON quiz_term_stats (course_id)"
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS quiz_confusions (
+            vocab_id INTEGER NOT NULL,
+            chosen_vocab_id INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (vocab_id, chosen_vocab_id),
+            FOREIGN KEY (vocab_id) REFERENCES vocab_items(id) ON DELETE CASCADE
+        )
+        """
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS quiz_course_stats (
+            course_id INTEGER PRIMARY KEY,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0,
+            quizzes_finished INTEGER NOT NULL DEFAULT 0,
+            finished_score_sum INTEGER NOT NULL DEFAULT 0,
+            finished_question_sum INTEGER NOT NULL DEFAULT 0,
+            last_attempt_at TEXT,
+            FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+        )
+        """
+    )
+
+def _create_question_bank(cur: sqlite3.Cursor) -> None:
+    """
+    Precomputed quiz questions (services/quiz.py): one row per vocab item and
+    question type with its distractors as child rows. question_bank_courses
+    records the course revision each course's bank was last brought up to.
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS question_bank (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            course_id INTEGER NOT NULL,
+            vocab_id INTEGER NOT NULL,
+            qtype TEXT NOT NULL,
+            prompt TEXT NOT NULL,
+            answer TEXT NOT NULL,
+            UNIQUE (vocab_id, qtype),
+            FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
+            FOREIGN KEY (vocab_id) REFERENCES vocab_items(id) ON DELETE CASCADE
+        )
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_question_bank_course "
+        "ON question_bank (course_id, qtype)"
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS question_distractors (
+            question_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            vocab_id INTEGER NOT NULL,
+            option_text TEXT NOT NULL,
+            PRIMARY KEY (question_id, position),
+            FOREIGN KEY (question_id) REFERENCES question_bank(id) ON DELETE CASCADE,
+            FOREIGN KEY (vocab_id) REFERENCES vocab_items(id) ON DELETE CASCADE
+        )
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_question_distractors_vocab "
+        "ON question_distractors (vocab_id)"
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS question_bank_courses (
+            course_id INTEGER PRIMARY KEY,
+            revision INTEGER NOT NULL,
+            FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+        )
+        """
+    )
+
+def _create_media(cur: sqlite3.Cursor) -> None:
+    """
+    Metadata for images/audio attached to vocabulary items. The bytes live
+    on disk keyed by SHA-256 (services/media.py), not in this database.
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS media_files (
+            sha256 TEXT PRIMARY KEY,
+            mime_type TEXT NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            created_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS vocab_media (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vocab_id INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            filename TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            UNIQUE (vocab_id, sha256),
+            FOREIGN KEY (vocab_id) REFERENCES vocab_items(id) ON DELETE CASCADE,
+            FOREIGN KEY (sha256) REFERENCES media_files(sha256)
+        )
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_vocab_media_sha ON vocab_media (sha256)"
+    )
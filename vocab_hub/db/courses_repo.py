@@ -3,59 +3,45 @@ from __future__ import annotations
 import sqlite3
 from typing import Dict, List, Optional
 
-from .connection import get_connection
+from .storage import get_storage
+from .unit_of_work import invalidate, memoized
 
 def add_course(name: str, description: str = "") -> Optional[int]:
     name = (name or "").strip()
     description = (description or "").strip()
     if not name:
         return None
-    try:
-        with get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO courses (name, description) VALUES (?, ?)",
-                (name, description),
-            )
-            return cur.lastrowid
-    except sqlite3.IntegrityError:
-        return None
+    invalidate()
+    return get_storage().add_course(name, description)
 
 def update_course(course_id: int, name: str, description: str = "") -> bool:
     name = (name or "").strip()
     description = (description or "").strip()
     if not name:
         return False
-    try:
-        with get_connection() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "UPDATE courses SET name = ?, description = ? WHERE id = ?",
-                (name, description, course_id),
-            )
-            return cur.rowcount > 0
-    except sqlite3.IntegrityError:
-        return False
+    invalidate()
+    return get_storage().update_course(course_id, name, description)
 
 def delete_course(course_id: int) -> None:
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM courses WHERE id = ?", (course_id,))
+    invalidate()
+    get_storage().delete_course(course_id)
+
+# Reads are memoized for the current unit of work (see unit_of_work.py).
 
 def get_courses() -> List[sqlite3.Row]:
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM courses ORDER BY name")
-        return cur.fetchall()
+    return list(memoized(("courses",), lambda: get_storage().get_courses()))
 
 def get_course_by_id(course_id: int) -> Optional[sqlite3.Row]:
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM courses WHERE id = ?", (course_id,))
-        return cur.fetchone()
+    return memoized(("course", course_id), lambda: get_storage().get_course_by_id(course_id))
+
+def get_courses_by_id() -> Dict[int, sqlite3.Row]:
+    return memoized(("courses_by_id",), lambda: {row["id"]: row for row in get_courses()})
+
+def get_courses_by_name() -> Dict[str, sqlite3.Row]:
+    return memoized(("courses_by_name",), lambda: {row["name"]: row for row in get_courses()})
 
 def get_courses_dict_id_to_name() -> Dict[int, str]:
-    return {row["id"]: row["name"] for row in get_courses()}
+    return {cid: row["name"] for cid, row in get_courses_by_id().items()}
 
 def get_courses_dict_name_to_id() -> Dict[str, int]:
-    return {row["name"]: row["id"] for row in get_courses()}
+    return {name: row["id"] for name, row in get_courses_by_name().items()}
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import List, Optional
+
+from .connection import get_connection
+from .storage import get_sql_db_path
+
+def attach_media(
+    vocab_id: int, sha256: str, mime_type: str, size_bytes: int, kind: str, filename: str = ""
+) -> Optional[int]:
+    """
+    Register a stored file and link it to a vocabulary item.
+    Returns the link id (existing one if the file is already attached).
+    """
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return None
+    with get_connection(db_path) as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT OR IGNORE INTO media_files (sha256, mime_type, size_bytes) VALUES (?, ?, ?)",
+            (sha256, mime_type, size_bytes),
+        )
+        cur.execute(
+            """
+            INSERT OR IGNORE INTO vocab_media (vocab_id, sha256, kind, filename)
+            VALUES (?, ?, ?, ?)
+            """,
+            (vocab_id, sha256, kind, filename),
+        )
+        cur.execute(
+            "SELECT id FROM vocab_media WHERE vocab_id = ? AND sha256 = ?",
+            (vocab_id, sha256),
+        )
+        return cur.fetchone()["id"]
+
+def detach_media(media_id: int) -> None:
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return
+    with get_connection(db_path) as conn:
+        conn.execute("DELETE FROM vocab_media WHERE id = ?", (media_id,))
+
+def get_media_for_vocab(vocab_id: int) -> List[sqlite3.Row]:
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return []
+    with get_connection(db_path) as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT m.id, m.vocab_id, m.sha256, m.kind, m.filename, f.mime_type, f.size_bytes
+            FROM vocab_media m
+            JOIN media_files f ON f.sha256 = m.sha256
+            WHERE m.vocab_id = ?
+            ORDER BY m.kind, m.id
+            """,
+            (vocab_id,),
+        )
+        return cur.fetchall()
+
+def get_unreferenced_media_files() -> List[str]:
+    """Hashes of registered files no vocabulary item uses."""
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return []
+    with get_connection(db_path) as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT f.sha256 FROM media_files f
+            WHERE NOT EXISTS (SELECT 1 FROM vocab_media m WHERE m.sha256 = f.sha256)
+            """
+        )
+        return [row["sha256"] for row in cur.fetchall()]
+
+def delete_unreferenced_media_files(hashes: List[str]) -> List[str]:
+    """
+    Drop metadata of those files that are still unreferenced (an item may
+    have been linked since they were listed); returns the hashes dropped.
+    """
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return []
+    dropped = []
+    with get_connection(db_path) as conn:
+        cur = conn.cursor()
+        for sha256 in hashes:
+            cur.execute(
+                """
+                DELETE FROM media_files
+                WHERE sha256 = ?
+                  AND NOT EXISTS (SELECT 1 FROM vocab_media m WHERE m.sha256 = media_files.sha256)
+                """,
+                (sha256,),
+            )
+            if cur.rowcount:
+                dropped.append(sha256)
+    return dropped
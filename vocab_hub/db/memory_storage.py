@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .storage import (
+    OVERRIDE_FIELDS,
+    VOCAB_FIELDS,
+    ChangeSet,
+    StorageBackend,
+    order_column,
+    sort_keys,
+    term_key,
+    term_overrides,
+)
+
+class MemoryStorage(StorageBackend):
+    """
+    Pure-Python engine: dicts in RAM, nothing persisted.
+    Mirrors the SQLite semantics the repos rely on (unique course names,
+    cascading course deletes, shared terms with per-course overrides,
+    ordering, change log) so unit tests and
+    benchmarks can run without a database file.
+    Rows are returned as dict copies.
+    """
+
+    name = "memory"
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._courses: Dict[int, Dict[str, Any]] = {}
+        # Membership rows: id, course_id, term_id, OVERRIDE_FIELDS (None = shared)
+        # and the effective sort keys (sort_en, sort_ar).
+        self._vocab: Dict[int, Dict[str, Any]] = {}
+        self._course_items: Dict[int, Dict[int, None]] = {}
+        self._terms: Dict[int, Dict[str, Any]] = {}
+        self._term_ids: Dict[str, int] = {}
+        self._term_items: Dict[int, Dict[int, None]] = {}
+        self._next_course_id = 1
+        self._next_vocab_id = 1
+        self._next_term_id = 1
+        # (revision, entity, entity_id, course_id, op)
+        self._log: List[Tuple[int, str, int, Optional[int], str]] = []
+        self._revision = 0
+        self._floor = 0
+
+    @classmethod
+    def load_from(cls, source: StorageBackend) -> "MemoryStorage":
+        """Copy courses and vocabulary (keeping ids) from another backend."""
+        storage = cls()
+        with storage._lock:
+            for course in source.get_courses():
+                storage._courses[course["id"]] = dict(course)
+                storage._course_items[course["id"]] = {}
+                for item in source.get_vocab_for_course(course["id"]):
+                    storage._insert_item(item["id"], course["id"], item)
+            storage._next_course_id = max(storage._courses, default=0) + 1
+            storage._next_vocab_id = max(storage._vocab, default=0) + 1
+        return storage
+
+    def _record(self, entity: str, entity_id: int, course_id: Optional[int], op: str) -> None:
+        self._revision += 1
+        self._log.append((self._revision, entity, entity_id, course_id, op))
+
+    def _term_for(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """The shared term for values["term_en"], created if needed."""
+        key = term_key(values["term_en"])
+        term_id = self._term_ids.get(key)
+        if term_id is None:
+            term_id = self._next_term_id
+            self._next_term_id += 1
+            self._terms[term_id] = {"id": term_id, "term_key": key}
+            self._terms[term_id].update((f, values[f]) for f in VOCAB_FIELDS)
+            self._term_ids[key] = term_id
+            self._term_items[term_id] = {}
+        return self._terms[term_id]
+
+    def _link(self, item: Dict[str, Any], term_id: int) -> None:
+        old = item.get("term_id")
+        item["term_id"] = term_id
+        self._term_items[term_id][item["id"]] = None
+        if old is not None and old != term_id:
+            self._unlink(item["id"], old)
+
+    def _unlink(self, item_id: int, term_id: int) -> None:
+        members = self._term_items[term_id]
+        members.pop(item_id, None)
+        if not members:
+            term = self._terms.pop(term_id)
+            del self._term_ids[term["term_key"]]
+            del self._term_items[term_id]
+
+    def _insert_item(self, item_id: int, course_id: int, values: Dict[str, Any]) -> None:
+        term = self._term_for(values)
+        item = {"id": item_id, "course_id": course_id}
+        item.update(term_overrides(term, values))
+        item.update(sort_keys(values))
+        self._vocab[item_id] = item
+        self._course_items[course_id][item_id] = None
+        self._link(item, term["id"])
+
+    def _rekey_term(self, term_id: int) -> None:
+        """Recompute the sort keys of every item using the term."""
+        for item_id in self._term_items[term_id]:
+            item = self._vocab[item_id]
+            item.update(sort_keys(self._row(item)))
+
+    def _row(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Flat row in the shape of the vocab_entries view."""
+        term = self._terms[item["term_id"]]
+        row = {"id": item["id"], "course_id": item["course_id"], "term_en": term["term_en"]}
+        for f in OVERRIDE_FIELDS:
+            row[f] = term[f] if item[f] is None else item[f]
+        row["term_id"] = item["term_id"]
+        row["sort_en"] = item.get("sort_en")
+        row["sort_ar"] = item.get("sort_ar")
+        return row
+
+    def _name_taken(self, name: str, except_id: Optional[int] = None) -> bool:
+        return any(
+            c["name"] == name and cid != except_id for cid, c in self._courses.items()
+        )
+
+    # ---- courses ----
+    def add_course(self, name: str, description: str) -> Optional[int]:
+        with self._lock:
+            if self._name_taken(name):
+                return None
+            course_id = self._next_course_id
+            self._next_course_id += 1
+            self._courses[course_id] = {"id": course_id, "name": name, "description": description}
+            self._course_items[course_id] = {}
+            self._record("course", course_id, course_id, "insert")
+            return course_id
+
+    def update_course(self, course_id: int, name: str, description: str) -> bool:
+        with self._lock:
+            course = self._courses.get(course_id)
+            if course is None or self._name_taken(name, except_id=course_id):
+                return False
+            course.update(name=name, description=description)
+            self._record("course", course_id, course_id, "update")
+            return True
+
+    def delete_course(self, course_id: int) -> None:
+        with self._lock:
+            if self._courses.pop(course_id, None) is None:
+                return
+            for item_id in self._course_items.pop(course_id, {}):
+                item = self._vocab.pop(item_id)
+                self._unlink(item_id, item["term_id"])
+                self._record("vocab", item_id, course_id, "delete")
+            self._record("course", course_id, course_id, "delete")
+
+    def get_courses(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [dict(c) for c in self._courses.values()]
+        rows.sort(key=lambda c: c["name"])
+        return rows
+
+    def get_course_by_id(self, course_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            course = self._courses.get(course_id)
+            return dict(course) if course else None
+
+    # ---- vocabulary ----
+    def add_vocab_item(self, course_id: int, values: Dict[str, Any]) -> Optional[int]:
+        with self._lock:
+            if course_id not in self._courses:
+                # Same outcome as the SQLite foreign key.
+                raise ValueError(f"Unknown course id: {course_id}")
+            item_id = self._next_vocab_id
+            self._next_vocab_id += 1
+            self._insert_item(item_id, course_id, values)
+            self._record("vocab", item_id, course_id, "insert")
+            return item_id
+
+    def _record_term(self, term_id: int) -> None:
+        for item_id in self._term_items[term_id]:
+            self._record("vocab", item_id, self._vocab[item_id]["course_id"], "update")
+
+    def update_vocab_item(
+        self, item_id: int, values: Dict[str, Any], shared: bool = True
+    ) -> bool:
+        with self._lock:
+            item = self._vocab.get(item_id)
+            if item is None:
+                return False
+            current = self._row(item)
+            term = self._terms[item["term_id"]]
+
+            key = term_key(values["term_en"])
+            if key != term["term_key"]:
+                if not shared or key in self._term_ids:
+                    # Only this course moves to the other (or a new) term.
+                    target = self._term_for(values)
+                    item.update(term_overrides(target, values))
+                    self._link(item, target["id"])
+                    self._rekey_term(target["id"])
+                    self._record("vocab", item_id, item["course_id"], "update")
+                    return True
+                # Renamed for every course that uses the term.
+                del self._term_ids[term["term_key"]]
+                term.update(term_key=key, term_en=values["term_en"])
+                self._term_ids[key] = term["id"]
+                self._record_term(term["id"])
+            elif values["term_en"] != term["term_en"]:
+                # Same term, different spelling/case: term_en is always shared.
+                term["term_en"] = values["term_en"]
+                self._record_term(term["id"])
+
+            changed = [f for f in OVERRIDE_FIELDS if values[f] != current[f]]
+            if not changed:
+                self._rekey_term(term["id"])
+                return True
+            if shared:
+                term.update((f, values[f]) for f in changed)
+                self._record_term(term["id"])
+                item.update((f, None) for f in changed)
+            else:
+                item.update((f, None if values[f] == term[f] else values[f]) for f in changed)
+            self._rekey_term(term["id"])
+            self._record("vocab", item_id, item["course_id"], "update")
+            return True
+
+    def delete_vocab_item(self, item_id: int) -> None:
+        with self._lock:
+            item = self._vocab.pop(item_id, None)
+            if item is None:
+                return
+            self._course_items[item["course_id"]].pop(item_id, None)
+            self._unlink(item_id, item["term_id"])
+            self._record("vocab", item_id, item["course_id"], "delete")
+
+    def get_vocab_for_course(self, course_id: int, order: str = "en") -> List[Dict[str, Any]]:
+        column = order_column(order)
+        with self._lock:
+            rows = [self._row(self._vocab[i]) for i in self._course_items.get(course_id, ())]
+        rows.sort(key=lambda r: (r[column], r["id"]))
+        return rows
+
+    def get_vocab_page(
+        self, course_id: int, order: str = "en", limit: int = 50, offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        return self.get_vocab_for_course(course_id, order)[offset:offset + limit]
+
+    def get_vocab_by_term(self, term_en: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            term_id = self._term_ids.get(term_key(term_en))
+            if term_id is None:
+                return []
+            rows = [self._row(self._vocab[i]) for i in self._term_items[term_id]]
+        rows.sort(key=lambda r: r["course_id"])
+        return rows
+
+    # ---- change log ----
+    def get_current_revision(self) -> int:
+        return self._revision
+
+    def get_course_revision(self, course_id: int) -> int:
+        with self._lock:
+            for rev, _, _, cid, _ in reversed(self._log):
+                if cid == course_id:
+                    return rev
+            return self._floor
+
+    def get_changes_since(self, revision: int, limit: Optional[int] = None) -> ChangeSet:
+        with self._lock:
+            if revision < self._floor:
+                return ChangeSet(revision=self._revision, full_resync=True)
+            events = [ev for ev in self._log if ev[0] > revision]
+            if limit:
+                events = events[:limit]
+            if not events:
+                return ChangeSet(revision=max(revision, self._revision))
+
+            changes = ChangeSet(revision=events[-1][0])
+            changes.has_more = changes.revision < self._revision
+            latest: Dict[Tuple[str, int], str] = {}
+            removed = set()
+            for _, entity, entity_id, course_id, op in events:
+                latest[(entity, entity_id)] = op
+                if entity == "vocab" and op == "delete" and course_id is not None:
+                    removed.add(course_id)
+            changes.vocab_removed_course_ids = sorted(removed)
+            for (entity, entity_id), op in latest.items():
+                if entity == "course":
+                    row = self._courses.get(entity_id)
+                    row = dict(row) if row is not None else None
+                else:
+                    item = self._vocab.get(entity_id)
+                    row = self._row(item) if item is not None else None
+                if op == "delete" or row is None:
+                    target = changes.courses_deleted if entity == "course" else changes.vocab_deleted
+                    target.append(entity_id)
+                else:
+                    target = changes.courses_upserted if entity == "course" else changes.vocab_upserted
+                    target.append(row)
+            return changes
+
+    def compact_changes(self, max_rows: int) -> int:
+        with self._lock:
+            before = len(self._log)
+            seen = set()
+            kept = []
+            for ev in reversed(self._log):
+                key = (ev[1], ev[2], ev[3])
+                if key not in seen:
+                    seen.add(key)
+                    kept.append(ev)
+            kept.reverse()
+            if len(kept) > max_rows:
+                dropped = kept[:len(kept) - max_rows]
+                self._floor = max(self._floor, dropped[-1][0])
+                kept = kept[len(kept) - max_rows:]
+            self._log = kept
+            return before - len(kept)
+
+    def change_log_span(self) -> int:
+        with self._lock:
+            return len(self._log)
+
+    def close(self) -> None:
+        with self._lock:
+            self._courses.clear()
+            self._vocab.clear()
+            self._course_items.clear()
+            self._terms.clear()
+            self._term_ids.clear()
+            self._term_items.clear()
+            self._log.clear()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import sqlite3
+from collections import Counter
+from typing import Callable, Dict, List
+
+from .storage import OVERRIDE_FIELDS, VOCAB_FIELDS, sort_keys, term_key
+
+# ---------------------------
+# Schema migrations, tracked with PRAGMA user_version.
+# init_db() creates the current schema for new files; existing files are
+# upgraded here one version at a time, each step in its own transaction
+# (except steps listed in _NO_TRANSACTION, e.g. VACUUM).
+# Steps keep their own copy of the DDL of that version: they must keep
+# producing the same result when the live schema changes later.
+# ---------------------------
+
+SCHEMA_VERSION = 4
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+def _migrate_shared_terms(conn: sqlite3.Connection) -> None:
+    """
+    v1: one `terms` row per distinct term (by term_key); vocab_items becomes
+    the per-course membership table. Each field of a term takes its most
+    common value among the duplicates; courses that differ keep their value
+    as an override. vocab_items ids are kept, so analytics, media and the
+    change log still point at the same rows.
+    """
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(vocab_items)")}
+    if "term_id" in cols:
+        return
+
+    groups: Dict[str, List[sqlite3.Row]] = {}
+    for row in conn.execute("SELECT * FROM vocab_items ORDER BY id").fetchall():
+        groups.setdefault(term_key(row["term_en"]), []).append(row)
+    seq = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'vocab_items'"
+    ).fetchone()
+
+    conn.execute(
+        """
+        CREATE TABLE vocab_items_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            course_id INTEGER NOT NULL,
+            term_id INTEGER NOT NULL,
+            term_ar TEXT,
+            definition_en TEXT,
+            definition_ar TEXT,
+            example_en TEXT,
+            difficulty INTEGER,
+            category TEXT,
+            FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
+            FOREIGN KEY (term_id) REFERENCES terms(id)
+        )
+        """
+    )
+    for key, members in groups.items():
+        # most_common() keeps first-seen order on ties, i.e. the oldest row.
+        shared = {
+            f: Counter(m[f] for m in members).most_common(1)[0][0] for f in VOCAB_FIELDS
+        }
+        cur = conn.execute(
+            f"""
+            INSERT INTO terms (term_key, {", ".join(VOCAB_FIELDS)})
+            VALUES (?, {", ".join("?" * len(VOCAB_FIELDS))})
+            """,
+            (key, *(shared[f] for f in VOCAB_FIELDS)),
+        )
+        term_id = cur.lastrowid
+        for m in members:
+            overrides = {f: (None if m[f] == shared[f] else m[f]) for f in OVERRIDE_FIELDS}
+            conn.execute(
+                f"""
+                INSERT INTO vocab_items_new (id, course_id, term_id, {", ".join(OVERRIDE_FIELDS)})
+                VALUES (?, ?, ?, {", ".join("?" * len(OVERRIDE_FIELDS))})
+                """,
+                (m["id"], m["course_id"], term_id, *(overrides[f] for f in OVERRIDE_FIELDS)),
+            )
+
+    # Dropping the table also drops its change-log triggers; init_db()
+    # recreates them for the new table.
+    conn.execute("DROP TABLE vocab_items")
+    conn.execute("ALTER TABLE vocab_items_new RENAME TO vocab_items")
+    if seq is not None:
+        # Never hand out ids of deleted rows again (the change log knows them).
+        conn.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'vocab_items'",
+            (seq[0],),
+        )
+
+def _migrate_incremental_vacuum(conn: sqlite3.Connection) -> None:
+    """
+    v2: auto_vacuum=INCREMENTAL, so free pages left by bulk deletes can be
+    returned to the OS in small steps (services/maintenance.py). Switching
+    an existing file needs one full VACUUM.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+
+def _migrate_sort_keys(conn: sqlite3.Connection) -> None:
+    """
+    v3: vocab_items gets the effective English/Arabic sort keys, backfilled
+    here; init_db() recreates the vocab_entries view with the new columns and
+    the (course_id, sort key) indexes, which replace idx_vocab_items_course.
+    """
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(vocab_items)")}
+    if "sort_en" in cols:
+        return
+    conn.execute("ALTER TABLE vocab_items ADD COLUMN sort_en TEXT NOT NULL DEFAULT ''")
+    conn.execute("ALTER TABLE vocab_items ADD COLUMN sort_ar TEXT NOT NULL DEFAULT ''")
+    # Backfilling is not a content change: keep it out of the change log
+    # (init_db() recreates the trigger).
+    conn.execute("DROP TRIGGER IF EXISTS trg_vocab_items_update")
+    rows = conn.execute(
+        """
+        SELECT v.id, t.term_en, COALESCE(v.term_ar, t.term_ar) AS term_ar
+        FROM vocab_items v
+        JOIN terms t ON t.id = v.term_id
+        """
+    ).fetchall()
+    params = []
+    for row in rows:
+        keys = sort_keys(row)
+        params.append((keys["sort_en"], keys["sort_ar"], row["id"]))
+    conn.executemany("UPDATE vocab_items SET sort_en = ?, sort_ar = ? WHERE id = ?", params)
+    conn.execute("DROP VIEW IF EXISTS vocab_entries")
+    conn.execute("DROP INDEX IF EXISTS idx_vocab_items_course")
+
+def _migrate_logged_moves(conn: sqlite3.Connection) -> None:
+    """
+    v4: the vocab_items update trigger also logs the course an item moved
+    away from. Triggers are created with IF NOT EXISTS, so the old one is
+    dropped here and init_db() creates the new one.
+    """
+    conn.execute("DROP TRIGGER IF EXISTS trg_vocab_items_update")
+
+MIGRATIONS: Dict[int, Callable[[sqlite3.Connection], None]] = {
+    1: _migrate_shared_terms,
+    2: _migrate_incremental_vacuum,
+    3: _migrate_sort_keys,
+    4: _migrate_logged_moves,
+}
+
+# Steps that cannot run inside a transaction.
+_NO_TRANSACTION = {2}
+
+def migrate(conn: sqlite3.Connection) -> None:
+    """Bring an existing database file up to SCHEMA_VERSION."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION or not _table_exists(conn, "vocab_items"):
+        # Up to date, or a new file that init_db() creates in the current shape.
+        return
+
+    conn.commit()
+    # Rebuilding a table must not cascade-delete the rows referring to it;
+    # foreign_keys can only be switched outside a transaction.
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        for target in range(version + 1, SCHEMA_VERSION + 1):
+            if target in _NO_TRANSACTION:
+                MIGRATIONS[target](conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+                continue
+            conn.execute("BEGIN")
+            try:
+                MIGRATIONS[target](conn)
+                problems = conn.execute("PRAGMA foreign_key_check(vocab_items)").fetchall()
+                if problems:
+                    raise sqlite3.IntegrityError(
+                        f"Migration to schema v{target} broke {len(problems)} references"
+                    )
+                conn.execute(f"PRAGMA user_version = {target}")
+            except Exception:
+                conn.rollback()
+                raise
+            conn.commit()
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
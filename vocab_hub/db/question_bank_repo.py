@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Set
+
+from .analytics_repo import term_weight
+from .connection import get_connection
+from .sqlite_storage import _get_floor
+from .storage import get_sql_db_path
+from .unit_of_work import invalidate, memoized
+
+# Stay below SQLite's bound-parameter limit in IN (...) lists.
+_CHUNK = 500
+
+def _chunks(ids: List[int]) -> Iterable[List[int]]:
+    for start in range(0, len(ids), _CHUNK):
+        yield ids[start:start + _CHUNK]
+
+def _placeholders(ids: List[int]) -> str:
+    return ",".join("?" * len(ids))
+
+def get_bank_revision(course_id: int) -> Optional[int]:
+    """Course revision the bank was last built for (None = never built)."""
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return None
+    with get_connection(db_path) as conn:
+        row = conn.execute(
+            "SELECT revision FROM question_bank_courses WHERE course_id = ?",
+            (course_id,),
+        ).fetchone()
+        return int(row["revision"]) if row else None
+
+def get_changed_vocab_ids(course_id: int, since: int) -> Optional[Set[int]]:
+    """
+    Vocab ids of a course inserted/updated/deleted after revision `since`.
+    None if the change log was compacted past `since` (rebuild everything).
+    """
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return None
+    with get_connection(db_path) as conn:
+        if since < _get_floor(conn):
+            return None
+        rows = conn.execute(
+            """
+            SELECT DISTINCT entity_id FROM vocab_changes
+            WHERE course_id = ? AND revision > ? AND entity = 'vocab'
+            """,
+            (course_id, since),
+        ).fetchall()
+        return {row["entity_id"] for row in rows}
+
+def get_stale_question_vocab_ids(
+    course_id: int, changed_ids: Set[int], min_distractors: int
+) -> Set[int]:
+    """
+    Vocab ids whose questions must be rebuilt besides the changed items:
+    questions offering a changed item as a distractor (its text may be stale)
+    and questions left short of distractors (deleted items cascade away).
+    """
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return set()
+    stale: Set[int] = set()
+    with get_connection(db_path) as conn:
+        for chunk in _chunks(sorted(changed_ids)):
+            rows = conn.execute(
+                f"""
+                SELECT DISTINCT q.vocab_id
+                FROM question_distractors d
+                JOIN question_bank q ON q.id = d.question_id
+                WHERE d.vocab_id IN ({_placeholders(chunk)}) AND q.course_id = ?
+                """,
+                (*chunk, course_id),
+            ).fetchall()
+            stale.update(row["vocab_id"] for row in rows)
+        rows = conn.execute(
+            """
+            SELECT q.vocab_id
+            FROM question_bank q
+            LEFT JOIN question_distractors d ON d.question_id = q.id
+            WHERE q.course_id = ?
+            GROUP BY q.id
+            HAVING COUNT(d.question_id) < ?
+            """,
+            (course_id, min_distractors),
+        ).fetchall()
+        stale.update(row["vocab_id"] for row in rows)
+    return stale
+
+def save_questions(
+    course_id: int,
+    revision: int,
+    questions: List[Dict],
+    vocab_ids: Set[int],
+    full: bool = False,
+) -> None:
+    """
+    Replace the questions of `vocab_ids` with `questions` in one transaction
+    and mark the course bank as built for `revision`.
+    Question ids are kept for (vocab item, type) pairs that still exist, so
+    quizzes in progress keep working. With `full`, questions of items no
+    longer in the course are dropped as well.
+    """
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return
+    invalidate()
+    with get_connection(db_path) as conn:
+        cur = conn.cursor()
+        existing: Dict[tuple, int] = {}
+        if full:
+            cur.execute(
+                "SELECT id, vocab_id, qtype FROM question_bank WHERE course_id = ?",
+                (course_id,),
+            )
+            existing.update(((r["vocab_id"], r["qtype"]), r["id"]) for r in cur.fetchall())
+        for chunk in _chunks(sorted(vocab_ids)):
+            cur.execute(
+                f"SELECT id, vocab_id, qtype FROM question_bank WHERE vocab_id IN ({_placeholders(chunk)})",
+                chunk,
+            )
+            existing.update(((r["vocab_id"], r["qtype"]), r["id"]) for r in cur.fetchall())
+
+        keep = {(q["vocab_id"], q["qtype"]) for q in questions}
+        gone = [qid for key, qid in existing.items() if key not in keep]
+        for chunk in _chunks(gone):
+            cur.execute(
+                f"DELETE FROM question_bank WHERE id IN ({_placeholders(chunk)})", chunk
+            )
+
+        for q in questions:
+            qid = existing.get((q["vocab_id"], q["qtype"]))
+            if qid is None:
+                # Another process building the same bank may have inserted
+                # this question since `existing` was read.
+                cur.execute(
+                    """
+                    INSERT INTO question_bank (course_id, vocab_id, qtype, prompt, answer)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(vocab_id, qtype) DO UPDATE SET
+                        course_id = excluded.course_id,
+                        prompt = excluded.prompt,
+                        answer = excluded.answer
+                    """,
+                    (course_id, q["vocab_id"], q["qtype"], q["prompt"], q["answer"]),
+                )
+                qid = cur.execute(
+                    "SELECT id FROM question_bank WHERE vocab_id = ? AND qtype = ?",
+                    (q["vocab_id"], q["qtype"]),
+                ).fetchone()["id"]
+            else:
+                cur.execute(
+                    "UPDATE question_bank SET course_id = ?, prompt = ?, answer = ? WHERE id = ?",
+                    (course_id, q["prompt"], q["answer"], qid),
+                )
+            cur.execute("DELETE FROM question_distractors WHERE question_id = ?", (qid,))
+            cur.executemany(
+                """
+                INSERT INTO question_distractors (question_id, position, vocab_id, option_text)
+                VALUES (?, ?, ?, ?)
+                """,
+                [
+                    (qid, pos, vocab_id, text)
+                    for pos, (vocab_id, text) in enumerate(q["distractors"])
+                ],
+            )
+
+        cur.execute(
+            """
+            INSERT INTO question_bank_courses (course_id, revision) VALUES (?, ?)
+            ON CONFLICT(course_id) DO UPDATE SET revision = excluded.revision
+            """,
+            (course_id, revision),
+        )
+
+def get_course_questions(course_id: int, qtype: Optional[str] = None) -> List[sqlite3.Row]:
+    """
+    Everything needed to start a quiz, in one indexed query: question id,
+    vocab id, type and the term's selection weight (see term_weight).
+    """
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return []
+    sql = """
+        SELECT q.id, q.vocab_id, q.qtype,
+               COALESCE(s.attempts, 0) AS attempts, COALESCE(s.correct, 0) AS correct
+        FROM question_bank q
+        LEFT JOIN quiz_term_stats s ON s.vocab_id = q.vocab_id
+        WHERE q.course_id = ?
+    """
+    params: tuple = (course_id,)
+    if qtype:
+        sql += " AND q.qtype = ?"
+        params = (course_id, qtype)
+    with get_connection(db_path) as conn:
+        return conn.execute(sql, params).fetchall()
+
+def get_question_weights(rows: List[sqlite3.Row]) -> Dict[int, float]:
+    """Vocab id -> quiz selection weight for rows of get_course_questions()."""
+    return {
+        row["vocab_id"]: term_weight(row["attempts"], row["correct"])
+        for row in rows
+        if row["attempts"]
+    }
+
+def _load_questions(conn: sqlite3.Connection, question_ids: List[int]) -> Dict[int, Dict]:
+    questions: Dict[int, Dict] = {}
+    for chunk in _chunks(question_ids):
+        rows = conn.execute(
+            f"""
+            SELECT q.id, q.vocab_id, q.qtype, q.prompt, q.answer,
+                   d.vocab_id AS option_vocab_id, d.option_text
+            FROM question_bank q
+            LEFT JOIN question_distractors d ON d.question_id = q.id
+            WHERE q.id IN ({_placeholders(chunk)})
+            ORDER BY q.id, d.position
+            """,
+            chunk,
+        ).fetchall()
+        for r in rows:
+            q = questions.get(r["id"])
+            if q is None:
+                q = questions[r["id"]] = {
+                    "id": r["id"],
+                    "vocab_id": r["vocab_id"],
+                    "qtype": r["qtype"],
+                    "prompt": r["prompt"],
+                    "answer": r["answer"],
+                    "distractors": [],
+                }
+            if r["option_vocab_id"] is not None:
+                q["distractors"].append((r["option_vocab_id"], r["option_text"]))
+    return questions
+
+def get_questions(question_ids: List[int]) -> Dict[int, Dict]:
+    """
+    Bank questions by id (shape as in get_question), read in one query per
+    500 ids. Ids no longer in the bank are missing from the result.
+    """
+    db_path = get_sql_db_path()
+    if db_path is None or not question_ids:
+        return {}
+    with get_connection(db_path) as conn:
+        return _load_questions(conn, list(question_ids))
+
+def get_question(question_id: int) -> Optional[Dict]:
+    """
+    One bank question: prompt, answer and the distractors as
+    (vocab id, option text) pairs. None if it no longer exists.
+    """
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return None
+
+    def load() -> Optional[Dict]:
+        with get_connection(db_path) as conn:
+            return _load_questions(conn, [question_id]).get(question_id)
+
+    return memoized(("question", question_id), load)
@@ -0,0 +1,596 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .connection import get_connection
+from .storage import (
+    OVERRIDE_FIELDS,
+    VOCAB_FIELDS,
+    ChangeSet,
+    StorageBackend,
+    order_column,
+    sort_keys,
+    term_key,
+    term_overrides,
+)
+
+# SQLite's default limit on bound parameters is 999.
+_IN_CHUNK = 900
+
+_FLOOR_KEY = "changes_floor"
+
+def _get_floor(conn: sqlite3.Connection) -> int:
+    row = conn.execute(
+        "SELECT value FROM app_meta WHERE key = ?", (_FLOOR_KEY,)
+    ).fetchone()
+    return int(row["value"]) if row else 0
+
+def get_log_head(conn: sqlite3.Connection) -> int:
+    """Highest revision ever handed out by this file's change log."""
+    row = conn.execute(
+        """
+        SELECT MAX(
+            COALESCE((SELECT MAX(revision) FROM vocab_changes), 0),
+            COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'vocab_changes'), 0)
+        ) AS head
+        """
+    ).fetchone()
+    return max(int(row["head"]), _get_floor(conn))
+
+def restart_change_log(conn: sqlite3.Connection, above: int) -> int:
+    """
+    Start the change log again above revision `above` after the data was
+    replaced wholesale (snapshot restore): old events are dropped and the
+    floor moves past every revision handed out before, so any client or
+    cache keyed by an older revision does a full resync. Returns the floor.
+    """
+    floor = above + 1
+    conn.execute("DELETE FROM vocab_changes")
+    conn.execute("DELETE FROM sqlite_sequence WHERE name = 'vocab_changes'")
+    conn.execute(
+        "INSERT INTO sqlite_sequence (name, seq) VALUES ('vocab_changes', ?)", (floor,)
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO app_meta (key, value) VALUES (?, ?)",
+        (_FLOOR_KEY, str(floor)),
+    )
+    return floor
+
+def _fetch_rows(
+    conn: sqlite3.Connection, table: str, ids: List[int]
+) -> Dict[int, sqlite3.Row]:
+    rows: Dict[int, sqlite3.Row] = {}
+    for start in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[start:start + _IN_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        cur = conn.execute(
+            f"SELECT * FROM {table} WHERE id IN ({placeholders})", chunk
+        )
+        rows.update((r["id"], r) for r in cur.fetchall())
+    return rows
+
+def _find_or_create_term(conn: sqlite3.Connection, values: Dict[str, Any]) -> sqlite3.Row:
+    key = term_key(values["term_en"])
+    row = conn.execute("SELECT * FROM terms WHERE term_key = ?", (key,)).fetchone()
+    if row is not None:
+        return row
+    cur = conn.execute(
+        f"""
+        INSERT INTO terms (term_key, {", ".join(VOCAB_FIELDS)})
+        VALUES (?, {", ".join("?" * len(VOCAB_FIELDS))})
+        """,
+        (key, *(values[f] for f in VOCAB_FIELDS)),
+    )
+    return conn.execute("SELECT * FROM terms WHERE id = ?", (cur.lastrowid,)).fetchone()
+
+def _insert_member(
+    conn: sqlite3.Connection,
+    course_id: int,
+    term_id: int,
+    overrides: Dict[str, Any],
+    keys: Dict[str, str],
+) -> Optional[int]:
+    cur = conn.execute(
+        f"""
+        INSERT INTO vocab_items (course_id, term_id, {", ".join(OVERRIDE_FIELDS)}, sort_en, sort_ar)
+        VALUES (?, ?, {", ".join("?" * len(OVERRIDE_FIELDS))}, ?, ?)
+        """,
+        (
+            course_id,
+            term_id,
+            *(overrides[f] for f in OVERRIDE_FIELDS),
+            keys["sort_en"],
+            keys["sort_ar"],
+        ),
+    )
+    return cur.lastrowid
+
+def _update_member(conn: sqlite3.Connection, item_id: int, columns: Dict[str, Any]) -> None:
+    conn.execute(
+        f"""
+        UPDATE vocab_items
+        SET {", ".join(f"{c} = ?" for c in columns)}
+        WHERE id = ?
+        """,
+        (*columns.values(), item_id),
+    )
+
+def _rekey_term(conn: sqlite3.Connection, term_id: int) -> None:
+    """Recompute the stored sort keys of the term's items where they changed."""
+    rows = conn.execute(
+        "SELECT id, term_en, term_ar, sort_en, sort_ar FROM vocab_entries WHERE term_id = ?",
+        (term_id,),
+    ).fetchall()
+    for row in rows:
+        keys = sort_keys(row)
+        if keys["sort_en"] != row["sort_en"] or keys["sort_ar"] != row["sort_ar"]:
+            _update_member(conn, row["id"], keys)
+
+def _split_latest(events: List[Any], entity: str) -> Tuple[List[int], List[int]]:
+    """Return (upserted ids, deleted ids) using the latest event per row."""
+    latest: Dict[int, str] = {}
+    for ev in events:
+        if ev["entity"] == entity:
+            latest[ev["entity_id"]] = ev["op"]
+    upserted = [i for i, op in latest.items() if op != "delete"]
+    deleted = [i for i, op in latest.items() if op == "delete"]
+    return upserted, deleted
+
+def _removed_course_ids(events: List[Any]) -> List[int]:
+    """Courses named by vocab delete events (items deleted or moved away)."""
+    return sorted({
+        ev["course_id"]
+        for ev in events
+        if ev["entity"] == "vocab" and ev["op"] == "delete" and ev["course_id"] is not None
+    })
+
+class SQLiteStorage(StorageBackend):
+    """The database file, with a short-lived connection per call."""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = Path(db_path)
+
+    # Subclasses route reads and writes to different connections.
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        with get_connection(self.db_path) as conn:
+            yield conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        with get_connection(self.db_path) as conn:
+            yield conn
+
+    # The change log always lives in the database file.
+    _log = _read
+
+    # ---- courses ----
+    def add_course(self, name: str, description: str) -> Optional[int]:
+        try:
+            with self._write() as conn:
+                cur = conn.cursor()
+                cur.execute(
+                    "INSERT INTO courses (name, description) VALUES (?, ?)",
+                    (name, description),
+                )
+                return cur.lastrowid
+        except sqlite3.IntegrityError:
+            return None
+
+    def update_course(self, course_id: int, name: str, description: str) -> bool:
+        try:
+            with self._write() as conn:
+                cur = conn.cursor()
+                cur.execute(
+                    "UPDATE courses SET name = ?, description = ? WHERE id = ?",
+                    (name, description, course_id),
+                )
+                return cur.rowcount > 0
+        except sqlite3.IntegrityError:
+            return False
+
+    def delete_course(self, course_id: int) -> None:
+        with self._write() as conn:
+            conn.execute("DELETE FROM courses WHERE id = ?", (course_id,))
+
+    def get_courses(self) -> List[sqlite3.Row]:
+        with self._read() as conn:
+            return conn.execute("SELECT * FROM courses ORDER BY name").fetchall()
+
+    def get_course_by_id(self, course_id: int) -> Optional[sqlite3.Row]:
+        with self._read() as conn:
+            return conn.execute(
+                "SELECT * FROM courses WHERE id = ?", (course_id,)
+            ).fetchone()
+
+    # ---- vocabulary ----
+    def add_vocab_item(self, course_id: int, values: Dict[str, Any]) -> Optional[int]:
+        with self._write() as conn:
+            term = _find_or_create_term(conn, values)
+            return _insert_member(
+                conn, course_id, term["id"], term_overrides(term, values), sort_keys(values)
+            )
+
+    def update_vocab_item(
+        self, item_id: int, values: Dict[str, Any], shared: bool = True
+    ) -> bool:
+        with self._write() as conn:
+            current = conn.execute(
+                "SELECT * FROM vocab_entries WHERE id = ?", (item_id,)
+            ).fetchone()
+            if current is None:
+                return False
+            term = conn.execute(
+                "SELECT * FROM terms WHERE id = ?", (current["term_id"],)
+            ).fetchone()
+
+            key = term_key(values["term_en"])
+            if key != term["term_key"]:
+                taken = conn.execute("SELECT 1 FROM terms WHERE term_key = ?", (key,)).fetchone()
+                if not shared or taken:
+                    # Only this course moves to the other (or a new) term.
+                    target = _find_or_create_term(conn, values)
+                    overrides = term_overrides(target, values)
+                    _update_member(conn, item_id, {"term_id": target["id"], **overrides})
+                    _rekey_term(conn, target["id"])
+                    return True
+                # Renamed for every course that uses the term.
+                conn.execute(
+                    "UPDATE terms SET term_key = ?, term_en = ? WHERE id = ?",
+                    (key, values["term_en"], term["id"]),
+                )
+            elif values["term_en"] != term["term_en"]:
+                # Same term, different spelling/case: term_en is always shared.
+                conn.execute(
+                    "UPDATE terms SET term_en = ? WHERE id = ?", (values["term_en"], term["id"])
+                )
+
+            changed = [f for f in OVERRIDE_FIELDS if values[f] != current[f]]
+            if not changed:
+                _rekey_term(conn, term["id"])
+                return True
+            if shared:
+                conn.execute(
+                    f"""
+                    UPDATE terms
+                    SET {", ".join(f"{f} = ?" for f in changed)}
+                    WHERE id = ?
+                    """,
+                    (*(values[f] for f in changed), term["id"]),
+                )
+                _update_member(conn, item_id, {f: None for f in changed})
+            else:
+                _update_member(
+                    conn,
+                    item_id,
+                    {f: (None if values[f] == term[f] else values[f]) for f in changed},
+                )
+            _rekey_term(conn, term["id"])
+            return True
+
+    def delete_vocab_item(self, item_id: int) -> None:
+        with self._write() as conn:
+            conn.execute("DELETE FROM vocab_items WHERE id = ?", (item_id,))
+
+    def get_vocab_for_course(self, course_id: int, order: str = "en") -> List[sqlite3.Row]:
+        column = order_column(order)
+        with self._read() as conn:
+            return conn.execute(
+                f"""
+                SELECT * FROM vocab_entries
+                WHERE course_id = ?
+                ORDER BY {column}, id
+                """,
+                (course_id,),
+            ).fetchall()
+
+    def get_vocab_page(
+        self, course_id: int, order: str = "en", limit: int = 50, offset: int = 0
+    ) -> List[sqlite3.Row]:
+        column = order_column(order)
+        with self._read() as conn:
+            return conn.execute(
+                f"""
+                SELECT * FROM vocab_entries
+                WHERE course_id = ?
+                ORDER BY {column}, id
+                LIMIT ? OFFSET ?
+                """,
+                (course_id, limit, offset),
+            ).fetchall()
+
+    def get_vocab_by_term(self, term_en: str) -> List[sqlite3.Row]:
+        with self._read() as conn:
+            return conn.execute(
+                """
+                SELECT * FROM vocab_entries
+                WHERE term_id = (SELECT id FROM terms WHERE term_key = ?)
+                ORDER BY course_id
+                """,
+                (term_key(term_en),),
+            ).fetchall()
+
+    # ---- change log ----
+    def get_current_revision(self) -> int:
+        with self._log() as conn:
+            row = conn.execute("SELECT MAX(revision) AS rev FROM vocab_changes").fetchone()
+            return int(row["rev"] or _get_floor(conn))
+
+    def get_course_revision(self, course_id: int) -> int:
+        with self._log() as conn:
+            row = conn.execute(
+                "SELECT MAX(revision) AS rev FROM vocab_changes WHERE course_id = ?",
+                (course_id,),
+            ).fetchone()
+            return int(row["rev"] or _get_floor(conn))
+
+    def get_changes_since(self, revision: int, limit: Optional[int] = None) -> ChangeSet:
+        with self._log() as conn:
+            floor = _get_floor(conn)
+            head_row = conn.execute("SELECT MAX(revision) AS rev FROM vocab_changes").fetchone()
+            head = int(head_row["rev"] or floor)
+
+            if revision < floor:
+                return ChangeSet(revision=head, full_resync=True)
+
+            sql = (
+                "SELECT revision, entity, entity_id, course_id, op FROM vocab_changes "
+                "WHERE revision > ? ORDER BY revision"
+            )
+            params: Tuple = (revision,)
+            if limit:
+                sql += " LIMIT ?"
+                params = (revision, int(limit))
+            events = conn.execute(sql, params).fetchall()
+            if not events:
+                return ChangeSet(revision=max(revision, head))
+
+            changes = ChangeSet(revision=events[-1]["revision"])
+            changes.has_more = changes.revision < head
+
+            course_ids, changes.courses_deleted = _split_latest(events, "course")
+            vocab_ids, changes.vocab_deleted = _split_latest(events, "vocab")
+            changes.vocab_removed_course_ids = _removed_course_ids(events)
+
+            # A row may already be gone if it was deleted after the fetched page.
+            courses = _fetch_rows(conn, "courses", course_ids)
+            for cid in course_ids:
+                if cid in courses:
+                    changes.courses_upserted.append(courses[cid])
+                else:
+                    changes.courses_deleted.append(cid)
+
+            vocab = _fetch_rows(conn, "vocab_entries", vocab_ids)
+            for vid in vocab_ids:
+                if vid in vocab:
+                    changes.vocab_upserted.append(vocab[vid])
+                else:
+                    changes.vocab_deleted.append(vid)
+
+            return changes
+
+    def compact_changes(self, max_rows: int) -> int:
+        with self._write() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                DELETE FROM vocab_changes
+                WHERE revision NOT IN (
+                    SELECT MAX(revision) FROM vocab_changes
+                    GROUP BY entity, entity_id, course_id
+                )
+                """
+            )
+            removed = cur.rowcount
+
+            cur.execute("SELECT COUNT(*) AS n FROM vocab_changes")
+            excess = cur.fetchone()["n"] - max_rows
+            if excess > 0:
+                cur.execute(
+                    "SELECT revision FROM vocab_changes ORDER BY revision LIMIT 1 OFFSET ?",
+                    (excess - 1,),
+                )
+                new_floor = cur.fetchone()["revision"]
+                cur.execute("DELETE FROM vocab_changes WHERE revision <= ?", (new_floor,))
+                removed += cur.rowcount
+                cur.execute(
+                    "INSERT OR REPLACE INTO app_meta (key, value) VALUES (?, ?)",
+                    (_FLOOR_KEY, str(max(new_floor, _get_floor(conn)))),
+                )
+            return removed
+
+    def change_log_span(self) -> int:
+        with self._log() as conn:
+            row = conn.execute(
+                "SELECT MIN(revision) AS lo, MAX(revision) AS hi FROM vocab_changes"
+            ).fetchone()
+        return 0 if row["hi"] is None else row["hi"] - row["lo"] + 1
+
+class SQLiteMemoryStorage(SQLiteStorage):
+    """
+    Read replica of the database file in an in-memory SQLite database.
+
+    Reads are served from RAM. Writes go to the file first (write-through),
+    then the touched rows are copied into the replica. Commits made by other
+    connections are detected through PRAGMA data_version on the persistent
+    file connection; the replica then copies only the rows named in the
+    change log since its revision. Commits that did not touch the replicated
+    tables (quiz answers, question bank, media) log nothing and cost no copy.
+    The whole file is reloaded only when the log cannot be followed
+    (compacted past the replica, or moved back by a restore).
+    """
+
+    name = "sqlite-memory"
+
+    def __init__(self, db_path: Path) -> None:
+        super().__init__(db_path)
+        self._lock = threading.RLock()
+        self._disk = get_connection(self.db_path)
+        self._mem: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._revision = 0
+        # Full copies of the file made so far (diagnostics).
+        self.reloads = 0
+        self._reload()
+
+    def _current_data_version(self) -> int:
+        return self._disk.execute("PRAGMA data_version").fetchone()[0]
+
+    def _reload(self) -> None:
+        # Read before the copy: a commit in between is replayed (harmlessly)
+        # by the next _sync instead of being missed.
+        data_version = self._current_data_version()
+        revision = super().get_current_revision()
+        mem = sqlite3.connect(":memory:", check_same_thread=False)
+        mem.row_factory = sqlite3.Row
+        self._disk.backup(mem)
+        mem.execute("PRAGMA foreign_keys = ON")
+        # The replica never feeds the change log; that stays in the file.
+        # Other triggers (e.g. removing unused terms) keep it consistent.
+        for (trigger,) in mem.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            "AND sql LIKE '%vocab_changes%'"
+        ).fetchall():
+            mem.execute(f"DROP TRIGGER {trigger}")
+        if self._mem is not None:
+            self._mem.close()
+        self._mem = mem
+        self._data_version = data_version
+        self._revision = revision
+        self.reloads += 1
+
+    def _apply(self, changes: ChangeSet) -> None:
+        """Copy the rows of a change set into the replica."""
+        self._mirror("courses", [row["id"] for row in changes.courses_upserted])
+        self._mirror("terms", sorted({row["term_id"] for row in changes.vocab_upserted}))
+        self._mirror("vocab_items", [row["id"] for row in changes.vocab_upserted])
+        for item_id in changes.vocab_deleted:
+            self._mem_delete("vocab_items", item_id)
+        for course_id in changes.courses_deleted:
+            self._mem_delete("courses", course_id)
+
+    def _sync(self) -> None:
+        """Catch up with commits made through other connections."""
+        version = self._current_data_version()
+        if version == self._data_version:
+            return
+        self._data_version = version
+        if super().get_current_revision() < self._revision:
+            self._reload()
+            return
+        while True:
+            changes = super().get_changes_since(self._revision, limit=1000)
+            if changes.full_resync:
+                self._reload()
+                return
+            self._apply(changes)
+            self._revision = changes.revision
+            if not changes.has_more:
+                return
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._sync()
+            yield self._mem
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            with self._disk:
+                yield self._disk
+
+    @contextmanager
+    def _log(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            yield self._disk
+
+    def _mirror(self, table: str, ids: List[int]) -> None:
+        """Copy rows from the file into the replica (insert or update)."""
+        if not ids:
+            return
+        rows = _fetch_rows(self._disk, table, ids)
+        for row in rows.values():
+            cols = row.keys()
+            self._mem.execute(
+                f"""
+                INSERT INTO {table} ({", ".join(cols)})
+                VALUES ({", ".join("?" * len(cols))})
+                ON CONFLICT(id) DO UPDATE SET
+                {", ".join(f"{c} = excluded.{c}" for c in cols if c != "id")}
+                """,
+                tuple(row),
+            )
+        self._mem.commit()
+
+    def _mirror_vocab(self, item_id: int) -> None:
+        """
+        Copy a vocabulary item and its shared term into the replica, with the
+        term's other items (their sort keys follow the shared text).
+        """
+        row = self._disk.execute(
+            "SELECT term_id FROM vocab_items WHERE id = ?", (item_id,)
+        ).fetchone()
+        if row is not None:
+            self._mirror("terms", [row["term_id"]])
+            members = self._disk.execute(
+                "SELECT id FROM vocab_items WHERE term_id = ?", (row["term_id"],)
+            ).fetchall()
+            self._mirror("vocab_items", [m["id"] for m in members])
+
+    def _mem_delete(self, table: str, row_id: int) -> None:
+        self._mem.execute(f"DELETE FROM {table} WHERE id = ?", (row_id,))
+        self._mem.commit()
+
+    def add_course(self, name: str, description: str) -> Optional[int]:
+        with self._lock:
+            course_id = super().add_course(name, description)
+            if course_id:
+                self._mirror("courses", [course_id])
+            return course_id
+
+    def update_course(self, course_id: int, name: str, description: str) -> bool:
+        with self._lock:
+            ok = super().update_course(course_id, name, description)
+            if ok:
+                self._mirror("courses", [course_id])
+            return ok
+
+    def delete_course(self, course_id: int) -> None:
+        with self._lock:
+            super().delete_course(course_id)
+            self._mem_delete("courses", course_id)
+
+    def add_vocab_item(self, course_id: int, values: Dict[str, Any]) -> Optional[int]:
+        with self._lock:
+            item_id = super().add_vocab_item(course_id, values)
+            if item_id:
+                self._mirror_vocab(item_id)
+            return item_id
+
+    def update_vocab_item(
+        self, item_id: int, values: Dict[str, Any], shared: bool = True
+    ) -> bool:
+        with self._lock:
+            ok = super().update_vocab_item(item_id, values, shared=shared)
+            if ok:
+                self._mirror_vocab(item_id)
+            return ok
+
+    def delete_vocab_item(self, item_id: int) -> None:
+        with self._lock:
+            super().delete_vocab_item(item_id)
+            self._mem_delete("vocab_items", item_id)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._mem is not None:
+                self._mem.close()
+                self._mem = None
+            self._disk.close()
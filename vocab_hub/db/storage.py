@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..collation import arabic_sort_key, english_sort_key
+from ..config import get_db_path, get_storage_backend_name, get_tenant_cache_settings
+
+# Vocabulary columns written by the repos (besides id and course_id).
+VOCAB_FIELDS = (
+    "term_en",
+    "term_ar",
+    "definition_en",
+    "definition_ar",
+    "example_en",
+    "difficulty",
+    "category",
+)
+
+# Fields a course can override on a shared term. term_en is the term's
+# identity and is always shared.
+OVERRIDE_FIELDS = VOCAB_FIELDS[1:]
+
+def term_key(term_en: str) -> str:
+    """Identity of a shared term: English text, ignoring case and spacing."""
+    return " ".join(str(term_en or "").split()).casefold()
+
+def term_overrides(term: Any, values: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-course override columns: None wherever the shared value is used."""
+    return {f: (None if values[f] == term[f] else values[f]) for f in OVERRIDE_FIELDS}
+
+# List orders -> sort-key column on vocab_items (see collation.py).
+VOCAB_ORDERS = {"en": "sort_en", "ar": "sort_ar"}
+
+def sort_keys(values: Dict[str, Any]) -> Dict[str, str]:
+    """Sort-key columns of a membership row from its effective term_en/term_ar."""
+    return {
+        "sort_en": english_sort_key(values["term_en"]),
+        "sort_ar": arabic_sort_key(values["term_ar"]),
+    }
+
+def order_column(order: str) -> str:
+    if order not in VOCAB_ORDERS:
+        raise ValueError(f"Unknown vocabulary order: {order!r}")
+    return VOCAB_ORDERS[order]
+
+# Rows are sqlite3.Row for the SQLite backends and plain dicts for the
+# pure-Python engine; both support row["column"] and row.keys().
+Row = Any
+
+@dataclass
+class ChangeSet:
+    """
+    Compact delta between a client's revision and `revision`.
+    Several events for the same row collapse into one entry: the current row
+    (upserted) or its id (deleted).
+    If `full_resync` is True the client is older than the compacted log and
+    must reload everything, then continue from `revision`.
+    """
+    revision: int
+    full_resync: bool = False
+    has_more: bool = False
+    courses_upserted: List[Row] = field(default_factory=list)
+    courses_deleted: List[int] = field(default_factory=list)
+    vocab_upserted: List[Row] = field(default_factory=list)
+    vocab_deleted: List[int] = field(default_factory=list)
+    # Courses that lost items: deleted ones and ones moved to another course.
+    vocab_removed_course_ids: List[int] = field(default_factory=list)
+
+    @property
+    def affected_course_ids(self) -> List[int]:
+        ids = {row["id"] for row in self.courses_upserted}
+        ids.update(self.courses_deleted)
+        ids.update(row["course_id"] for row in self.vocab_upserted)
+        ids.update(self.vocab_removed_course_ids)
+        return sorted(ids)
+
+class StorageBackend(ABC):
+    """
+    Data access used by courses_repo, vocab_repo and changes_repo.
+    The repos keep input validation/normalization; backends only store and
+    fetch already-clean values.
+    """
+
+    name = "abstract"
+    # SQLite file behind the backend, if any. Features that live only in SQL
+    # tables (e.g. quiz analytics) use it and are disabled when it is None.
+    db_path: Optional[Path] = None
+
+    # ---- courses ----
+    @abstractmethod
+    def add_course(self, name: str, description: str) -> Optional[int]:
+        """Return the new id, or None if the name is already taken."""
+
+    @abstractmethod
+    def update_course(self, course_id: int, name: str, description: str) -> bool:
+        """Return False if the course is missing or the name is taken."""
+
+    @abstractmethod
+    def delete_course(self, course_id: int) -> None:
+        """Delete a course together with its vocabulary."""
+
+    @abstractmethod
+    def get_courses(self) -> List[Row]:
+        """All courses ordered by name."""
+
+    @abstractmethod
+    def get_course_by_id(self, course_id: int) -> Optional[Row]:
+        ...
+
+    # ---- vocabulary ----
+    @abstractmethod
+    def add_vocab_item(self, course_id: int, values: Dict[str, Any]) -> Optional[int]:
+        """`values` holds every name in VOCAB_FIELDS."""
+
+    @abstractmethod
+    def update_vocab_item(
+        self, item_id: int, values: Dict[str, Any], shared: bool = True
+    ) -> bool:
+        """
+        Apply the fields that differ from the item's current values.
+        shared=True changes the shared term for every course (and clears this
+        course's overrides of those fields); shared=False stores them as
+        overrides for this course only. A new term_en that belongs to another
+        term moves the item to that term.
+        """
+
+    @abstractmethod
+    def delete_vocab_item(self, item_id: int) -> None:
+        ...
+
+    @abstractmethod
+    def get_vocab_for_course(self, course_id: int, order: str = "en") -> List[Row]:
+        """Vocabulary of a course by English ("en") or Arabic ("ar") sort key, then id."""
+
+    @abstractmethod
+    def get_vocab_page(
+        self, course_id: int, order: str = "en", limit: int = 50, offset: int = 0
+    ) -> List[Row]:
+        """One page of get_vocab_for_course(course_id, order)."""
+
+    @abstractmethod
+    def get_vocab_by_term(self, term_en: str) -> List[Row]:
+        """Rows of every course that uses this term (see term_key), by course id."""
+
+    # ---- change log ----
+    @abstractmethod
+    def get_current_revision(self) -> int:
+        ...
+
+    @abstractmethod
+    def get_course_revision(self, course_id: int) -> int:
+        ...
+
+    @abstractmethod
+    def get_changes_since(self, revision: int, limit: Optional[int] = None) -> ChangeSet:
+        ...
+
+    @abstractmethod
+    def compact_changes(self, max_rows: int) -> int:
+        ...
+
+    @abstractmethod
+    def change_log_span(self) -> int:
+        """Cheap upper bound on the number of change-log rows."""
+
+    def close(self) -> None:
+        """Release connections or memory held by the backend."""
+
+# ---------------------------
+# Backend selection
+# ---------------------------
+
+@dataclass
+class _OpenStorage:
+    storage: StorageBackend
+    last_used: float
+    # Blocks (script runs, background tasks) currently using the backend.
+    leases: int = 0
+
+# Open backends keyed by (backend name, DB path), least recently used first.
+# With tenants (config.use_tenant) each tenant's file gets its own backend;
+# idle ones are closed so memory follows the active tenants only.
+_storages: "OrderedDict[tuple, _OpenStorage]" = OrderedDict()
+_injected: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+# A backend used this recently may still be in use by a caller that holds
+# no lease (e.g. a one-off call from another thread).
+_MIN_IDLE_BEFORE_CLOSE_S = 5.0
+
+# Called with the database file of every backend closed by the LRU, so
+# per-tenant caches kept elsewhere (decks) are dropped with it.
+_close_hooks: List[Callable[[Path], None]] = []
+
+def on_storage_closed(hook: Callable[[Path], None]) -> None:
+    """Register `hook(db_path)`, called after a tenant's backend is closed."""
+    _close_hooks.append(hook)
+
+def create_storage(name: str, db_path: Optional[Path] = None) -> StorageBackend:
+    """
+    Build a backend by its config name ("sqlite", "sqlite-memory",
+    "sqlite-cached", "memory").
+    """
+    if name == "memory":
+        from .memory_storage import MemoryStorage
+        return MemoryStorage()
+    from .sqlite_storage import SQLiteMemoryStorage, SQLiteStorage
+    path = db_path or get_db_path()
+    if name == "sqlite-memory":
+        return SQLiteMemoryStorage(path)
+    if name == "sqlite-cached":
+        from .cached_storage import CachedStorage
+        return CachedStorage(SQLiteStorage(path))
+    if name == "sqlite":
+        return SQLiteStorage(path)
+    raise ValueError(f"Unknown storage backend: {name!r}")
+
+def _close_idle(now: float) -> List[StorageBackend]:
+    """Remove idle, unleased backends beyond the limits; the caller closes them."""
+    max_open, idle_min = get_tenant_cache_settings()
+    closed = []
+    # The newest entry is the one being handed out.
+    for key, entry in list(_storages.items())[:-1]:
+        if entry.storage.db_path is None or entry.leases:
+            # Pure-Python data would be lost on close; leased ones are in use.
+            continue
+        idle = now - entry.last_used
+        over_limit = len(_storages) > max_open and idle >= _MIN_IDLE_BEFORE_CLOSE_S
+        expired = idle_min and idle >= idle_min * 60
+        if not (over_limit or expired):
+            break
+        del _storages[key]
+        closed.append(entry.storage)
+    return closed
+
+def _close(storages: List[StorageBackend]) -> None:
+    from .connection import forget_db
+
+    for storage in storages:
+        storage.close()
+        if storage.db_path is not None:
+            forget_db(storage.db_path)
+            for hook in _close_hooks:
+                hook(storage.db_path)
+
+def _open_entry() -> Tuple[_OpenStorage, List[StorageBackend]]:
+    """LRU entry of the current tenant's backend (caller holds the lock)."""
+    name = get_storage_backend_name()
+    path = get_db_path()
+    key = (name, path)
+    now = time.monotonic()
+    entry = _storages.pop(key, None)
+    if entry is None:
+        if name != "memory":
+            from .connection import ensure_db
+            ensure_db(path)
+        entry = _OpenStorage(create_storage(name, path), now)
+    entry.last_used = now
+    _storages[key] = entry
+    return entry, _close_idle(now)
+
+def get_storage() -> StorageBackend:
+    """
+    Backend for the current tenant, selected by FIT_VOCAB_STORAGE.
+    Created lazily (initializing/migrating the tenant's database file once)
+    and kept in a bounded LRU (FIT_VOCAB_MAX_OPEN_TENANTS).
+    """
+    if _injected is not None:
+        return _injected
+    with _storage_lock:
+        entry, closed = _open_entry()
+    _close(closed)
+    return entry.storage
+
+@contextmanager
+def storage_lease() -> Iterator[StorageBackend]:
+    """
+    Keep the current tenant's backend open for the block (a script run, a
+    background task): the LRU never closes a leased backend.
+    """
+    if _injected is not None:
+        yield _injected
+        return
+    with _storage_lock:
+        entry, closed = _open_entry()
+        entry.leases += 1
+    _close(closed)
+    try:
+        yield entry.storage
+    finally:
+        with _storage_lock:
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+
+def open_storage_count() -> int:
+    """Number of backends currently open (for diagnostics)."""
+    with _storage_lock:
+        return len(_storages) + (1 if _injected is not None else 0)
+
+def close_all_storages() -> None:
+    with _storage_lock:
+        closed = [entry.storage for entry in _storages.values()]
+        _storages.clear()
+    _close(closed)
+
+def get_sql_db_path() -> Optional[Path]:
+    """Database file of the current backend (None for the pure-Python engine)."""
+    return get_storage().db_path
+
+def set_storage(backend: Optional[StorageBackend]) -> None:
+    """
+    Install a specific backend (e.g. a MemoryStorage in unit tests or
+    benchmarks). Passing None returns to config-based selection.
+    """
+    global _injected
+    close_all_storages()
+    with _storage_lock:
+        if _injected is not None and _injected is not backend:
+            _injected.close()
+        # An injected backend is used regardless of config/tenant until reset.
+        _injected = backend
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional
+
+# ---------------------------
+# Per-run read cache ("unit of work").
+# Inside `with unit_of_work():` identical repo reads are answered from memory
+# for the rest of the block, and any repo write clears the cache. Nothing
+# outlives the block, so no data is cached across Streamlit reruns.
+# Outside a unit of work every read goes to storage as before.
+# ---------------------------
+
+class UnitOfWork:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._results: Dict[Hashable, Any] = {}
+        self.queries = 0
+        self.saved = 0
+
+    def read(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._results:
+                self.saved += 1
+                return self._results[key]
+        value = load()
+        with self._lock:
+            self.queries += 1
+            self._results[key] = value
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+_current: ContextVar[Optional[UnitOfWork]] = ContextVar("vocab_unit_of_work", default=None)
+
+@contextmanager
+def unit_of_work() -> Iterator[UnitOfWork]:
+    """Memoize repo reads until the block ends (nested blocks share the outer one)."""
+    outer = _current.get()
+    if outer is not None:
+        yield outer
+        return
+    uow = UnitOfWork()
+    token = _current.set(uow)
+    try:
+        yield uow
+    finally:
+        _current.reset(token)
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    return _current.get()
+
+def memoized(key: Hashable, load: Callable[[], Any]) -> Any:
+    """load() once per unit of work for `key`; plain load() outside one."""
+    uow = _current.get()
+    if uow is None:
+        return load()
+    return uow.read(key, load)
+
+def invalidate() -> None:
+    """Called by repo writes: later reads in this run see the new data."""
+    uow = _current.get()
+    if uow is not None:
+        uow.invalidate()
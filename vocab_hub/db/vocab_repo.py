@@ -3,12 +3,13 @@ from __future__ import annotations
 import sqlite3
 from typing import List
 
-from .connection import get_connection
+from .storage import get_storage
+from .unit_of_work import invalidate, memoized
 
 def _normalize_difficulty(value) -> int:
     """Ensure difficulty is always between 1 and 3."""
     try:
-        v = int(value)
+        v = int(float(value))
     except Exception:
         v = 1
     return max(1, min(3, v))
@@ -34,27 +35,19 @@ def add_vocab_item(
     if not term_en or not definition_en or not definition_ar:
         return
 
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO vocab_items (
-                course_id, term_en, term_ar, definition_en, definition_ar,
-                example_en, difficulty, category
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                course_id,
-                term_en,
-                term_ar,
-                definition_en,
-                definition_ar,
-                example_en,
-                difficulty,
-                category,
-            ),
-        )
+    invalidate()
+    get_storage().add_vocab_item(
+        course_id,
+        {
+            "term_en": term_en,
+            "term_ar": term_ar,
+            "definition_en": definition_en,
+            "definition_ar": definition_ar,
+            "example_en": example_en,
+            "difficulty": difficulty,
+            "category": category,
+        },
+    )
 
 def update_vocab_item(
     item_id: int,
@@ -65,7 +58,13 @@ def update_vocab_item(
     example_en: str = "",
     difficulty: int = 1,
     category: str = "",
+    shared: bool = True,
 ) -> bool:
+    """
+    Update a vocabulary item. Terms are shared between courses: by default the
+    change applies to every course using the term; shared=False keeps it as
+    an override for this item's course only.
+    """
     term_en = (term_en or "").strip()
     term_ar = (term_ar or "").strip()
     definition_en = (definition_en or "").strip()
@@ -77,45 +76,58 @@ def update_vocab_item(
     if not term_en or not definition_en or not definition_ar:
         return False
 
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            UPDATE vocab_items
-            SET term_en = ?, term_ar = ?, definition_en = ?, definition_ar = ?,
-                example_en = ?, difficulty = ?, category = ?
-            WHERE id = ?
-            """,
-            (
-                term_en,
-                term_ar,
-                definition_en,
-                definition_ar,
-                example_en,
-                difficulty,
-                category,
-                item_id,
-            ),
-        )
-        return cur.rowcount > 0
+    invalidate()
+    return get_storage().update_vocab_item(
+        item_id,
+        {
+            "term_en": term_en,
+            "term_ar": term_ar,
+            "definition_en": definition_en,
+            "definition_ar": definition_ar,
+            "example_en": example_en,
+            "difficulty": difficulty,
+            "category": category,
+        },
+        shared=shared,
+    )
 
 def delete_vocab_item(item_id: int) -> None:
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM vocab_items WHERE id = ?", (item_id,))
+    invalidate()
+    get_storage().delete_vocab_item(item_id)
+
+def get_vocab_for_course(course_id: int, order: str = "en") -> List[sqlite3.Row]:
+    """
+    A course's vocabulary in English ("en") or Arabic ("ar") alphabetical
+    order (case, diacritics and letter forms folded; see collation.py).
+    """
+    return list(
+        memoized(
+            ("vocab", course_id, order),
+            lambda: get_storage().get_vocab_for_course(course_id, order),
+        )
+    )
 
-def get_vocab_for_course(course_id: int) -> List[sqlite3.Row]:
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT * FROM vocab_items
-            WHERE course_id = ?
-            ORDER BY term_en
-            """,
-            (course_id,),
+def get_vocab_page(
+    course_id: int, order: str = "en", limit: int = 50, offset: int = 0
+) -> List[sqlite3.Row]:
+    """One page of get_vocab_for_course(), read in order from the sort-key index."""
+    limit = max(0, int(limit))
+    offset = max(0, int(offset))
+    return list(
+        memoized(
+            ("vocab_page", course_id, order, limit, offset),
+            lambda: get_storage().get_vocab_page(course_id, order, limit, offset),
         )
-        return cur.fetchall()
+    )
+
+def get_vocab_by_term(term_en: str) -> List[sqlite3.Row]:
+    """The term's rows in every course that uses it (case/spacing-insensitive)."""
+    term_en = (term_en or "").strip()
+    if not term_en:
+        return []
+    return list(
+        memoized(("vocab_by_term", term_en), lambda: get_storage().get_vocab_by_term(term_en))
+    )
 
 def filter_vocab(vocab_rows: List[sqlite3.Row], query: str) -> List[sqlite3.Row]:
     query = (query or "").strip().lower()
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.request
+import webbrowser
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from .config import get_app_dir
+
+# ---------------------------
+# Single-instance launcher for the packaged exe.
+# A lock file under get_app_dir() records the running server (pid, port);
+# the server holds an OS lock on it for as long as it runs.
+# A second launch that finds a healthy server only opens the browser;
+# it never imports Streamlit, so it costs no extra server memory.
+# ---------------------------
+
+LOCK_FILE_NAME = "server.lock"
+TIMING_LOG_NAME = "launcher.log"
+DEFAULT_PORT = 8501
+HEALTH_TIMEOUT_S = 0.5
+# How long a second launch waits for a running server that is not answering
+# before it starts a new one.
+STARTUP_GRACE_S = 90.0
+
+def _lock_path() -> Path:
+    return get_app_dir() / LOCK_FILE_NAME
+
+def server_url(port: int) -> str:
+    return f"http://localhost:{port}"
+
+def is_healthy(port: int, timeout: float = HEALTH_TIMEOUT_S) -> bool:
+    """True when a Streamlit server answers its health endpoint on `port`."""
+    try:
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{port}/_stcore/health", timeout=timeout
+        ) as resp:
+            return resp.status == 200
+    except (OSError, ValueError):
+        return False
+
+def read_instance() -> Optional[dict]:
+    try:
+        info = json.loads(_lock_path().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return info if isinstance(info, dict) and "port" in info else None
+
+# Descriptor of the lock file while this process owns the server.
+_lock_fd: Optional[int] = None
+# Windows locks byte ranges and a locked range cannot be read: lock one byte
+# far past the JSON so other launchers can still read it.
+_WIN_LOCK_OFFSET = 1 << 20
+
+def _lock_file(fd: int) -> bool:
+    """Non-blocking exclusive OS lock; the OS drops it when the owner exits."""
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+
+            os.lseek(fd, _WIN_LOCK_OFFSET, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+def _unlock_file(fd: int) -> None:
+    if sys.platform == "win32":
+        import msvcrt
+
+        os.lseek(fd, _WIN_LOCK_OFFSET, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    # flock locks go with the descriptor.
+
+def _is_lock_file(fd: int) -> bool:
+    """True if `fd` is still the file at the lock path (not replaced meanwhile)."""
+    try:
+        a, b = os.fstat(fd), os.stat(_lock_path())
+    except OSError:
+        return False
+    return (a.st_dev, a.st_ino) == (b.st_dev, b.st_ino)
+
+def _try_acquire_lock(port: int) -> bool:
+    """
+    Become the running server: OS-lock the lock file and record (pid, port)
+    in it. False while another live process holds the lock. A crashed
+    owner's lock is released by the OS, so a leftover file (even one whose
+    pid now belongs to an unrelated process) is simply taken over.
+    """
+    global _lock_fd
+    fd = os.open(_lock_path(), os.O_CREAT | os.O_RDWR)
+    if not _lock_file(fd) or not _is_lock_file(fd):
+        os.close(fd)
+        return False
+    data = json.dumps({"pid": os.getpid(), "port": port, "started_at": time.time()})
+    os.ftruncate(fd, 0)
+    os.lseek(fd, 0, os.SEEK_SET)
+    os.write(fd, data.encode("utf-8"))
+    _lock_fd = fd
+    return True
+
+def _take_over(info: dict) -> bool:
+    """
+    Remove the lock file of a live server that never became healthy, so the
+    next _try_acquire_lock() gets a fresh file. False if that is not possible
+    (Windows keeps a file open by another process from being deleted).
+    """
+    if read_instance() != info:
+        # Another launcher already took over; attach to its server instead.
+        return True
+    try:
+        _lock_path().unlink()
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        return False
+    return True
+
+def release_lock() -> None:
+    global _lock_fd
+    if _lock_fd is None:
+        return
+    fd, _lock_fd = _lock_fd, None
+    owned = _is_lock_file(fd)
+    try:
+        if owned and sys.platform != "win32":
+            # Removed while still locked, so no other launcher holds it yet.
+            _lock_path().unlink(missing_ok=True)
+        _unlock_file(fd)
+    finally:
+        os.close(fd)
+    if owned and sys.platform == "win32":
+        # Windows cannot delete a file that is still open.
+        try:
+            _lock_path().unlink(missing_ok=True)
+        except OSError:
+            pass
+
+def find_free_port(start: int = DEFAULT_PORT, attempts: int = 50) -> int:
+    for port in range(start, start + attempts):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            try:
+                s.bind(("127.0.0.1", port))
+            except OSError:
+                continue
+            return port
+    raise RuntimeError(f"No free port between {start} and {start + attempts - 1}")
+
+def log_startup(kind: str, seconds: float, port: int) -> None:
+    """Print and append the cold/warm start time to launcher.log (JSON lines)."""
+    print(f"{kind.capitalize()} start: {server_url(port)} ready in {seconds:.2f} s")
+    entry = {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "kind": kind,
+        "seconds": round(seconds, 3),
+        "port": port,
+    }
+    try:
+        with open(get_app_dir() / TIMING_LOG_NAME, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError:
+        pass
+
+def _open_when_ready(port: int, started: float, kind: str, timeout: float = STARTUP_GRACE_S) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if is_healthy(port):
+            log_startup(kind, time.perf_counter() - started, port)
+            webbrowser.open(server_url(port))
+            return True
+        time.sleep(0.2)
+    return False
+
+def launch(start_server: Callable[[int], int], started: Optional[float] = None) -> int:
+    """
+    Open the running instance if there is one, otherwise start a server.
+    `start_server(port)` runs the server and blocks until it exits.
+    `started` is a perf_counter() taken as early as possible in the process.
+    """
+    started = time.perf_counter() if started is None else started
+
+    for _ in range(3):
+        port = find_free_port()
+        if _try_acquire_lock(port):
+            break
+        info = read_instance()
+        if info is None:
+            # The owner is still writing the lock file.
+            time.sleep(0.2)
+            continue
+        port = int(info["port"])
+        if is_healthy(port):
+            log_startup("warm", time.perf_counter() - started, port)
+            webbrowser.open(server_url(port))
+            return 0
+        # Launched again while the first server is starting or busy.
+        if _open_when_ready(port, started, "warm"):
+            return 0
+        print(
+            f"The running server ({server_url(port)}) did not answer within "
+            f"{STARTUP_GRACE_S:.0f} s; starting a new one."
+        )
+        if not _take_over(info):
+            print("Its lock file is still in use; opening the running server instead.")
+            webbrowser.open(server_url(port))
+            return 0
+    else:
+        print("Could not start or find a running FIT Vocabulary Hub server.")
+        return 1
+
+    threading.Thread(
+        target=_open_when_ready, args=(port, started, "cold"), daemon=True
+    ).start()
+    try:
+        return start_server(port)
+    finally:
+        release_lock()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from ..db.courses_repo import get_courses
+from ..db.storage import get_storage
+from ..db.vocab_repo import filter_vocab, get_vocab_for_course
+from .quiz import build_quiz_questions
+
+def _time_ms(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+def run_benchmark(repeat: int = 20, query: str = "a") -> Dict:
+    """
+    Time the read paths a student rerun goes through, per course.
+    Read-only: safe to run against the live database.
+    """
+    courses = get_courses()
+    result: Dict = {
+        "backend": get_storage().name,
+        "repeat": repeat,
+        "get_courses": _time_ms(get_courses, repeat),
+        "courses": [],
+    }
+    for course in courses:
+        vocab = get_vocab_for_course(course["id"])
+        result["courses"].append(
+            {
+                "course": course["name"],
+                "terms": len(vocab),
+                "get_vocab_for_course": _time_ms(
+                    lambda: get_vocab_for_course(course["id"]), repeat
+                ),
+                "filter_vocab": _time_ms(lambda: filter_vocab(vocab, query), repeat),
+                "build_quiz_questions": _time_ms(
+                    lambda: build_quiz_questions(vocab), max(1, repeat // 5)
+                ),
+            }
+        )
+    return result
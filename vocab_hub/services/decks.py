@@ -0,0 +1,402 @@
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from ..config import get_deck_dir
+from ..db.changes_repo import get_course_revision
+from ..db.storage import get_sql_db_path, get_storage, on_storage_closed
+from ..db.vocab_repo import get_vocab_for_course
+from .exam_papers import ExamTables, build_exam_tables, exam_texts
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Per-course deck files: a course's vocabulary in both sort orders, its
+# search text and its exam sampling tables, in one file that is memory-mapped
+# and used in place (no parsing of rows at load time).
+# File name: course-<id>-r<course revision>.deck, so a course edit simply
+# makes the next request build a new file; old ones are removed.
+#
+# Layout: MAGIC | uint32 header length | JSON header | arrays, each at a
+# 64-byte aligned offset (relative to the end of the header) given in the
+# header as [dtype, shape, offset]. Text columns are UTF-8 blobs plus
+# int64 row offsets.
+# ---------------------------
+
+_MAGIC = b"FVDECK1\n"
+_ALIGN = 64
+_FILE_RE = re.compile(r"^course-(\d+)-r(\d+)\.deck$")
+
+TEXT_FIELDS = ("term_en", "term_ar", "definition_en", "definition_ar", "example_en", "category")
+ROW_KEYS = ("id", "course_id", *TEXT_FIELDS, "difficulty")
+# Fields matched by the student search (as in vocab_repo.filter_vocab).
+SEARCH_FIELDS = ("term_en", "term_ar", "definition_en", "definition_ar")
+# Seed of the exam tables stored in the deck (other seeds are built on demand).
+DECK_EXAM_SEED = 0
+
+Buffer = Union[bytes, mmap.mmap]
+
+def normalize_query(query: str) -> str:
+    return (query or "").strip().lower()
+
+def _align(pos: int) -> int:
+    return (pos + _ALIGN - 1) // _ALIGN * _ALIGN
+
+def _text_column(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+class DeckRow(Mapping):
+    """One vocabulary row of a deck; fields are decoded when accessed."""
+
+    __slots__ = ("_deck", "_index")
+
+    def __init__(self, deck: "Deck", index: int) -> None:
+        self._deck = deck
+        self._index = index
+
+    def __getitem__(self, key: str):
+        return self._deck.value(key, self._index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(ROW_KEYS)
+
+    def __len__(self) -> int:
+        return len(ROW_KEYS)
+
+class Deck:
+    """A course's vocabulary at one revision, backed by a read-only buffer."""
+
+    def __init__(self, buffer: Buffer) -> None:
+        if buffer[:len(_MAGIC)] != _MAGIC:
+            raise ValueError("Not a deck file")
+        (header_len,) = struct.unpack_from("<I", buffer, len(_MAGIC))
+        start = len(_MAGIC) + 4
+        header = json.loads(bytes(buffer[start:start + header_len]))
+        base = _align(start + header_len)
+
+        self._buffer = buffer
+        self.course_id: int = header["course_id"]
+        self.revision: int = header["revision"]
+        self.count: int = header["count"]
+        self.exam_seed: int = header["exam_seed"]
+        self._offsets: Dict[str, int] = {}
+        self._arrays: Dict[str, np.ndarray] = {}
+        for name, (dtype, shape, offset) in header["arrays"].items():
+            size = int(np.prod(shape))
+            if size:
+                arr = np.frombuffer(buffer, dtype=np.dtype(dtype), count=size, offset=base + offset)
+            else:
+                arr = np.empty(0, dtype=np.dtype(dtype))
+            self._arrays[name] = arr.reshape(shape)
+            self._offsets[name] = base + offset
+        self._rows: Dict[str, List[DeckRow]] = {}
+
+    # ---- building ----
+    @staticmethod
+    def serialize(course_id: int, revision: int, vocab: List) -> bytes:
+        """Deck bytes for `vocab` (rows of get_vocab_for_course(course_id, "en"))."""
+        n = len(vocab)
+        arrays: Dict[str, np.ndarray] = {
+            "ids": np.array([w["id"] for w in vocab], dtype=np.int64),
+            "difficulty": np.array([int(w["difficulty"] or 1) for w in vocab], dtype=np.int8),
+            "order_ar": np.array(
+                sorted(range(n), key=lambda i: (vocab[i]["sort_ar"], vocab[i]["id"])),
+                dtype=np.int64,
+            ),
+        }
+        for field in TEXT_FIELDS:
+            arrays[f"{field}.data"], arrays[f"{field}.offsets"] = _text_column(
+                [str(w[field] or "") for w in vocab]
+            )
+        # Lower-cased search fields, NUL-separated so no match spans two
+        # fields or rows.
+        arrays["search.data"], arrays["search.offsets"] = _text_column(
+            [
+                "\0".join(str(w[f] or "").lower() for f in SEARCH_FIELDS) + "\0"
+                for w in vocab
+            ]
+        )
+        if n:
+            tables = build_exam_tables(vocab, seed=DECK_EXAM_SEED)
+            arrays["exam.strata"] = tables.strata
+            arrays["exam.quota_weights"] = tables.quota_weights
+            arrays["exam.pool"] = tables.pool
+
+        layout = {}
+        chunks = []
+        pos = 0
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            pos = _align(pos)
+            layout[name] = [arr.dtype.str, list(arr.shape), pos]
+            chunks.append((pos, arr.tobytes()))
+            pos += arr.nbytes
+        header = json.dumps(
+            {
+                "course_id": course_id,
+                "revision": revision,
+                "count": n,
+                "exam_seed": DECK_EXAM_SEED,
+                "arrays": layout,
+            }
+        ).encode("utf-8")
+        start = len(_MAGIC) + 4
+        base = _align(start + len(header))
+        out = bytearray(base + pos)
+        out[:len(_MAGIC)] = _MAGIC
+        struct.pack_into("<I", out, len(_MAGIC), len(header))
+        out[start:start + len(header)] = header
+        for offset, data in chunks:
+            out[base + offset:base + offset + len(data)] = data
+        return bytes(out)
+
+    @classmethod
+    def open(cls, path: Path) -> "Deck":
+        """Map a deck file read-only; pages are loaded by the OS on first use."""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    # ---- reading ----
+    def value(self, key: str, index: int):
+        if key == "id":
+            return int(self._arrays["ids"][index])
+        if key == "course_id":
+            return self.course_id
+        if key == "difficulty":
+            return int(self._arrays["difficulty"][index])
+        if key in TEXT_FIELDS:
+            offsets = self._arrays[f"{key}.offsets"]
+            start = self._offsets[f"{key}.data"]
+            return self._buffer[start + offsets[index]:start + offsets[index + 1]].decode("utf-8")
+        raise KeyError(key)
+
+    def _order(self, order: str) -> np.ndarray:
+        if order == "ar":
+            return self._arrays["order_ar"]
+        if order == "en":
+            return np.arange(self.count)
+        raise ValueError(f"Unknown vocabulary order: {order!r}")
+
+    def rows(self, order: str = "en") -> List[DeckRow]:
+        """All rows in English ("en") or Arabic ("ar") alphabetical order."""
+        if order not in self._rows:
+            self._rows[order] = [DeckRow(self, int(i)) for i in self._order(order)]
+        return list(self._rows[order])
+
+    def _search_indices(self, needle: bytes) -> np.ndarray:
+        offsets = self._arrays["search.offsets"]
+        base = self._offsets["search.data"]
+        pos, end = base, base + int(offsets[-1])
+        hits = []
+        while True:
+            found = self._buffer.find(needle, pos, end)
+            if found < 0:
+                break
+            row = int(np.searchsorted(offsets, found - base, side="right")) - 1
+            hits.append(row)
+            pos = base + int(offsets[row + 1])
+        return np.array(hits, dtype=np.int64)
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Vocab ids in English order."""
+        return self._arrays["ids"]
+
+    def match(self, query: str, within: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Indices (English order) of the rows where any search field contains
+        `query`, a non-empty normalize_query() result. With `within`, only
+        those rows are checked, e.g. the matches of a shorter query that
+        `query` contains.
+        """
+        if "\0" in query:
+            # The field separator; no field text contains it.
+            return np.empty(0, dtype=np.int64)
+        needle = query.encode("utf-8")
+        if within is None:
+            return self._search_indices(needle)
+        offsets = self._arrays["search.offsets"]
+        base = self._offsets["search.data"]
+        keep = [
+            i for i in within.tolist()
+            if self._buffer.find(needle, base + int(offsets[i]), base + int(offsets[i + 1])) >= 0
+        ]
+        return np.array(keep, dtype=np.int64)
+
+    def select(self, indices: np.ndarray, order: str = "en") -> List[DeckRow]:
+        """Rows at English-order `indices` (ascending), listed in `order`."""
+        if order != "en":
+            ordered = self._order(order)
+            indices = ordered[np.isin(ordered, indices)]
+        return [DeckRow(self, int(i)) for i in indices]
+
+    def search(self, query: str, order: str = "en") -> List[DeckRow]:
+        """
+        Rows where any search field contains `query` (case-insensitive), the
+        same matches as vocab_repo.filter_vocab, found with a scan of the
+        mapped search text instead of per-row string checks.
+        """
+        query = normalize_query(query)
+        if not query:
+            return self.rows(order)
+        return self.select(self.match(query), order)
+
+    def exam_tables(self, seed: int = DECK_EXAM_SEED) -> ExamTables:
+        """Exam sampling tables; the stored ones when `seed` matches the deck's."""
+        rows = self.rows()
+        if seed != self.exam_seed or not self.count:
+            return build_exam_tables(rows, seed=seed)
+        terms, prompts = exam_texts(rows)
+        return ExamTables(
+            vocab_ids=self._arrays["ids"],
+            terms=terms,
+            prompts=prompts,
+            strata=self._arrays["exam.strata"],
+            quota_weights=self._arrays["exam.quota_weights"],
+            pool=self._arrays["exam.pool"],
+            seed=seed,
+        )
+
+# ---------------------------
+# Process-wide deck cache
+# ---------------------------
+
+# (database file, course id) -> newest deck seen by this process.
+_decks: Dict[Tuple[str, int], Deck] = {}
+_decks_lock = threading.Lock()
+_warmed: Set[str] = set()
+
+def _forget_tenant(db_path: Path) -> None:
+    """Unmap a closed tenant's decks (a deck still in use stays valid until released)."""
+    source = str(db_path)
+    with _decks_lock:
+        for key in [k for k in _decks if k[0] == source]:
+            del _decks[key]
+        _warmed.discard(source)
+
+on_storage_closed(_forget_tenant)
+
+def _source() -> str:
+    """Cache key of the current tenant's data."""
+    db_path = get_sql_db_path()
+    return str(db_path) if db_path is not None else f"memory:{id(get_storage())}"
+
+def _deck_path(course_id: int, revision: int) -> Path:
+    return get_deck_dir() / f"course-{course_id}-r{revision}.deck"
+
+def _remove_old_decks(course_id: int, keep_revision: int) -> None:
+    for path in get_deck_dir().glob(f"course-{course_id}-r*.deck"):
+        match = _FILE_RE.match(path.name)
+        if match and int(match.group(2)) < keep_revision:
+            try:
+                path.unlink()
+            except OSError:
+                # Still mapped by a process on Windows; removed on a later build.
+                pass
+
+def _build_deck_file(course_id: int, revision: int) -> Deck:
+    # Rows are read after the revision, so a concurrent edit only makes
+    # this deck look older than it is (and get rebuilt).
+    data = Deck.serialize(course_id, revision, get_vocab_for_course(course_id, "en"))
+    path = _deck_path(course_id, revision)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    _remove_old_decks(course_id, revision)
+    return Deck.open(path)
+
+def get_deck(course_id: int) -> Deck:
+    """
+    The course's deck at its current revision: from this process's cache,
+    else from the deck file, else built from the database and saved.
+    Without a database file (pure-Python storage) the deck is kept in memory.
+    """
+    revision = get_course_revision(course_id)
+    db_path = get_sql_db_path()
+    key = (_source(), course_id)
+    with _decks_lock:
+        deck = _decks.get(key)
+    if deck is not None and deck.revision == revision:
+        return deck
+
+    deck = None
+    if db_path is None:
+        deck = Deck(Deck.serialize(course_id, revision, get_vocab_for_course(course_id, "en")))
+    else:
+        path = _deck_path(course_id, revision)
+        if path.exists():
+            try:
+                deck = Deck.open(path)
+            except (OSError, ValueError) as exc:
+                logger.warning("Rebuilding unreadable deck %s: %s", path.name, exc)
+        if deck is None:
+            deck = _build_deck_file(course_id, revision)
+    with _decks_lock:
+        _decks[key] = deck
+    return deck
+
+def clear_decks() -> None:
+    """
+    Forget this tenant's decks, in memory and on disk (after a restore, when
+    revision numbers no longer identify the data they were built from).
+    """
+    source = _source()
+    with _decks_lock:
+        for key in [k for k in _decks if k[0] == source]:
+            del _decks[key]
+    for path in get_deck_dir().glob("course-*.deck"):
+        try:
+            path.unlink()
+        except OSError:
+            # Still mapped by a process on Windows; never used again.
+            pass
+
+def warm_decks() -> int:
+    """
+    Map the newest deck file of every course of the current tenant, once per
+    process, so the first request of each course reads no vocabulary from
+    the database. Revisions are checked on use (get_deck).
+    Returns the number of decks mapped.
+    """
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return 0
+    with _decks_lock:
+        if str(db_path) in _warmed:
+            return 0
+        _warmed.add(str(db_path))
+
+    newest: Dict[int, Tuple[int, Path]] = {}
+    for path in get_deck_dir().glob("course-*.deck"):
+        match = _FILE_RE.match(path.name)
+        if not match:
+            continue
+        course_id, revision = int(match.group(1)), int(match.group(2))
+        if revision > newest.get(course_id, (-1, path))[0]:
+            newest[course_id] = (revision, path)
+
+    mapped = 0
+    for course_id, (_, path) in newest.items():
+        try:
+            deck = Deck.open(path)
+        except (OSError, ValueError) as exc:
+            logger.warning("Skipping unreadable deck %s: %s", path.name, exc)
+            continue
+        with _decks_lock:
+            _decks.setdefault((str(db_path), course_id), deck)
+        mapped += 1
+    return mapped
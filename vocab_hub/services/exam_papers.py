@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import csv
+import io
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+OPTIONS_PER_QUESTION = 4
+# Candidate distractors kept per term; each variant samples 3 of them.
+DISTRACTOR_POOL_SIZE = 24
+
+@dataclass
+class ExamTables:
+    """
+    Per-course sampling tables, built once and shared by all variants.
+    Index i refers to the i-th vocabulary row passed to build_exam_tables().
+    """
+    vocab_ids: np.ndarray        # (n,) vocab_items.id
+    terms: List[str]             # answer text (term_en)
+    prompts: List[str]           # question text (term_ar, or definition_en)
+    strata: np.ndarray           # (n,) category x difficulty bucket
+    quota_weights: np.ndarray    # (n_strata,) items per stratum
+    pool: np.ndarray             # (n, K) distractor indices, -1 = none
+    seed: int
+
+@dataclass
+class ExamBatch:
+    """
+    Flat table of generated questions (one row per question, all variants).
+    `options` holds indices into ExamTables; answers[i] is the column of the
+    correct option in options[i].
+    """
+    tables: ExamTables
+    base_seed: int
+    variant: np.ndarray          # (rows,) 1-based variant number
+    position: np.ndarray         # (rows,) 1-based question number
+    item: np.ndarray             # (rows,) index of the asked term
+    options: np.ndarray          # (rows, 4) option indices, -1 = empty
+    answers: np.ndarray          # (rows,) 0-based correct column
+
+    @property
+    def n_variants(self) -> int:
+        return int(self.variant.max()) if len(self.variant) else 0
+
+def _circular_windows(members: np.ndarray, width: int) -> np.ndarray:
+    """For each member, the next `width` members in a circular order."""
+    m = len(members)
+    offsets = (np.arange(m)[:, None] + np.arange(1, width + 1)[None, :]) % m
+    return members[offsets]
+
+def exam_texts(vocab: Sequence) -> Tuple[List[str], List[str]]:
+    """Answer texts (term_en) and question texts (term_ar, else definition_en)."""
+    terms = [str(w["term_en"] or "") for w in vocab]
+    prompts = [str(w["term_ar"] or "") or str(w["definition_en"] or "") for w in vocab]
+    return terms, prompts
+
+def build_exam_tables(vocab: Sequence, seed: int = 0, pool_size: int = DISTRACTOR_POOL_SIZE) -> ExamTables:
+    """
+    Build the distractor-sampling tables for a course.
+    Distractors come from the same category first (in a random circular order
+    fixed by `seed`), then from the rest of the course; terms with the same
+    English text as the answer are never used as distractors.
+    """
+    n = len(vocab)
+    rng = np.random.default_rng([seed, 0])
+
+    terms, prompts = exam_texts(vocab)
+    _, term_codes = np.unique([t.casefold() for t in terms], return_inverse=True)
+    _, category_codes = np.unique(
+        [str(w["category"] or "").casefold() for w in vocab], return_inverse=True
+    )
+    difficulty = np.clip(np.array([int(w["difficulty"] or 1) for w in vocab]), 1, 3) - 1
+    strata_raw = category_codes * 3 + difficulty
+    _, strata = np.unique(strata_raw, return_inverse=True)
+
+    pool = np.full((n, pool_size), -1, dtype=np.int64)
+    if n > 1:
+        width = min(pool_size, n - 1)
+        # Same-category candidates.
+        for code in np.unique(category_codes):
+            members = rng.permutation(np.flatnonzero(category_codes == code))
+            if len(members) > 1:
+                w = min(width, len(members) - 1)
+                pool[members, :w] = _circular_windows(members, w)
+        # Fill the remaining slots from the whole course.
+        everyone = rng.permutation(n)
+        fallback = np.empty((n, width), dtype=np.int64)
+        fallback[everyone] = _circular_windows(everyone, width)
+        for i in np.flatnonzero((pool == -1).any(axis=1)):
+            have = pool[i][pool[i] >= 0]
+            extra = fallback[i][~np.isin(fallback[i], have)]
+            merged = np.concatenate([have, extra])[:pool_size]
+            pool[i, :len(merged)] = merged
+
+        # Never offer a distractor whose text equals the answer.
+        valid = pool >= 0
+        same_text = np.zeros_like(valid)
+        same_text[valid] = term_codes[pool[valid]] == np.repeat(term_codes, valid.sum(axis=1))
+        pool[same_text] = -1
+
+    return ExamTables(
+        vocab_ids=np.array([w["id"] for w in vocab], dtype=np.int64),
+        terms=terms,
+        prompts=prompts,
+        strata=strata.astype(np.int64),
+        quota_weights=np.bincount(strata, minlength=int(strata.max()) + 1 if n else 0),
+        pool=pool,
+        seed=seed,
+    )
+
+def _stratum_quotas(weights: np.ndarray, questions: int) -> np.ndarray:
+    """Largest-remainder split of `questions` proportional to stratum sizes."""
+    total = int(weights.sum())
+    questions = min(questions, total)
+    exact = weights * questions / total
+    quotas = np.floor(exact).astype(np.int64)
+    remainder = questions - int(quotas.sum())
+    if remainder:
+        order = np.argsort(-(exact - quotas), kind="stable")
+        quotas[order[:remainder]] += 1
+    return quotas
+
+# Variants generated per block of arrays (bounds memory for large batches).
+VARIANT_BLOCK = 256
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer (uint64 arrays wrap around silently)."""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def _uniforms(base_seed: int, variants: np.ndarray, stream: int, count: int) -> np.ndarray:
+    """
+    (len(variants), count) uniforms in [0, 1). Counter-based: entry [v, i]
+    depends only on (base_seed, variants[v], stream, i), so all variants are
+    drawn as one array and each is still reproducible on its own.
+    """
+    seed = np.array([base_seed & _MASK64], dtype=np.uint64)
+    key = _mix64(_mix64(seed + _GOLDEN) ^ variants.astype(np.uint64))
+    key = _mix64(key ^ np.uint64(stream))
+    counters = np.arange(1, count + 1, dtype=np.uint64) * _GOLDEN
+    bits = _mix64(key[:, None] + counters[None, :])
+    return (bits >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+def generate_variants(tables: ExamTables, variants: np.ndarray, quotas: np.ndarray, base_seed: int):
+    """
+    Several variants at once; each is fully determined by
+    (base_seed, variant number) and the tables.
+    Returns (items, options, answers) of shapes (v, q), (v, q, 4), (v, q).
+    Questions with fewer than three distractors keep their options in the
+    first columns and leave the last ones empty (-1).
+    """
+    n = len(tables.vocab_ids)
+    v = len(variants)
+    q = int(quotas.sum()) if n else 0
+    if not v or not q:
+        empty = np.empty((v, 0), dtype=np.int64)
+        return empty, np.empty((v, 0, OPTIONS_PER_QUESTION), dtype=np.int64), empty
+
+    # Balanced selection: the same number of questions per category x
+    # difficulty stratum in every variant, random members within it.
+    # Keys < 1 keep the order stratum-major.
+    order = np.argsort(tables.strata + _uniforms(base_seed, variants, 0, n), axis=1)
+    sorted_strata = tables.strata[order]
+    starts = np.searchsorted(np.sort(tables.strata), np.arange(len(quotas)))
+    rank = np.arange(n)[None, :] - starts[sorted_strata]
+    chosen = order[rank < quotas[sorted_strata]].reshape(v, q)
+    shuffle = np.argsort(_uniforms(base_seed, variants, 1, q), axis=1)
+    items = np.take_along_axis(chosen, shuffle, axis=1)
+
+    # Three distractors per question from the precomputed pools, valid
+    # ones first.
+    pools = tables.pool[items]
+    scores = _uniforms(base_seed, variants, 2, q * pools.shape[2]).reshape(pools.shape)
+    scores[pools < 0] = -1.0
+    picked = np.argsort(-scores, axis=2)[:, :, : OPTIONS_PER_QUESTION - 1]
+    distractors = np.take_along_axis(pools, picked, axis=2)
+
+    # Put the correct answer in a random column among the filled ones.
+    filled = (distractors >= 0).sum(axis=2) + 1
+    answers = (_uniforms(base_seed, variants, 3, q) * filled).astype(np.int64)
+    cols = np.arange(OPTIONS_PER_QUESTION)[None, None, :]
+    # Columns after the answer shift one distractor to the right, so the
+    # empty ones stay last.
+    source = np.clip(cols - (cols > answers[:, :, None]), 0, OPTIONS_PER_QUESTION - 2)
+    options = np.take_along_axis(distractors, source, axis=2)
+    np.put_along_axis(options, answers[:, :, None], items[:, :, None], axis=2)
+    return items, options, answers
+
+def generate_exam_batch(
+    tables: ExamTables,
+    n_variants: int,
+    questions_per_variant: int,
+    base_seed: int,
+    variant_numbers: Optional[Sequence[int]] = None,
+) -> ExamBatch:
+    """
+    Generate many variants at once. Variant k is identical whenever it is
+    generated with the same seed and tables, whatever `n_variants` is, so a
+    single lost paper can be regenerated with variant_numbers=[k].
+    """
+    numbers = np.array(
+        list(variant_numbers) if variant_numbers is not None else range(1, n_variants + 1),
+        dtype=np.int64,
+    )
+    quotas = _stratum_quotas(tables.quota_weights, questions_per_variant) if len(tables.vocab_ids) else np.array([], dtype=np.int64)
+
+    item_parts, option_parts, answer_parts = [], [], []
+    for start in range(0, len(numbers), VARIANT_BLOCK):
+        items, options, answers = generate_variants(
+            tables, numbers[start:start + VARIANT_BLOCK], quotas, base_seed
+        )
+        item_parts.append(items)
+        option_parts.append(options)
+        answer_parts.append(answers)
+
+    q = item_parts[0].shape[1] if item_parts else 0
+    items = np.concatenate(item_parts) if item_parts else np.empty((0, 0), dtype=np.int64)
+    return ExamBatch(
+        tables=tables,
+        base_seed=base_seed,
+        variant=np.repeat(numbers, q),
+        position=np.tile(np.arange(1, q + 1, dtype=np.int64), len(numbers)),
+        item=items.reshape(-1),
+        options=(
+            np.concatenate(option_parts).reshape(-1, OPTIONS_PER_QUESTION)
+            if option_parts
+            else np.empty((0, OPTIONS_PER_QUESTION), dtype=np.int64)
+        ),
+        answers=(np.concatenate(answer_parts) if answer_parts else items).reshape(-1),
+    )
+
+def exam_batch_to_csv(batch: ExamBatch) -> str:
+    """
+    One row per question with the option texts and the answer letter,
+    ready to mail-merge into papers; the answer key is the 'answer' column.
+    """
+    letters = "ABCD"
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(
+        ["variant", "question", "vocab_id", "prompt", "option_a", "option_b",
+         "option_c", "option_d", "answer"]
+    )
+    t = batch.tables
+    for row in range(len(batch.item)):
+        item = batch.item[row]
+        writer.writerow(
+            [
+                int(batch.variant[row]),
+                int(batch.position[row]),
+                int(t.vocab_ids[item]),
+                t.prompts[item],
+                *(t.terms[o] if o >= 0 else "" for o in batch.options[row]),
+                letters[batch.answers[row]],
+            ]
+        )
+    return out.getvalue()
+
+def save_exam_batch_npz(batch: ExamBatch, path) -> None:
+    """Compact binary copy (vocab ids instead of text) for archiving/regrading."""
+    ids = batch.tables.vocab_ids
+    option_ids = np.where(batch.options >= 0, ids[np.maximum(batch.options, 0)], -1)
+    np.savez_compressed(
+        path,
+        base_seed=batch.base_seed,
+        table_seed=batch.tables.seed,
+        variant=batch.variant,
+        position=batch.position,
+        vocab_id=ids[batch.item],
+        option_ids=option_ids,
+        answer=batch.answers,
+    )
@@ -1,24 +1,31 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Tuple
+from pathlib import Path
+from typing import Iterable, List
 
 import pandas as pd
 
-from ..db.courses_repo import get_courses_dict_name_to_id
+from ..db.changes_repo import maybe_compact_changes
+from ..db.courses_repo import add_course, get_courses_dict_name_to_id
 from ..db.vocab_repo import add_vocab_item, _normalize_difficulty
 
+IMPORT_SHEET_NAME = "vocabulary"
+IMPORT_EXTENSIONS = (".xlsx", ".xls", ".csv")
+
 @dataclass
 class ImportStats:
     imported_count: int = 0
     skipped_missing_course: int = 0
     skipped_missing_fields: int = 0
+    created_courses: int = 0
 
-def import_vocab_from_excel(df: pd.DataFrame) -> ImportStats:
+def import_vocab_from_excel(df: pd.DataFrame, create_missing_courses: bool = False) -> ImportStats:
     """
     Import vocabulary from a dataframe representing the 'vocabulary' sheet.
     Required columns: course_name, term_en, definition_en, definition_ar.
     Optional: term_ar, example_en, difficulty, category.
+    With `create_missing_courses`, unknown course names are added instead of skipped.
     """
     name_to_id = get_courses_dict_name_to_id()
     stats = ImportStats()
@@ -29,6 +36,11 @@ def import_vocab_from_excel(df: pd.DataFrame) -> ImportStats:
             continue
 
         course_id = name_to_id.get(course_name)
+        if not course_id and create_missing_courses:
+            course_id = add_course(course_name)
+            if course_id:
+                name_to_id[course_name] = course_id
+                stats.created_courses += 1
         if not course_id:
             stats.skipped_missing_course += 1
             continue
@@ -58,4 +70,35 @@ def import_vocab_from_excel(df: pd.DataFrame) -> ImportStats:
         )
         stats.imported_count += 1
 
+    # Bulk imports are the main source of change-log growth.
+    maybe_compact_changes()
     return stats
+
+def read_vocab_file(path: Path) -> pd.DataFrame:
+    """Read the 'vocabulary' sheet of an Excel file, or a CSV with the same columns."""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    else:
+        df = pd.read_excel(path, sheet_name=IMPORT_SHEET_NAME, dtype=str)
+    return df.fillna("")
+
+def find_import_files(paths: Iterable[Path], recursive: bool = False) -> List[Path]:
+    """Expand directories into the importable files they contain (sorted)."""
+    files: List[Path] = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            pattern = "**/*" if recursive else "*"
+            files.extend(
+                sorted(
+                    p for p in path.glob(pattern)
+                    if p.is_file() and p.suffix.lower() in IMPORT_EXTENSIONS
+                    and not p.name.startswith("~$")  # Excel lock files
+                )
+            )
+        else:
+            files.append(path)
+    return files
+
+def import_vocab_from_file(path: Path, create_missing_courses: bool = False) -> ImportStats:
+    return import_vocab_from_excel(read_vocab_file(path), create_missing_courses)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..config import get_maintenance_interval_min, get_tenant, use_tenant
+from ..db.changes_repo import maybe_compact_changes
+from ..db.connection import get_connection
+from ..db.storage import get_sql_db_path, storage_lease
+from .media import prune_unused_media
+from .scheduler import start_periodic_task
+
+logger = logging.getLogger(__name__)
+
+# Free pages released per incremental_vacuum step; between steps the write
+# lock is released so app writes are never blocked for long.
+VACUUM_PAGES_PER_STEP = 256
+VACUUM_STEP_SLEEP_S = 0.01
+# Rows sampled per index by ANALYZE (keeps it fast on large tables).
+ANALYSIS_LIMIT = 1000
+_LAST_RUN_KEY = "maintenance_last_run"
+
+_maintenance_lock = threading.Lock()
+
+def get_db_stats(db_path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """
+    Size and fragmentation of the database file (None without a file):
+    free_pages are pages inside the file that hold no data.
+    """
+    db_path = db_path or get_sql_db_path()
+    if db_path is None or not Path(db_path).exists():
+        return None
+    with get_connection(db_path) as conn:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    wal = Path(f"{db_path}-wal")
+    return {
+        "file_bytes": Path(db_path).stat().st_size,
+        "wal_bytes": wal.stat().st_size if wal.exists() else 0,
+        "page_size": page_size,
+        "page_count": page_count,
+        "free_pages": free_pages,
+        "free_bytes": free_pages * page_size,
+        "auto_vacuum": {0: "none", 1: "full", 2: "incremental"}.get(auto_vacuum, str(auto_vacuum)),
+        "journal_mode": journal_mode,
+    }
+
+def _lower_thread_priority() -> None:
+    """Best effort: run the calling thread at a lower OS priority (Linux)."""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
+
+def _incremental_vacuum(conn: sqlite3.Connection) -> int:
+    freed = 0
+    while True:
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not free:
+            return freed
+        # execute() would step the pragma only once (one page); a script runs
+        # it to completion and commits.
+        conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP});")
+        after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if after >= free:
+            return freed
+        freed += free - after
+        time.sleep(VACUUM_STEP_SLEEP_S)
+
+def run_maintenance(vacuum: bool = True, check: bool = True) -> Dict[str, Any]:
+    """
+    One maintenance pass over the current database file:
+    quick_check, change-log compaction, unused media cleanup, planner
+    statistics (ANALYZE the first time, then PRAGMA optimize), incremental
+    vacuum and, in WAL mode, a checkpoint that truncates the WAL.
+    The report is stored in app_meta (see get_last_maintenance).
+    """
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return {"skipped": "the storage backend has no database file"}
+
+    with _maintenance_lock:
+        started = time.perf_counter()
+        before = get_db_stats(db_path)
+        report: Dict[str, Any] = {"started_at": datetime.now().isoformat(timespec="seconds")}
+
+        with get_connection(db_path) as conn:
+            if check:
+                report["quick_check"] = conn.execute("PRAGMA quick_check").fetchone()[0]
+
+        report["compacted_change_events"] = maybe_compact_changes()
+        report["pruned_media_files"] = prune_unused_media()
+
+        with get_connection(db_path) as conn:
+            analyzed = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone()
+            conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            conn.execute("PRAGMA optimize" if analyzed else "ANALYZE")
+            conn.commit()
+            report["statistics"] = "optimize" if analyzed else "analyze"
+
+            if vacuum and before["auto_vacuum"] == "incremental":
+                report["freed_pages"] = _incremental_vacuum(conn)
+            else:
+                report["freed_pages"] = 0
+
+            if before["journal_mode"] == "wal":
+                busy, log_frames, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+                report["wal_checkpoint"] = "busy" if busy else f"{log_frames} frames"
+
+        after = get_db_stats(db_path)
+        report["file_bytes_before"] = before["file_bytes"]
+        report["file_bytes_after"] = after["file_bytes"]
+        report["free_pages_after"] = after["free_pages"]
+        report["duration_s"] = round(time.perf_counter() - started, 3)
+
+        with get_connection(db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO app_meta (key, value) VALUES (?, ?)",
+                (_LAST_RUN_KEY, json.dumps(report)),
+            )
+        return report
+
+def get_last_maintenance() -> Optional[Dict[str, Any]]:
+    """Report of the last maintenance run on the current database, if any."""
+    db_path = get_sql_db_path()
+    if db_path is None:
+        return None
+    with get_connection(db_path) as conn:
+        row = conn.execute(
+            "SELECT value FROM app_meta WHERE key = ?", (_LAST_RUN_KEY,)
+        ).fetchone()
+    return json.loads(row["value"]) if row else None
+
+def start_maintenance_scheduler() -> bool:
+    """
+    Run maintenance every FIT_VOCAB_MAINTENANCE_INTERVAL_MIN minutes in a
+    low-priority background thread (one per tenant).
+    Returns True when the scheduler is running.
+    """
+    interval_min = get_maintenance_interval_min()
+    if not interval_min:
+        return False
+    tenant = get_tenant()
+
+    def _maintain_tenant() -> None:
+        _lower_thread_priority()
+        with use_tenant(tenant), storage_lease():
+            report = run_maintenance()
+        logger.info("Database maintenance (%s): %s", tenant or "default", report)
+
+    start_periodic_task(f"vocab-maintenance:{tenant}", _maintain_tenant, interval_min * 60)
+    return True
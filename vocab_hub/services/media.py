@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import mimetypes
+import mmap
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, Optional
+
+from ..config import MEDIA_MAX_BYTES, MEDIA_PRUNE_GRACE_S, get_media_dir
+from ..db.media_repo import (
+    attach_media,
+    delete_unreferenced_media_files,
+    get_unreferenced_media_files,
+)
+
+THUMBNAIL_MAX_PX = 360
+
+MEDIA_KINDS = ("image", "audio")
+
+class MediaError(ValueError):
+    """Raised when an uploaded file cannot be stored."""
+
+def _object_path(sha256: str) -> Path:
+    # Two-level fan-out keeps directories small with many files.
+    return get_media_dir() / "objects" / sha256[:2] / sha256
+
+def _thumbnail_path(sha256: str, max_px: int) -> Path:
+    return get_media_dir() / "thumbs" / sha256[:2] / f"{sha256}_{max_px}.png"
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Unique per thread: two script runs may write the same thumbnail at once.
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def guess_mime_type(filename: str, fallback: str = "application/octet-stream") -> str:
+    return mimetypes.guess_type(filename)[0] or fallback
+
+def store_media(vocab_id: int, data: bytes, filename: str, mime_type: str = "") -> Optional[int]:
+    """
+    Store an image/audio file for a vocabulary item.
+    Identical content is written once, whatever the file name or term.
+    Returns the media link id (None when storage has no database file).
+    """
+    mime_type = mime_type or guess_mime_type(filename)
+    kind = mime_type.split("/", 1)[0]
+    if kind not in MEDIA_KINDS:
+        raise MediaError(f"Only images and audio can be attached (got {mime_type}).")
+    if not data:
+        raise MediaError("The file is empty.")
+    if len(data) > MEDIA_MAX_BYTES:
+        raise MediaError(f"The file is larger than {MEDIA_MAX_BYTES // (1024 * 1024)} MB.")
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = _object_path(sha256)
+    try:
+        # Reused content counts as new for prune_unused_media's grace period.
+        os.utime(path)
+    except FileNotFoundError:
+        _write_atomic(path, data)
+    media_id = attach_media(vocab_id, sha256, mime_type, len(data), kind, filename)
+    if not path.exists():
+        # Pruned between the check and the link: the link is committed now,
+        # so the file stays once written again.
+        _write_atomic(path, data)
+    return media_id
+
+@contextmanager
+def open_media(sha256: str) -> Iterator[memoryview]:
+    """Memory-mapped, read-only view of a stored file (no extra copy)."""
+    with open(_object_path(sha256), "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                yield view
+            finally:
+                view.release()
+
+def read_media(sha256: str) -> bytes:
+    """File bytes for widgets that need a bytes object (st.image / st.audio)."""
+    with open_media(sha256) as view:
+        return view.tobytes()
+
+def _make_thumbnail(sha256: str, max_px: int) -> Optional[bytes]:
+    try:
+        from PIL import Image  # optional dependency
+    except ImportError:
+        return None
+    with open_media(sha256) as view:
+        with Image.open(io.BytesIO(view)) as img:
+            img.thumbnail((max_px, max_px))
+            out = io.BytesIO()
+            img.save(out, format="PNG", optimize=True)
+            return out.getvalue()
+
+@lru_cache(maxsize=128)
+def get_thumbnail(sha256: str, max_px: int = THUMBNAIL_MAX_PX) -> bytes:
+    """
+    Thumbnail of a stored image, generated once and cached on disk.
+    Content-addressed, so cached bytes can never go stale.
+    Without Pillow installed the original image is returned.
+    """
+    path = _thumbnail_path(sha256, max_px)
+    if not path.exists():
+        data = _make_thumbnail(sha256, max_px)
+        if data is None:
+            return read_media(sha256)
+        _write_atomic(path, data)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm[:]
+
+def _recently_written(sha256: str, grace_s: float) -> bool:
+    try:
+        return time.time() - _object_path(sha256).stat().st_mtime < grace_s
+    except FileNotFoundError:
+        return False
+
+def prune_unused_media(grace_s: float = MEDIA_PRUNE_GRACE_S) -> int:
+    """
+    Delete files (and thumbnails) no vocabulary item refers to anymore.
+    Files written or reused within `grace_s` seconds are kept until a later
+    run: store_media may be about to link them.
+    """
+    candidates = [
+        sha256 for sha256 in get_unreferenced_media_files()
+        if not _recently_written(sha256, grace_s)
+    ]
+    removed = 0
+    for sha256 in delete_unreferenced_media_files(candidates):
+        _object_path(sha256).unlink(missing_ok=True)
+        thumbs_dir = _thumbnail_path(sha256, THUMBNAIL_MAX_PX).parent
+        for thumb in thumbs_dir.glob(f"{sha256}_*.png"):
+            thumb.unlink(missing_ok=True)
+        removed += 1
+    return removed
@@ -1,40 +1,237 @@
 from __future__ import annotations
 
 import random
-from typing import Dict, List
+import threading
+from typing import Dict, List, Optional, Union
 
 import sqlite3
 
-def build_quiz_questions(vocab: List[sqlite3.Row]) -> List[Dict]:
+from ..db.changes_repo import get_course_revision
+from ..db.question_bank_repo import (
+    get_bank_revision,
+    get_changed_vocab_ids,
+    get_course_questions,
+    get_question,
+    get_question_weights,
+    get_questions,
+    get_stale_question_vocab_ids,
+    save_questions,
+)
+from ..db.storage import get_sql_db_path, term_key
+from ..db.vocab_repo import get_vocab_for_course
+
+# Question type -> (prompt field, answer field).
+QUESTION_TYPES = {
+    "ar_en": ("term_ar", "term_en"),
+    "en_ar": ("term_en", "term_ar"),
+    "def_term": ("definition_en", "term_en"),
+    "term_def": ("term_en", "definition_en"),
+}
+QUESTION_TYPE_LABELS = {
+    "ar_en": "Arabic → English",
+    "en_ar": "English → Arabic",
+    "def_term": "Definition → term",
+    "term_def": "Term → definition",
+}
+DISTRACTORS_PER_QUESTION = 3
+# Candidates tried per distractor tier, so picking stays O(1) per question
+# however large a category is.
+_CANDIDATES_PER_TIER = 16
+
+# A quiz is a list of ready question dicts (loaded from the bank, or built in
+# memory when the storage backend has no database file). Bank question ids
+# are still accepted (sessions started by older versions).
+QuizEntry = Union[int, Dict]
+
+def _weighted_order(vocab_ids: List[int], weights: Dict[int, float]) -> List[int]:
+    """
+    Random order of indices where heavier terms tend to come first
+    (weighted sampling without replacement, Efraimidis-Spirakis keys).
+    """
+    keyed = []
+    for idx, vocab_id in enumerate(vocab_ids):
+        weight = max(weights.get(vocab_id, 1.0), 1e-6)
+        keyed.append((random.random() ** (1.0 / weight), idx))
+    keyed.sort(reverse=True)
+    return [idx for _, idx in keyed]
+
+def _text(row: sqlite3.Row, field: str) -> str:
+    return str(row[field] or "").strip()
+
+def _distractor_tiers(vocab: List[sqlite3.Row]) -> Dict[tuple, List[int]]:
+    """Vocab indices grouped by category x difficulty, category, difficulty and all."""
+    tiers: Dict[tuple, List[int]] = {}
+    for idx, w in enumerate(vocab):
+        category = _text(w, "category").casefold()
+        difficulty = int(w["difficulty"] or 1)
+        for key in (("both", category, difficulty), ("category", category),
+                    ("difficulty", difficulty), ("all",)):
+            tiers.setdefault(key, []).append(idx)
+    return tiers
+
+def _pick_distractors(
+    vocab: List[sqlite3.Row],
+    idx: int,
+    answer_field: str,
+    tiers: Dict[tuple, List[int]],
+    rng: random.Random,
+) -> List[tuple]:
     """
-    Create a randomized multiple-choice question list.
-    Each question maps an Arabic term to the correct English term
-    with up to 3 distractors.
+    Up to 3 (vocab id, text) distractors for vocab[idx], taken from the same
+    category and difficulty first, then the same category, the same
+    difficulty and finally the whole course. Texts never repeat the answer.
     """
-    indices = list(range(len(vocab)))
-    random.shuffle(indices)
+    w = vocab[idx]
+    category = _text(w, "category").casefold()
+    difficulty = int(w["difficulty"] or 1)
+    seen = {term_key(_text(w, answer_field))}
+    picked: List[tuple] = []
+    for key in (("both", category, difficulty), ("category", category),
+                ("difficulty", difficulty), ("all",)):
+        members = tiers.get(key, [])
+        if len(members) <= _CANDIDATES_PER_TIER:
+            candidates = rng.sample(members, len(members))
+        else:
+            candidates = [rng.choice(members) for _ in range(_CANDIDATES_PER_TIER)]
+        for j in candidates:
+            text = _text(vocab[j], answer_field)
+            if j == idx or not text or term_key(text) in seen:
+                continue
+            seen.add(term_key(text))
+            picked.append((vocab[j]["id"], text))
+            if len(picked) == DISTRACTORS_PER_QUESTION:
+                return picked
+    return picked
 
+def _build_questions(
+    vocab: List[sqlite3.Row],
+    indices: List[int],
+    rng: random.Random,
+    qtypes=QUESTION_TYPES,
+) -> List[Dict]:
+    """Bank rows for vocab[indices]: one per type whose prompt and answer are set."""
+    tiers = _distractor_tiers(vocab)
     questions: List[Dict] = []
     for idx in indices:
         w = vocab[idx]
-        correct = w["term_en"]
-
-        others = [
-            v for j, v in enumerate(vocab)
-            if j != idx and v["term_en"] != correct
-        ]
-        random.shuffle(others)
-        distractors = [o["term_en"] for o in others[:3]]
-
-        opts = [correct] + distractors
-        random.shuffle(opts)
-
-        questions.append(
-            {
-                "word_idx": idx,
-                "options": opts,
-                "correct": correct,
-            }
-        )
-
+        for qtype in qtypes:
+            prompt_field, answer_field = QUESTION_TYPES[qtype]
+            prompt, answer = _text(w, prompt_field), _text(w, answer_field)
+            if not prompt or not answer:
+                continue
+            questions.append(
+                {
+                    "vocab_id": w["id"],
+                    "qtype": qtype,
+                    "prompt": prompt,
+                    "answer": answer,
+                    "distractors": _pick_distractors(vocab, idx, answer_field, tiers, rng),
+                }
+            )
     return questions
+
+def build_quiz_questions(
+    vocab: List[sqlite3.Row],
+    weights: Optional[Dict[int, float]] = None,
+    limit: Optional[int] = None,
+    qtype: Optional[str] = "ar_en",
+) -> List[Dict]:
+    """
+    Create a randomized multiple-choice question list in memory (used when
+    there is no question bank, e.g. with the pure-Python storage engine).
+    `qtype` None mixes the types at random.
+    `weights` (vocab id -> weight, default 1) moves hard terms toward the
+    front; `limit` keeps only the first questions of that order.
+    """
+    rng = random.Random()
+    qtypes = [qtype] if qtype else list(QUESTION_TYPES)
+    by_vocab: Dict[int, List[Dict]] = {}
+    for q in _build_questions(vocab, list(range(len(vocab))), rng, qtypes):
+        by_vocab.setdefault(q["vocab_id"], []).append(q)
+    choices = [rng.choice(qs) for qs in by_vocab.values()]
+
+    order = _weighted_order([q["vocab_id"] for q in choices], weights or {})
+    if limit is not None:
+        order = order[:limit]
+    return [dict(choices[i], id=None) for i in order]
+
+_refresh_lock = threading.Lock()
+
+def refresh_question_bank(course_id: int) -> int:
+    """
+    Bring a course's question bank up to its current revision.
+    Only items changed since the last build are regenerated, plus questions
+    that used one of them as a distractor or lost a distractor; the first
+    build (or a compacted change log) regenerates the whole course.
+    Returns the number of vocab items whose questions were rebuilt.
+    """
+    if get_sql_db_path() is None:
+        return 0
+    with _refresh_lock:
+        revision = get_course_revision(course_id)
+        built = get_bank_revision(course_id)
+        if built == revision:
+            return 0
+
+        vocab = get_vocab_for_course(course_id)
+        changed = None if built is None else get_changed_vocab_ids(course_id, built)
+        full = changed is None
+        if full:
+            indices = list(range(len(vocab)))
+        else:
+            rebuild = changed | get_stale_question_vocab_ids(
+                course_id, changed, min(DISTRACTORS_PER_QUESTION, len(vocab) - 1)
+            )
+            indices = [i for i, w in enumerate(vocab) if w["id"] in rebuild]
+
+        rebuilt_ids = {vocab[i]["id"] for i in indices}
+        questions = _build_questions(vocab, indices, random.Random())
+        save_questions(course_id, revision, questions, rebuilt_ids, full=full)
+        return len(indices)
+
+def start_quiz(
+    course_id: int, vocab: List[sqlite3.Row], qtype: Optional[str] = "ar_en"
+) -> List[QuizEntry]:
+    """
+    Question list for a new quiz over `vocab` (a course's items, possibly
+    filtered by a search): one question per item, hard terms first.
+    One indexed query picks the questions and one batched query loads them,
+    so answering them reads nothing more from the bank.
+    """
+    if get_sql_db_path() is None:
+        return build_quiz_questions(vocab, qtype=qtype)
+
+    refresh_question_bank(course_id)
+    rows = get_course_questions(course_id, qtype)
+    wanted = {w["id"] for w in vocab}
+    by_vocab: Dict[int, List[sqlite3.Row]] = {}
+    for row in rows:
+        if row["vocab_id"] in wanted:
+            by_vocab.setdefault(row["vocab_id"], []).append(row)
+    choices = [random.choice(qs) for qs in by_vocab.values()]
+
+    order = _weighted_order([row["vocab_id"] for row in choices], get_question_weights(rows))
+    ids = [choices[i]["id"] for i in order]
+    questions = get_questions(ids)
+    return [questions[qid] for qid in ids if qid in questions]
+
+def load_question(entry: QuizEntry, quiz_run_id: Optional[str] = None) -> Optional[Dict]:
+    """
+    Resolve a quiz entry into {"vocab_id", "qtype", "prompt", "answer",
+    "options", "option_ids"}. Options are shuffled with a seed derived from
+    the quiz run, so they keep their order across reruns.
+    None if the question was removed from the bank meanwhile.
+    """
+    q = entry if isinstance(entry, dict) else get_question(entry)
+    if q is None:
+        return None
+    option_pairs = [(q["vocab_id"], q["answer"]), *q["distractors"]]
+    random.Random(f"{quiz_run_id}:{q['vocab_id']}:{q['qtype']}").shuffle(option_pairs)
+    return {
+        "vocab_id": q["vocab_id"],
+        "qtype": q["qtype"],
+        "prompt": q["prompt"],
+        "answer": q["answer"],
+        "options": [text for _, text in option_pairs],
+        "option_ids": [vocab_id for vocab_id, _ in option_pairs],
+    }
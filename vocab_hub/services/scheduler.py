@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Streamlit re-executes the script on every rerun but keeps imported modules,
+# so this registry makes sure each background task is started only once.
+_TASKS: Dict[str, "PeriodicTask"] = {}
+_TASKS_LOCK = threading.Lock()
+
+class PeriodicTask:
+    """Run `func` every `interval_s` seconds in a daemon thread."""
+
+    def __init__(self, name: str, func: Callable[[], object], interval_s: float) -> None:
+        self.name = name
+        self.func = func
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.func()
+            except Exception:
+                # Keep the schedule alive; the next tick may succeed.
+                logger.exception("Background task %s failed", self.name)
+
+def start_periodic_task(name: str, func: Callable[[], object], interval_s: float) -> PeriodicTask:
+    """Start a named periodic task unless it is already running."""
+    with _TASKS_LOCK:
+        task = _TASKS.get(name)
+        if task is None or not task.alive:
+            task = PeriodicTask(name, func, interval_s)
+            _TASKS[name] = task
+            task.start()
+        return task
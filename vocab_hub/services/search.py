@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+from .decks import Deck, DeckRow, normalize_query
+
+# Shorter queries do not filter (one letter matches most of a course anyway).
+SEARCH_MIN_CHARS = 2
+# Previous queries whose matches a session keeps (for backspacing).
+SEARCH_CACHE_SIZE = 16
+
+def effective_query(query: str) -> str:
+    """The normalized query, or "" when it is too short to filter."""
+    query = normalize_query(query)
+    return query if len(query) >= SEARCH_MIN_CHARS else ""
+
+class IncrementalSearch:
+    """
+    Search state of one student session over one course deck.
+    Matches of recent queries are kept in a small LRU; a new query that
+    contains a cached one (typically the previous query plus a character)
+    only re-checks that query's matches instead of the whole course.
+    The cache is dropped when the deck changes (other course or revision).
+    """
+
+    def __init__(self, max_queries: int = SEARCH_CACHE_SIZE) -> None:
+        self._max_queries = max_queries
+        self._deck: Optional[Deck] = None
+        self._results: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.scans = 0
+        self.narrowed = 0
+
+    def _use_deck(self, deck: Deck) -> None:
+        if deck is not self._deck:
+            self._deck = deck
+            self._results.clear()
+
+    def match(self, deck: Deck, query: str) -> Optional[np.ndarray]:
+        """English-order row indices matching `query`; None = no filter (all rows)."""
+        self._use_deck(deck)
+        query = effective_query(query)
+        if not query:
+            return None
+        if query in self._results:
+            self._results.move_to_end(query)
+            return self._results[query]
+
+        # Rows matching `query` match every query it contains: start from
+        # the smallest such cached result.
+        within = None
+        for previous, indices in self._results.items():
+            if previous in query and (within is None or len(indices) < len(within)):
+                within = indices
+        if within is None:
+            self.scans += 1
+        else:
+            self.narrowed += 1
+        indices = deck.match(query, within)
+
+        self._results[query] = indices
+        while len(self._results) > self._max_queries:
+            self._results.popitem(last=False)
+        return indices
+
+    def rows(self, deck: Deck, query: str, order: str = "en") -> List[DeckRow]:
+        indices = self.match(deck, query)
+        return deck.rows(order) if indices is None else deck.select(indices, order)
+
+    def same_matches(self, deck: Deck, query_a: str, query_b: str) -> bool:
+        """True if both queries match the same rows (learning state can stay)."""
+        a, b = self.match(deck, query_a), self.match(deck, query_b)
+        if a is None or b is None:
+            return (a is None or len(a) == deck.count) and (b is None or len(b) == deck.count)
+        return np.array_equal(a, b)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import gzip
+import shutil
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+from ..config import get_db_path, get_snapshot_dir, get_snapshot_settings, get_tenant, use_tenant
+from ..db.connection import get_connection, init_db
+from ..db.sqlite_storage import get_log_head, restart_change_log
+from ..db.unit_of_work import invalidate
+from .decks import clear_decks
+from .scheduler import start_periodic_task
+
+# Pages copied per backup step; between steps SQLite releases its locks,
+# so app readers and writers are never blocked for long.
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP_S = 0.005
+
+SNAPSHOT_PREFIX = "vocab-"
+SNAPSHOT_SUFFIX = ".db.gz"
+
+# Manual and scheduled snapshots must not run concurrently.
+_snapshot_lock = threading.Lock()
+
+@dataclass
+class SnapshotInfo:
+    path: Path
+    created_at: datetime
+    size_bytes: int
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+def _online_copy(src: sqlite3.Connection, dst: sqlite3.Connection) -> None:
+    src.backup(dst, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP_S)
+
+def _parse_timestamp(path: Path) -> Optional[datetime]:
+    stamp = path.name[len(SNAPSHOT_PREFIX):-len(SNAPSHOT_SUFFIX)]
+    try:
+        return datetime.strptime(stamp[:15], "%Y%m%d-%H%M%S")
+    except ValueError:
+        return None
+
+def list_snapshots() -> List[SnapshotInfo]:
+    """Snapshots in the snapshot folder, newest first."""
+    snapshots = []
+    for path in get_snapshot_dir().glob(f"{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}"):
+        created_at = _parse_timestamp(path)
+        if created_at is not None:
+            snapshots.append(SnapshotInfo(path, created_at, path.stat().st_size))
+    snapshots.sort(key=lambda s: (s.created_at, s.path.stat().st_mtime_ns), reverse=True)
+    return snapshots
+
+def _new_snapshot_path(snap_dir: Path) -> Path:
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = snap_dir / f"{SNAPSHOT_PREFIX}{stamp}{SNAPSHOT_SUFFIX}"
+    n = 1
+    while path.exists():
+        path = snap_dir / f"{SNAPSHOT_PREFIX}{stamp}-{n}{SNAPSHOT_SUFFIX}"
+        n += 1
+    return path
+
+def _write_snapshot() -> Path:
+    """Online copy of the live database, gzip-compressed; caller holds the lock."""
+    snap_dir = get_snapshot_dir()
+    target = _new_snapshot_path(snap_dir)
+    raw_tmp = target.with_name(target.name + ".raw")
+    gz_tmp = target.with_name(target.name + ".part")
+    try:
+        src = get_connection()
+        dst = sqlite3.connect(str(raw_tmp))
+        try:
+            _online_copy(src, dst)
+        finally:
+            dst.close()
+            src.close()
+
+        with open(raw_tmp, "rb") as f_in, gzip.open(gz_tmp, "wb", compresslevel=6) as f_out:
+            shutil.copyfileobj(f_in, f_out, length=1024 * 1024)
+        gz_tmp.replace(target)
+    finally:
+        raw_tmp.unlink(missing_ok=True)
+        gz_tmp.unlink(missing_ok=True)
+    return target
+
+def create_snapshot() -> SnapshotInfo:
+    """
+    Copy the live database with the SQLite online backup API and store it
+    gzip-compressed under a timestamped name, then apply retention.
+    Safe to call while the app is serving students.
+    """
+    with _snapshot_lock:
+        target = _write_snapshot()
+        apply_retention()
+        return SnapshotInfo(target, datetime.now(), target.stat().st_size)
+
+def apply_retention(keep: Optional[int] = None, max_age_days: Optional[int] = None) -> int:
+    """Delete snapshots beyond the newest `keep` or older than `max_age_days`."""
+    _, default_keep, default_age = get_snapshot_settings()
+    keep = default_keep if keep is None else keep
+    max_age_days = default_age if max_age_days is None else max_age_days
+
+    cutoff = datetime.now() - timedelta(days=max_age_days) if max_age_days else None
+    removed = 0
+    for i, snap in enumerate(list_snapshots()):
+        # The newest snapshot is always kept, whatever its age.
+        too_old = cutoff is not None and snap.created_at < cutoff and i > 0
+        if i >= keep or too_old:
+            snap.path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+def restore_snapshot(snapshot_path: Path, safety_snapshot: bool = True) -> None:
+    """
+    Restore the live database from a snapshot, online.
+    The snapshot is decompressed and checked first; by default the current
+    state is then snapshotted too, so a restore can itself be undone
+    (retention runs after the restore, so it may drop the restored snapshot
+    but never before it was read).
+    The restored change log would hand out revision numbers again, so the log
+    is restarted above the pre-restore head: every client gets a full resync
+    and caches keyed by course revision (decks, question bank) are rebuilt.
+    """
+    snapshot_path = Path(snapshot_path)
+    if not snapshot_path.exists():
+        raise FileNotFoundError(snapshot_path)
+
+    with _snapshot_lock:
+        raw_tmp = get_snapshot_dir() / (snapshot_path.name + ".restore")
+        try:
+            # Read the snapshot before anything else touches the folder:
+            # retention after the safety snapshot may delete it.
+            with gzip.open(snapshot_path, "rb") as f_in, open(raw_tmp, "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out, length=1024 * 1024)
+
+            src = sqlite3.connect(str(raw_tmp))
+            try:
+                result = src.execute("PRAGMA quick_check").fetchone()[0]
+                if result != "ok":
+                    raise sqlite3.DatabaseError(f"Snapshot failed integrity check: {result}")
+                if safety_snapshot:
+                    _write_snapshot()
+                dst = get_connection(get_db_path())
+                try:
+                    head = get_log_head(dst)
+                    _online_copy(src, dst)
+                finally:
+                    dst.close()
+            finally:
+                src.close()
+        finally:
+            raw_tmp.unlink(missing_ok=True)
+        if safety_snapshot:
+            apply_retention()
+    # Snapshots taken before a schema change are upgraded in place.
+    init_db()
+    with get_connection(get_db_path()) as conn:
+        restart_change_log(conn, max(head, get_log_head(conn)))
+    clear_decks()
+    invalidate()
+
+def start_snapshot_scheduler() -> bool:
+    """
+    Start periodic snapshots if FIT_VOCAB_SNAPSHOT_INTERVAL_MIN is set.
+    Returns True when the scheduler is running.
+    """
+    interval_min, _, _ = get_snapshot_settings()
+    if not interval_min:
+        return False
+    # One task per tenant; the worker thread does not inherit the caller's tenant.
+    tenant = get_tenant()
+
+    def _snapshot_tenant() -> None:
+        with use_tenant(tenant):
+            create_snapshot()
+
+    start_periodic_task(f"vocab-snapshots:{tenant}", _snapshot_tenant, interval_min * 60)
+    return True
@@ -5,6 +5,10 @@ import streamlit as st
 # Keys used across the app (kept in one place)
 ADMIN_KEY = "is_admin"
 COURSE_KEY = "current_course_id"
+# Tenant chosen at admin login (None = from the URL or config).
+TENANT_KEY = "tenant"
+# Tenant whose data the session state currently refers to.
+ACTIVE_TENANT_KEY = "active_tenant"
 
 FLASH_INDEX_KEY = "flash_index"
 FLASH_SHOW_DEF_KEY = "show_def"
@@ -16,13 +20,26 @@ QUIZ_ANSWER_CHECKED_KEY = "quiz_answer_checked"
 QUIZ_LAST_CORRECT_KEY = "quiz_last_correct"
 QUIZ_ORDER_KEY = "quiz_order"
 QUIZ_QUESTIONS_KEY = "quiz_questions"
+QUIZ_RUN_ID_KEY = "quiz_run_id"
+# Question type picked by the student (key of services.quiz.QUESTION_TYPES,
+# or "mixed"), and the (type, vocab ids) the current question list was made for.
+QUIZ_TYPE_KEY = "quiz_type"
+QUIZ_SOURCE_KEY = "quiz_source"
 
 SEARCH_QUERY_KEY = "search_query"
+# Per-session services.search.IncrementalSearch (cached matches of recent queries).
+SEARCH_STATE_KEY = "search_state"
+# Student list order: "en" or "ar" (see db/vocab_repo.get_vocab_for_course).
+SORT_ORDER_KEY = "sort_order"
+# Page of the student word list (1-based).
+WORD_LIST_PAGE_KEY = "word_list_page"
 
 def init_state() -> None:
     defaults = {
         ADMIN_KEY: False,
         COURSE_KEY: None,
+        TENANT_KEY: None,
+        ACTIVE_TENANT_KEY: None,
         FLASH_INDEX_KEY: 0,
         FLASH_SHOW_DEF_KEY: False,
         QUIZ_INDEX_KEY: 0,
@@ -32,7 +49,13 @@ def init_state() -> None:
         QUIZ_LAST_CORRECT_KEY: None,
         QUIZ_ORDER_KEY: None,
         QUIZ_QUESTIONS_KEY: None,
+        QUIZ_RUN_ID_KEY: None,
+        QUIZ_TYPE_KEY: "ar_en",
+        QUIZ_SOURCE_KEY: None,
         SEARCH_QUERY_KEY: "",
+        SEARCH_STATE_KEY: None,
+        SORT_ORDER_KEY: "en",
+        WORD_LIST_PAGE_KEY: 1,
     }
     for k, v in defaults.items():
         if k not in st.session_state:
@@ -50,3 +73,7 @@ def reset_learning_state() -> None:
     st.session_state[QUIZ_LAST_CORRECT_KEY] = None
     st.session_state[QUIZ_ORDER_KEY] = None
     st.session_state[QUIZ_QUESTIONS_KEY] = None
+    st.session_state[QUIZ_RUN_ID_KEY] = None
+    st.session_state[QUIZ_SOURCE_KEY] = None
+
+    st.session_state[WORD_LIST_PAGE_KEY] = 1
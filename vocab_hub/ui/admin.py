@@ -3,9 +3,28 @@ from __future__ import annotations
 import pandas as pd
 import streamlit as st
 
-from ..db.courses_repo import add_course, update_course, delete_course, get_courses
-from ..db.vocab_repo import add_vocab_item, update_vocab_item, delete_vocab_item, get_vocab_for_course
+from ..db.analytics_repo import get_course_quiz_stats, get_hardest_terms
+from ..db.courses_repo import (
+    add_course,
+    update_course,
+    delete_course,
+    get_courses,
+    get_courses_by_name,
+)
+from ..db.media_repo import detach_media, get_media_for_vocab
+from ..db.vocab_repo import (
+    add_vocab_item,
+    update_vocab_item,
+    delete_vocab_item,
+    get_vocab_by_term,
+    get_vocab_for_course,
+)
+from ..services.decks import get_deck
+from ..services.exam_papers import exam_batch_to_csv, generate_exam_batch
 from ..services.importer import import_vocab_from_excel
+from ..services.maintenance import get_db_stats, get_last_maintenance, run_maintenance
+from ..services.media import MediaError, prune_unused_media, store_media
+from ..services.snapshots import create_snapshot, list_snapshots, restore_snapshot
 from ..utils import rerun_app
 
 def _courses_tab() -> None:
@@ -70,7 +89,7 @@ def _vocab_tab() -> None:
 
     course_names = [c["name"] for c in courses]
     selected_name = st.selectbox("Select course", course_names)
-    selected_course = next(c for c in courses if c["name"] == selected_name)
+    selected_course = get_courses_by_name()[selected_name]
     selected_course_id = selected_course["id"]
 
     st.markdown(f"#### Add vocabulary to: {selected_course['name']}")
@@ -108,6 +127,9 @@ def _vocab_tab() -> None:
         st.info("No vocabulary yet for this course.")
         return
 
+    _media_section(vocab)
+    _term_lookup_section(courses)
+
     for w in vocab:
         with st.expander(f"{w['term_en']} | {w['term_ar']}"):
             with st.form(f"edit_vocab_{w['id']}"):
@@ -121,6 +143,12 @@ def _vocab_tab() -> None:
                     key=f"diff_{w['id']}",
                 )
                 new_category = st.text_input("Category", value=w["category"] or "")
+                this_course_only = st.checkbox(
+                    "Apply changes to this course only",
+                    help="Terms are shared between courses. By default an edit "
+                    "updates the term in every course that uses it.",
+                    key=f"local_{w['id']}",
+                )
 
                 col1, col2 = st.columns(2)
                 with col1:
@@ -141,6 +169,7 @@ def _vocab_tab() -> None:
                             new_example,
                             new_difficulty,
                             new_category,
+                            shared=not this_course_only,
                         )
                         if ok:
                             st.success("Vocabulary updated.")
@@ -152,6 +181,57 @@ def _vocab_tab() -> None:
                     st.warning(f"Deleted '{w['term_en']}'.")
                     rerun_app()
 
+def _term_lookup_section(courses) -> None:
+    with st.expander("🔎 Find a term in all courses"):
+        query = st.text_input("English term", key="term_lookup")
+        if not query.strip():
+            return
+        rows = get_vocab_by_term(query)
+        if not rows:
+            st.info("No course uses this term.")
+            return
+        names = {c["id"]: c["name"] for c in courses}
+        st.table(
+            [
+                {
+                    "Course": names.get(r["course_id"], r["course_id"]),
+                    "Term (AR)": r["term_ar"],
+                    "Definition (EN)": r["definition_en"],
+                    "Difficulty": r["difficulty"],
+                }
+                for r in rows
+            ]
+        )
+
+def _media_section(vocab) -> None:
+    with st.expander("🖼️ Images & pronunciation audio"):
+        labels = [f"{w['term_en']} | {w['term_ar']}" for w in vocab]
+        label = st.selectbox("Term", labels, key="media_term")
+        word = vocab[labels.index(label)]
+
+        for media in get_media_for_vocab(word["id"]):
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.write(f"{media['kind']}: {media['filename']} ({media['size_bytes'] / 1024:.0f} KB)")
+            with col2:
+                if st.button("Remove", key=f"media_remove_{media['id']}"):
+                    detach_media(media["id"])
+                    prune_unused_media()
+                    rerun_app()
+
+        with st.form("media_upload_form", clear_on_submit=True):
+            uploaded = st.file_uploader(
+                "Attach an image or audio file",
+                type=["png", "jpg", "jpeg", "gif", "webp", "mp3", "wav", "ogg", "m4a"],
+            )
+            if st.form_submit_button("Attach") and uploaded is not None:
+                try:
+                    store_media(word["id"], uploaded.getvalue(), uploaded.name, uploaded.type or "")
+                except MediaError as e:
+                    st.error(str(e))
+                else:
+                    st.success(f"Attached '{uploaded.name}' to {word['term_en']}.")
+
 def _bulk_tab() -> None:
     st.markdown("### 📥 Bulk import vocabulary from Excel files")
     st.info(
@@ -181,11 +261,215 @@ def _bulk_tab() -> None:
             f"Skipped {stats.skipped_missing_fields} rows (missing required fields)."
         )
 
+def _analytics_tab() -> None:
+    st.markdown("### 📊 Quiz analytics")
+
+    stats = get_course_quiz_stats()
+    if not stats:
+        st.info("No quiz attempts recorded yet.")
+        return
+
+    summary = pd.DataFrame(
+        [
+            {
+                "Course": s["course_name"],
+                "Answers": s["attempts"],
+                "Accuracy (%)": round(100 * s["correct"] / s["attempts"]) if s["attempts"] else 0,
+                "Quizzes finished": s["quizzes_finished"],
+                "Avg. final score (%)": (
+                    round(100 * s["finished_score_sum"] / s["finished_question_sum"])
+                    if s["finished_question_sum"] else None
+                ),
+                "Last answer": s["last_attempt_at"],
+            }
+            for s in stats
+        ]
+    )
+    st.dataframe(summary, hide_index=True)
+
+    st.markdown("#### Hardest terms")
+    course_names = [s["course_name"] for s in stats]
+    selected_name = st.selectbox("Course", course_names, key="analytics_course")
+    selected = stats[course_names.index(selected_name)]
+    min_attempts = st.slider("Minimum answers per term", 1, 20, 3, key="analytics_min_attempts")
+
+    hardest = get_hardest_terms(selected["course_id"], limit=15, min_attempts=min_attempts)
+    if not hardest:
+        st.info("Not enough answers yet for this course.")
+        return
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Term (EN)": h["term_en"],
+                    "Term (AR)": h["term_ar"],
+                    "Answers": h["attempts"],
+                    "Accuracy (%)": round(100 * h["accuracy"]),
+                    "Most confused with": h["top_confusion_term"] or "",
+                    "Times confused": h["top_confusion_count"] or 0,
+                }
+                for h in hardest
+            ]
+        ),
+        hide_index=True,
+    )
+
+def _exam_papers_tab() -> None:
+    st.markdown("### 📝 Exam papers")
+    st.caption(
+        "Generates many multiple-choice variants at once, each with the same mix of "
+        "categories and difficulties. The same seed always gives the same papers, "
+        "so a single variant can be regenerated later."
+    )
+
+    courses = get_courses()
+    if not courses:
+        st.info("No courses found.")
+        return
+    course_names = [c["name"] for c in courses]
+    selected_name = st.selectbox("Course", course_names, key="exam_course")
+    course = get_courses_by_name()[selected_name]
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        n_variants = st.number_input("Variants", 1, 5000, 30, key="exam_variants")
+    with col2:
+        n_questions = st.number_input("Questions per variant", 1, 200, 20, key="exam_questions")
+    with col3:
+        seed = st.number_input("Seed", 0, 2**31 - 1, 2024, key="exam_seed")
+
+    if st.button("Generate papers"):
+        deck = get_deck(course["id"])
+        if deck.count < 2:
+            st.warning("The course needs at least 2 terms.")
+            return
+        tables = deck.exam_tables(int(seed))
+        batch = generate_exam_batch(tables, int(n_variants), int(n_questions), int(seed))
+        st.success(
+            f"Generated {batch.n_variants} variants "
+            f"({len(batch.item) // batch.n_variants} questions each)."
+        )
+        st.download_button(
+            "Download papers + answer key (CSV)",
+            # utf-8-sig so Excel shows Arabic text correctly.
+            data=exam_batch_to_csv(batch).encode("utf-8-sig"),
+            file_name=f"exam-{selected_name}-seed{int(seed)}.csv",
+            mime="text/csv",
+        )
+
+def _backups_tab() -> None:
+    st.markdown("### 💾 Database snapshots")
+    st.caption(
+        "Snapshots are copied online (the app keeps running) and stored compressed. "
+        "Set FIT_VOCAB_SNAPSHOT_INTERVAL_MIN to take them automatically."
+    )
+
+    if st.button("Create snapshot now"):
+        try:
+            snap = create_snapshot()
+        except Exception as e:
+            st.error(f"Snapshot failed: {e}")
+        else:
+            st.success(f"Snapshot '{snap.name}' created ({snap.size_bytes / 1024:.0f} KB).")
+
+    snapshots = list_snapshots()
+    if not snapshots:
+        st.info("No snapshots yet.")
+        return
+
+    st.table(
+        [
+            {
+                "Snapshot": s.name,
+                "Created": s.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "Size (KB)": round(s.size_bytes / 1024),
+            }
+            for s in snapshots
+        ]
+    )
+
+    st.markdown("#### Restore")
+    names = [s.name for s in snapshots]
+    selected_name = st.selectbox("Snapshot to restore", names)
+    confirm = st.checkbox(
+        "I understand the current data will be replaced "
+        "(a safety snapshot is taken first)."
+    )
+    if st.button("Restore snapshot", disabled=not confirm):
+        selected = snapshots[names.index(selected_name)]
+        try:
+            restore_snapshot(selected.path)
+        except Exception as e:
+            st.error(f"Restore failed: {e}")
+        else:
+            st.success(f"Database restored from '{selected.name}'.")
+            rerun_app()
+
+def _maintenance_tab() -> None:
+    st.markdown("### 🧹 Database maintenance")
+    st.caption(
+        "Refreshes query statistics, returns free space to the disk, compacts the "
+        "change log and checks the file. Runs automatically in the background "
+        "(FIT_VOCAB_MAINTENANCE_INTERVAL_MIN, default daily)."
+    )
+
+    if st.button("Run maintenance now"):
+        with st.spinner("Running maintenance..."):
+            try:
+                report = run_maintenance()
+            except Exception as e:
+                st.error(f"Maintenance failed: {e}")
+            else:
+                st.success(
+                    f"Done in {report.get('duration_s', 0)} s, "
+                    f"{report.get('freed_pages', 0)} pages returned to the disk."
+                )
+
+    stats = get_db_stats()
+    if stats is None:
+        st.info("The current storage backend has no database file.")
+        return
+    col1, col2, col3 = st.columns(3)
+    col1.metric("File size (KB)", round(stats["file_bytes"] / 1024))
+    col2.metric(
+        "Free pages",
+        stats["free_pages"],
+        help=f"{round(stats['free_bytes'] / 1024)} KB of the file hold no data.",
+    )
+    col3.metric("Free space (%)", round(100 * stats["free_pages"] / max(1, stats["page_count"])))
+    st.caption(
+        f"auto_vacuum: {stats['auto_vacuum']} · journal: {stats['journal_mode']} · "
+        f"page size: {stats['page_size']} B"
+    )
+
+    last = get_last_maintenance()
+    st.markdown("#### Last run")
+    if last is None:
+        st.info("Maintenance has not run on this database yet.")
+    else:
+        st.table([{"Step": k, "Result": str(v)} for k, v in last.items()])
+
 def render_admin_mode() -> None:
     st.subheader("Admin mode")
 
-    tab_courses, tab_vocab, tab_files = st.tabs(
-        ["Courses", "Vocabulary", "Bulk Import (Excel files)"]
+    (
+        tab_courses,
+        tab_vocab,
+        tab_files,
+        tab_analytics,
+        tab_exams,
+        tab_backups,
+        tab_maintenance,
+    ) = st.tabs(
+        [
+            "Courses",
+            "Vocabulary",
+            "Bulk Import (Excel files)",
+            "Analytics",
+            "Exam papers",
+            "Backups",
+            "Maintenance",
+        ]
     )
 
     with tab_courses:
@@ -194,3 +478,11 @@ def render_admin_mode() -> None:
         _vocab_tab()
     with tab_files:
         _bulk_tab()
+    with tab_analytics:
+        _analytics_tab()
+    with tab_exams:
+        _exam_papers_tab()
+    with tab_backups:
+        _backups_tab()
+    with tab_maintenance:
+        _maintenance_tab()
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import html
+import threading
+from collections import OrderedDict
+from string import Template
+from typing import Mapping, Optional, Tuple
+
+import streamlit as st
+
+# ---------------------------
+# HTML fragments of the student views.
+# The CSS is sent once per page (inject_styles) and the cards only carry class
+# names. Every field is HTML-escaped, so text typed by admins is shown as-is
+# and cannot change the page markup. Rendered fragments are kept in a small
+# LRU keyed by (item id, course revision, view).
+# ---------------------------
+
+FRAGMENT_CACHE_SIZE = 2048
+
+_STYLES = """
+<style>
+.fvh-card {
+  padding: 24px;
+  border-radius: 18px;
+  border: 1px solid rgba(148,163,184,0.35);
+  background:
+    radial-gradient(circle at top left, rgba(59,130,246,0.20), transparent 55%),
+    radial-gradient(circle at bottom right, rgba(236,72,153,0.20), transparent 55%),
+    #0f172a;
+  color: #e5e7eb;
+  box-shadow: 0 18px 35px rgba(15,23,42,0.7);
+}
+.fvh-card.fvh-quiz {
+  border-color: rgba(148,163,184,0.4);
+  background:
+    radial-gradient(circle at top left, rgba(59,130,246,0.20), transparent 55%),
+    radial-gradient(circle at bottom right, rgba(236,72,153,0.20), transparent 55%),
+    #020617;
+  box-shadow: 0 18px 40px rgba(15,23,42,0.75);
+  margin-bottom: 16px;
+}
+.fvh-label {
+  font-size: 0.75rem; text-transform: uppercase;
+  letter-spacing: .12em; opacity: .75; margin-bottom: 2px;
+}
+.fvh-quiz .fvh-label { font-size: 0.8rem; letter-spacing: .14em; margin-bottom: 4px; }
+.fvh-term-en { font-size: 2.1rem; font-weight: 700; margin: 0 0 10px 0; }
+.fvh-term-ar { font-size: 1.7rem; font-weight: 600; margin: 0 0 8px 0; }
+.fvh-chips { display: flex; flex-wrap: wrap; gap: 8px; margin-top: 8px; }
+.fvh-chip {
+  font-size: 0.75rem; padding: 4px 10px; border-radius: 999px;
+  border: 1px solid rgba(148,163,184,0.7); background: rgba(15,23,42,0.8);
+}
+.fvh-chip.fvh-category { background: rgba(59,130,246,0.25); border-color: rgba(59,130,246,0.5); }
+.fvh-heading { font-size: 1.1rem; font-weight: 600; margin-bottom: 12px; }
+.fvh-prompt { font-size: 2.1rem; font-weight: 700; margin-bottom: 4px; }
+.fvh-prompt.fvh-long { font-size: 1.2rem; }
+.fvh-rtl { direction: rtl; text-align: right; }
+.fvh-details p { margin: 0 0 6px 0; }
+</style>
+"""
+
+# Single-line templates: Markdown would turn indented lines into code blocks.
+_FLASHCARD = Template(
+    '<div class="fvh-card">'
+    '<div class="fvh-label">English term</div>'
+    '<div class="fvh-term-en">$term_en</div>'
+    '<div class="fvh-label">المصطلح بالعربية</div>'
+    '<div class="fvh-term-ar" dir="rtl">$term_ar</div>'
+    '<div class="fvh-chips"><span class="fvh-chip">Difficulty: $stars</span>$category</div>'
+    '</div>'
+)
+_CATEGORY_CHIP = Template('<span class="fvh-chip fvh-category">$category</span>')
+
+_QUESTION = Template(
+    '<div class="fvh-card fvh-quiz">'
+    '<div class="fvh-label">Multiple-choice question</div>'
+    '<div class="fvh-heading">$heading</div>'
+    '<div class="$prompt_class">$prompt</div>'
+    '</div>'
+)
+
+_WORD_DETAILS = Template(
+    '<div class="fvh-details">'
+    '<p><strong>Definition (EN):</strong> $definition_en</p>'
+    '<p dir="rtl"><strong>التعريف (عربي):</strong> $definition_ar</p>'
+    '$example$category$difficulty'
+    '</div>'
+)
+_DETAIL_LINE = Template('<p><strong>$label:</strong> $value</p>')
+
+def _escape(value) -> str:
+    """
+    HTML-escaped text on one line: a blank line inside a raw-HTML block
+    would end it, and Markdown would then parse the rest of the card.
+    """
+    text = html.escape(str(value or ""), quote=True)
+    return "<br>".join(text.splitlines())
+
+def difficulty_stars(value) -> str:
+    return "⭐" * max(1, min(3, int(value or 1)))
+
+class _FragmentCache:
+    """
+    LRU of rendered fragments. An entry also remembers the fields it was
+    rendered from, so a key reused with other content (another tenant, a
+    question bank not yet refreshed) renders again instead of showing stale
+    markup.
+    """
+
+    def __init__(self, max_items: int) -> None:
+        self._max_items = max_items
+        self._items: "OrderedDict[tuple, Tuple[tuple, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, fields: tuple) -> Optional[str]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None or entry[0] != fields:
+                return None
+            self._items.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: tuple, fields: tuple, fragment: str) -> None:
+        with self._lock:
+            self._items[key] = (fields, fragment)
+            self._items.move_to_end(key)
+            while len(self._items) > self._max_items:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+_fragments = _FragmentCache(FRAGMENT_CACHE_SIZE)
+
+def _cached(key: tuple, fields: tuple, render) -> str:
+    fragment = _fragments.get(key, fields)
+    if fragment is None:
+        fragment = render()
+        _fragments.put(key, fields, fragment)
+    return fragment
+
+def inject_styles() -> None:
+    """Send the card styles; call once per script run, before any card."""
+    st.markdown(_STYLES, unsafe_allow_html=True)
+
+def flashcard_html(word: Mapping, revision: int) -> str:
+    fields = (word["term_en"], word["term_ar"], word["category"], word["difficulty"])
+
+    def render() -> str:
+        category = _escape(word["category"])
+        return _FLASHCARD.substitute(
+            term_en=_escape(word["term_en"]),
+            term_ar=_escape(word["term_ar"]),
+            stars=difficulty_stars(word["difficulty"]),
+            category=_CATEGORY_CHIP.substitute(category=category) if category else "",
+        )
+
+    return _cached((word["id"], revision, "flashcard"), fields, render)
+
+def question_html(question: Mapping, heading: str, rtl: bool, revision: int) -> str:
+    """Prompt card of a quiz question (as returned by services.quiz.load_question)."""
+    fields = (question["prompt"], heading, rtl)
+
+    def render() -> str:
+        prompt_class = "fvh-prompt"
+        if question["qtype"] == "def_term":
+            prompt_class += " fvh-long"
+        if rtl:
+            prompt_class += " fvh-rtl"
+        return _QUESTION.substitute(
+            heading=_escape(heading),
+            prompt_class=prompt_class,
+            prompt=_escape(question["prompt"]),
+        )
+
+    view = f"question:{question['qtype']}"
+    return _cached((question["vocab_id"], revision, view), fields, render)
+
+def word_details_html(word: Mapping, revision: int) -> str:
+    """Body of a word-list entry: definitions, example, category, difficulty."""
+    fields = tuple(
+        word[f] for f in ("definition_en", "definition_ar", "example_en", "category", "difficulty")
+    )
+
+    def render() -> str:
+        def line(label: str, value: str) -> str:
+            return _DETAIL_LINE.substitute(label=label, value=value) if value else ""
+
+        return _WORD_DETAILS.substitute(
+            definition_en=_escape(word["definition_en"]),
+            definition_ar=_escape(word["definition_ar"]),
+            example=line("Example", _escape(word["example_en"])),
+            category=line("Category", _escape(word["category"])),
+            difficulty=line("Difficulty", difficulty_stars(word["difficulty"]) if word["difficulty"] else ""),
+        )
+
+    return _cached((word["id"], revision, "details"), fields, render)
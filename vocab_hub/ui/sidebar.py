@@ -2,8 +2,40 @@ from __future__ import annotations
 
 import streamlit as st
 
-from ..config import APP_NAME, get_admin_password
-from ..state import ADMIN_KEY
+from typing import Optional
+
+from ..config import (
+    APP_NAME,
+    get_admin_password,
+    get_allowed_tenants,
+    get_default_tenant,
+    get_tenant,
+    normalize_tenant,
+)
+from ..state import ADMIN_KEY, TENANT_KEY
+from ..utils import rerun_app
+
+def resolve_tenant() -> Optional[str]:
+    """
+    Tenant for this run: the one chosen at admin login, else ?tenant= in the
+    URL, else FIT_VOCAB_TENANT. Returns None (after showing an error) when the
+    requested tenant is not valid/allowed.
+    """
+    tenant = st.session_state[TENANT_KEY]
+    if tenant is not None:
+        return tenant
+    requested = st.query_params.get("tenant")
+    if not requested:
+        return get_default_tenant()
+    try:
+        tenant = normalize_tenant(requested)
+    except ValueError:
+        tenant = None
+    allowed = get_allowed_tenants()
+    if tenant is None or (allowed is not None and tenant not in allowed):
+        st.error(f"Unknown faculty: {requested!r}")
+        return None
+    return tenant
 
 def render_sidebar() -> str:
     """
@@ -16,16 +48,33 @@ def render_sidebar() -> str:
     if mode == "Admin":
         if not st.session_state[ADMIN_KEY]:
             st.sidebar.subheader("Admin login")
+            tenant = get_tenant()
+            allowed = get_allowed_tenants()
+            if allowed:
+                options = allowed if tenant in allowed else [tenant] + allowed
+                tenant = st.sidebar.selectbox(
+                    "Faculty", options, index=options.index(tenant),
+                    format_func=lambda t: t or "(default)",
+                )
             pwd = st.sidebar.text_input("Password", type="password")
             if st.sidebar.button("Login"):
-                if pwd == get_admin_password():
+                if pwd == get_admin_password(tenant=tenant):
                     st.session_state[ADMIN_KEY] = True
                     st.sidebar.success("Logged in as admin.")
+                    # The admin session stays on this tenant whatever the URL says.
+                    st.session_state[TENANT_KEY] = tenant
+                    if tenant != get_tenant():
+                        # This run was routed to the previous tenant.
+                        rerun_app()
                 else:
                     st.sidebar.error("Incorrect password.")
         else:
             st.sidebar.success("Admin mode")
             if st.sidebar.button("Logout"):
                 st.session_state[ADMIN_KEY] = False
+                st.session_state[TENANT_KEY] = None
+
+    if get_tenant():
+        st.sidebar.caption(f"Faculty: {get_tenant()}")
 
     return mode
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
+import math
 import random
 import sqlite3
+import uuid
 from typing import List
 
 import streamlit as st
 
-from ..db.courses_repo import get_courses
-from ..db.vocab_repo import get_vocab_for_course, filter_vocab
-from ..services.quiz import build_quiz_questions
+from ..db.analytics_repo import record_quiz_attempt, record_quiz_finished
+from ..db.courses_repo import get_courses, get_courses_by_name
+from ..db.media_repo import get_media_for_vocab
+from ..services.decks import get_deck
+from ..services.media import get_thumbnail, read_media
+from ..services.quiz import QUESTION_TYPE_LABELS, load_question, start_quiz
+from ..services.search import SEARCH_MIN_CHARS, IncrementalSearch, effective_query
 from ..state import (
     COURSE_KEY,
     SEARCH_QUERY_KEY,
+    SEARCH_STATE_KEY,
     FLASH_INDEX_KEY,
     FLASH_SHOW_DEF_KEY,
     QUIZ_INDEX_KEY,
@@ -20,10 +27,17 @@ from ..state import (
     QUIZ_ANSWER_CHECKED_KEY,
     QUIZ_LAST_CORRECT_KEY,
     QUIZ_QUESTIONS_KEY,
+    QUIZ_RUN_ID_KEY,
+    QUIZ_SOURCE_KEY,
+    QUIZ_TYPE_KEY,
+    SORT_ORDER_KEY,
+    WORD_LIST_PAGE_KEY,
     reset_learning_state,
 )
+from ..utils import rerun_app
+from .render import flashcard_html, inject_styles, question_html, word_details_html
 
-def _render_flashcards(vocab: List[sqlite3.Row]) -> None:
+def _render_flashcards(vocab: List[sqlite3.Row], revision: int) -> None:
     st.markdown("#### 🔁 Flashcards")
 
     if st.session_state[FLASH_INDEX_KEY] >= len(vocab):
@@ -32,63 +46,24 @@ def _render_flashcards(vocab: List[sqlite3.Row]) -> None:
     idx = st.session_state[FLASH_INDEX_KEY]
     word = vocab[idx]
 
-    term_en = word["term_en"] or ""
-    term_ar = word["term_ar"] or ""
-    category = word["category"] or ""
-    difficulty = int(word["difficulty"] or 1)
-    difficulty = max(1, min(3, difficulty))
-    stars = "⭐" * difficulty
-
     cols = st.columns([2, 1])
 
     with cols[0]:
         st.markdown("##### Term (EN / AR)")
 
-        card_html = f"""
-        <div style="
-            padding: 24px;
-            border-radius: 18px;
-            border: 1px solid rgba(148, 163, 184, 0.35);
-            background:
-                radial-gradient(circle at top left, rgba(59,130,246,0.20), transparent 55%),
-                radial-gradient(circle at bottom right, rgba(236,72,153,0.20), transparent 55%),
-                #0f172a;
-            color: #e5e7eb;
-            box-shadow: 0 18px 35px rgba(15,23,42,0.7);
-        ">
-          <div style="font-size: 0.75rem; text-transform: uppercase;
-                      letter-spacing: .12em; opacity: .75; margin-bottom: 2px;">
-            English term
-          </div>
-          <div style="font-size: 2.1rem; font-weight: 700; margin: 0 0 10px 0;">
-            {term_en}
-          </div>
-
-          <div style="font-size: 0.75rem; text-transform: uppercase;
-                      letter-spacing: .12em; opacity: .75; margin-bottom: 2px;">
-            المصطلح بالعربية
-          </div>
-          <div style="font-size: 1.7rem; font-weight: 600; margin: 0 0 8px 0;">
-            {term_ar}
-          </div>
-
-          <div style="display:flex; flex-wrap:wrap; gap:8px; margin-top: 8px;">
-            <span style="
-                font-size: 0.75rem;
-                padding: 4px 10px;
-                border-radius: 999px;
-                border: 1px solid rgba(148,163,184,0.7);
-                background: rgba(15,23,42,0.8);
-            ">
-              Difficulty: {stars}
-            </span>
-            {f'<span style="font-size: 0.75rem; padding: 4px 10px; border-radius: 999px; background: rgba(59,130,246,0.25); border: 1px solid rgba(59,130,246,0.5);">{category}</span>' if category else ""}
-          </div>
-        </div>
-        """
-        st.markdown(card_html, unsafe_allow_html=True)
+        st.markdown(flashcard_html(word, revision), unsafe_allow_html=True)
         st.write("")
 
+        # Media is looked up and read only for the card on screen.
+        for media in get_media_for_vocab(word["id"]):
+            try:
+                if media["kind"] == "image":
+                    st.image(get_thumbnail(media["sha256"]))
+                else:
+                    st.audio(read_media(media["sha256"]), format=media["mime_type"])
+            except OSError:
+                st.caption(f"Media file '{media['filename']}' is missing.")
+
         if not st.session_state[FLASH_SHOW_DEF_KEY]:
             if st.button("Show definition", key="btn_show_def"):
                 st.session_state[FLASH_SHOW_DEF_KEY] = True
@@ -131,25 +106,48 @@ def _render_flashcards(vocab: List[sqlite3.Row]) -> None:
             st.session_state[FLASH_SHOW_DEF_KEY] = False
 
 
-def _render_quiz(vocab: List[sqlite3.Row]) -> None:
+# Question type -> (question heading, prompt is right-to-left).
+_QUESTION_HEADINGS = {
+    "ar_en": ("What is the correct English term for this Arabic word?", True),
+    "en_ar": ("What is the Arabic term for this English word?", False),
+    "def_term": ("Which term matches this definition?", False),
+    "term_def": ("Which definition matches this term?", False),
+}
+
+def _render_quiz(vocab: List[sqlite3.Row], revision: int) -> None:
     st.markdown("#### 📝 Quiz")
 
     if not vocab:
         st.info("No vocabulary available for quiz in this course.")
         return
 
-    # Build questions if missing or mismatched
-    questions = st.session_state.get(QUIZ_QUESTIONS_KEY)
-    if questions is None or len(questions) != len(vocab):
-        st.session_state[QUIZ_QUESTIONS_KEY] = build_quiz_questions(vocab)
+    qtype = st.selectbox(
+        "Question type",
+        [*QUESTION_TYPE_LABELS, "mixed"],
+        format_func=lambda t: QUESTION_TYPE_LABELS.get(t, "Mixed"),
+        key=QUIZ_TYPE_KEY,
+    )
+
+    # Start a quiz if missing or made for another type/vocabulary
+    course_id = st.session_state[COURSE_KEY]
+    source = (qtype, tuple(sorted(w["id"] for w in vocab)))
+    if st.session_state[QUIZ_QUESTIONS_KEY] is None or st.session_state[QUIZ_SOURCE_KEY] != source:
+        st.session_state[QUIZ_QUESTIONS_KEY] = start_quiz(
+            course_id, vocab, None if qtype == "mixed" else qtype
+        )
+        st.session_state[QUIZ_SOURCE_KEY] = source
+        st.session_state[QUIZ_RUN_ID_KEY] = uuid.uuid4().hex
         st.session_state[QUIZ_INDEX_KEY] = 0
         st.session_state[QUIZ_SCORE_KEY] = 0
         st.session_state[QUIZ_FINISHED_KEY] = False
         st.session_state[QUIZ_ANSWER_CHECKED_KEY] = False
         st.session_state[QUIZ_LAST_CORRECT_KEY] = None
-        questions = st.session_state[QUIZ_QUESTIONS_KEY]
+    questions = st.session_state[QUIZ_QUESTIONS_KEY]
 
     total_questions = len(questions)
+    if not total_questions:
+        st.info("None of these terms has the fields needed for this question type.")
+        return
 
     if st.session_state[QUIZ_FINISHED_KEY]:
         score = st.session_state[QUIZ_SCORE_KEY]
@@ -166,42 +164,21 @@ def _render_quiz(vocab: List[sqlite3.Row]) -> None:
         st.session_state[QUIZ_FINISHED_KEY] = True
         return
 
-    qdata = questions[qpos]
-    word = vocab[qdata["word_idx"]]
+    qdata = load_question(questions[qpos], st.session_state[QUIZ_RUN_ID_KEY])
+    if qdata is None:
+        # The term was edited away since the quiz started.
+        st.session_state[QUIZ_QUESTIONS_KEY] = None
+        rerun_app()
+        return
     options = qdata["options"]
-    correct_term = qdata["correct"]
+    correct_term = qdata["answer"]
+    heading, rtl = _QUESTION_HEADINGS[qdata["qtype"]]
 
     st.write("")
     st.progress(qpos / total_questions)
     st.caption(f"Question {qpos + 1} of {total_questions}")
 
-    question_html = f"""
-    <div style="
-        padding: 24px;
-        border-radius: 18px;
-        border: 1px solid rgba(148,163,184,0.4);
-        background:
-            radial-gradient(circle at top left, rgba(59,130,246,0.20), transparent 55%),
-            radial-gradient(circle at bottom right, rgba(236,72,153,0.20), transparent 55%),
-            #020617;
-        color: #e5e7eb;
-        box-shadow: 0 18px 40px rgba(15,23,42,0.75);
-        margin-bottom: 16px;
-    ">
-      <div style="font-size: 0.8rem; text-transform: uppercase;
-                  letter-spacing: .14em; opacity: .75; margin-bottom: 4px;">
-        Multiple-choice question
-      </div>
-      <div style="font-size: 1.1rem; font-weight: 600; margin-bottom: 12px;">
-        What is the correct English term for this Arabic word?
-      </div>
-      <div style="font-size: 2.1rem; font-weight: 700;
-                  margin-bottom: 4px; direction: rtl; text-align: right;">
-        {word['term_ar']}
-      </div>
-    </div>
-    """
-    st.markdown(question_html, unsafe_allow_html=True)
+    st.markdown(question_html(qdata, heading, rtl, revision), unsafe_allow_html=True)
 
     selected = st.radio(
         "Choose one answer:",
@@ -224,6 +201,13 @@ def _render_quiz(vocab: List[sqlite3.Row]) -> None:
         st.session_state[QUIZ_LAST_CORRECT_KEY] = is_correct
         if is_correct:
             st.session_state[QUIZ_SCORE_KEY] += 1
+        record_quiz_attempt(
+            course_id,
+            qdata["vocab_id"],
+            is_correct,
+            chosen_vocab_id=qdata["option_ids"][options.index(selected)],
+            quiz_run_id=st.session_state[QUIZ_RUN_ID_KEY],
+        )
 
     if st.session_state[QUIZ_ANSWER_CHECKED_KEY]:
         if st.session_state[QUIZ_LAST_CORRECT_KEY]:
@@ -240,21 +224,34 @@ def _render_quiz(vocab: List[sqlite3.Row]) -> None:
             st.session_state[QUIZ_FINISHED_KEY] = True
             st.session_state[QUIZ_ANSWER_CHECKED_KEY] = False
             st.session_state[QUIZ_LAST_CORRECT_KEY] = None
+            record_quiz_finished(course_id, st.session_state[QUIZ_SCORE_KEY], total_questions)
 
 
-def _render_word_list(vocab: List[sqlite3.Row]) -> None:
+WORD_LIST_PAGE_SIZE = 50
+
+# Sidebar label -> list order.
+_SORT_ORDERS = {"English A–Z": "en", "Arabic أ–ي": "ar"}
+
+def _render_word_list(vocab: List[sqlite3.Row], revision: int) -> None:
     st.markdown("#### 📖 Word list")
-    for w in vocab:
-        with st.expander(f"{w['term_en']}  |  {w['term_ar']}"):
-            st.write("**Definition (EN):**", w["definition_en"])
-            st.write("**التعريف (عربي):**", w["definition_ar"])
-            if w["example_en"]:
-                st.write("**Example:**", w["example_en"])
-            if w["category"]:
-                st.write("**Category:**", w["category"])
-            if w["difficulty"]:
-                stars = "⭐" * int(w["difficulty"])
-                st.write("**Difficulty:**", stars)
+    order = st.session_state[SORT_ORDER_KEY]
+    pages = math.ceil(len(vocab) / WORD_LIST_PAGE_SIZE)
+    page = 1
+    if pages > 1:
+        # The list may have shrunk since the page was picked (course, search).
+        if st.session_state[WORD_LIST_PAGE_KEY] > pages:
+            st.session_state[WORD_LIST_PAGE_KEY] = pages
+        page = int(st.number_input("Page", 1, pages, key=WORD_LIST_PAGE_KEY))
+    offset = (page - 1) * WORD_LIST_PAGE_SIZE
+
+    # Deck rows decode their text on access: only this page is decoded.
+    for w in vocab[offset:offset + WORD_LIST_PAGE_SIZE]:
+        label = (
+            f"{w['term_ar']}  |  {w['term_en']}" if order == "ar" and w["term_ar"]
+            else f"{w['term_en']}  |  {w['term_ar']}"
+        )
+        with st.expander(label):
+            st.markdown(word_details_html(w, revision), unsafe_allow_html=True)
 
 
 def render_student_mode() -> None:
@@ -267,7 +264,7 @@ def render_student_mode() -> None:
 
     course_names = [c["name"] for c in courses]
     selected_name = st.sidebar.selectbox("Select a course", course_names)
-    selected_course = next(c for c in courses if c["name"] == selected_name)
+    selected_course = get_courses_by_name()[selected_name]
     selected_course_id = selected_course["id"]
 
     # reset when switching course
@@ -275,33 +272,56 @@ def render_student_mode() -> None:
         st.session_state[COURSE_KEY] = selected_course_id
         reset_learning_state()
 
+    deck = get_deck(selected_course_id)
+    if st.session_state[SEARCH_STATE_KEY] is None:
+        st.session_state[SEARCH_STATE_KEY] = IncrementalSearch()
+    search = st.session_state[SEARCH_STATE_KEY]
+
     search_input = st.sidebar.text_input(
         "Search vocabulary (EN/AR/definition)",
         value=st.session_state[SEARCH_QUERY_KEY],
     )
-    if search_input != st.session_state[SEARCH_QUERY_KEY]:
+    if search_input.strip() and not effective_query(search_input):
+        st.sidebar.caption(f"Type at least {SEARCH_MIN_CHARS} characters to search.")
+    previous_query = st.session_state[SEARCH_QUERY_KEY]
+    if search_input != previous_query:
         st.session_state[SEARCH_QUERY_KEY] = search_input
-        reset_learning_state()
+        # Keep the flashcard/quiz position if the same words still match.
+        if not search.same_matches(deck, previous_query, search_input):
+            reset_learning_state()
 
     view_mode = st.sidebar.radio("Learning mode", ["Flashcards", "Quiz", "Word List"])
 
-    all_vocab = get_vocab_for_course(selected_course_id)
-    vocab = filter_vocab(all_vocab, st.session_state[SEARCH_QUERY_KEY])
+    order_label = st.sidebar.radio(
+        "Sort order",
+        list(_SORT_ORDERS),
+        index=list(_SORT_ORDERS.values()).index(st.session_state[SORT_ORDER_KEY]),
+        horizontal=True,
+    )
+    order = _SORT_ORDERS[order_label]
+    if order != st.session_state[SORT_ORDER_KEY]:
+        # Same words in another order: restart the flashcards, keep the quiz.
+        st.session_state[SORT_ORDER_KEY] = order
+        st.session_state[FLASH_INDEX_KEY] = 0
+        st.session_state[FLASH_SHOW_DEF_KEY] = False
+
+    vocab = search.rows(deck, search_input, order)
 
     st.markdown(f"### Course: {selected_course['name']}")
     if selected_course["description"]:
         st.caption(selected_course["description"])
 
-    if not all_vocab:
+    if not deck.count:
         st.warning("No vocabulary added yet for this course.")
         return
     if not vocab:
         st.warning("No vocabulary matches your search in this course.")
         return
 
+    inject_styles()
     if view_mode == "Flashcards":
-        _render_flashcards(vocab)
+        _render_flashcards(vocab, deck.revision)
     elif view_mode == "Quiz":
-        _render_quiz(vocab)
+        _render_quiz(vocab, deck.revision)
     else:
-        _render_word_list(vocab)
+        _render_word_list(vocab, deck.revision)